@@ -9,8 +9,9 @@ Example:
 number of scrapped pages ~ 500
 
 Note: The ETL pipeline is not 100% efficient. The true number of scrapped pages
-will most likely be less than the expected amount. Adding DLQ (dead letter queues)
-and logging to better monitor the inefficiencies is on the todo list.
+will most likely be less than the expected amount. Messages that the transformers
+fail to process are retried through '<topic>.retry.N' topics and finally parked in
+'<topic>.dlq' (see RetryPolicy), where they can be inspected and replayed.
 
 Tip: Use an UI (e.g. Kafbat) to manually change the message offsets, thereby
 removing the need to populate the ETL pipeline with new start messages.
@@ -19,16 +20,17 @@ through the pipeline. That's why the SEND_E1_CMD variable is set to False.
 
 --- Running the Model
 The MCP will run forever unless interrupted by SIGINT or SIGTERM.
-Warning: Extractor 2 takes a long time to gracefully shut down.
-HSE2 is designed to empty its buffer, that holds 50 target urls, before 
-it is allowed to shutdown. This optimization traded shutdown speed for
-runtime speed. Speeding up preemption for HSE2 is on the todo list.
+On shutdown, Extractor 2 stops taking jobs, lets the pages in flight finish for up
+to SHUTDOWN_DEADLINE_SECONDS (30s), then cancels them. Jobs it did not scrape are
+left unacknowledged, so their offsets are not committed and Kafka redelivers them
+on the next run.
 """
 import time
 from source import (
     MainControlProgram,
     MCPHandshakeETLModel,
     HandshakeExtractor1Codec,
+    EXTRACTOR_1_CODEC,
     InterProcessGateway,
     KafkaTopicManager,
     KafkaConnectionConfig, 
@@ -40,18 +42,23 @@ from source import (
     get_topic_hse2,
     get_topic_hst1,
     get_topic_hst2,
+    get_retry_topics,
+    HandshakeTransformer1Config,
+    HandshakeTransformer2Config,
 )
 
 ADMIN_CONN = get_kafka_admin(KafkaAdminConfig.from_env())
 
 SEND_E1_CMD = True
-DEV_BROKER = InterProcessGateway(KafkaConnectionConfig(producer_config=KafkaProducerConfig.from_env()))
+DEV_BROKER = InterProcessGateway(KafkaConnectionConfig(producer_config=KafkaProducerConfig.from_env(preset='latency')))
 E1_MSG = HandshakeExtractor1Codec(start_page=1, end_page=5, per_page=50)
 
 
 if __name__ == "__main__":
 
     topics = [get_topic_hse1(), get_topic_hse2(), get_topic_hst1(), get_topic_hst2(), get_topic_hsl()]
+    topics += get_retry_topics(get_topic_hst1(), HandshakeTransformer1Config.retry_policy)
+    topics += get_retry_topics(get_topic_hst2(), HandshakeTransformer2Config.retry_policy)
     topic_manager = KafkaTopicManager(ADMIN_CONN)
     topic_manager.create_topics(topics)
     
@@ -66,7 +73,7 @@ if __name__ == "__main__":
 
     if SEND_E1_CMD:
         # For development, manually set SEND_E1_CMD to kickoff the etl pipeline.
-        DEV_BROKER.send(HandshakeExtractor1Codec, HandshakeExtractor1Codec.TOPIC, E1_MSG)
+        DEV_BROKER.send(EXTRACTOR_1_CODEC, HandshakeExtractor1Codec.TOPIC, E1_MSG)
         DEV_BROKER.flush(timeout=10)
 
     mcp = MainControlProgram(MCPHandshakeETLModel())
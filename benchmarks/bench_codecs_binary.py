@@ -0,0 +1,74 @@
+"""Compares the JSON + base64 html codecs with their binary envelope counterparts.
+
+For each codec, reports the bytes on the wire per message (value plus header keys and values)
+and the encode and decode time per message. Pages are read from --html-dir when given;
+otherwise synthetic job pages of --page-kb kilobytes are generated.
+
+Usage:
+    python -m benchmarks.bench_codecs_binary [--messages 500] [--html-dir pages/]
+"""
+import argparse
+import time
+from pathlib import Path
+from typing import Any, Callable
+from source.broker.services.ipg import deserialize
+from source.codec import (
+    HandshakeTransformer1Codec,
+    HandshakeTransformer2Codec,
+    HandshakeTransformer1BinaryCodec,
+    HandshakeTransformer2BinaryCodec
+)
+from benchmarks.bench_producer_presets import synthetic_page
+
+
+def load_pages(html_dir: str | None, page_kb: int) -> list[str]:
+    if not html_dir:
+        return [synthetic_page(page_kb, seed) for seed in range(16)]
+    pages = [p.read_text(errors='ignore') for p in sorted(Path(html_dir).glob('*.html'))]
+    if not pages:
+        raise ValueError(f'No .html files found in {html_dir}')
+    return pages
+
+
+def bench_codec(codec: Any, messages: list[Any]) -> tuple[float, float, float]:
+    """Returns the average wire size in bytes, and encode and decode microseconds per message."""
+    codec_headers: Callable[[Any], list[tuple[str, bytes]]] | None = getattr(codec, 'headers', None)
+    start = time.perf_counter()
+    encoded = [
+        (codec.serialize(message), codec_headers(message) if codec_headers else None)
+        for message in messages
+    ]
+    encode_us = (time.perf_counter() - start) / len(messages) * 1e6
+    start = time.perf_counter()
+    for value, headers in encoded:
+        deserialize(codec, value, headers)
+    decode_us = (time.perf_counter() - start) / len(messages) * 1e6
+    wire_bytes = sum(
+        len(value) + sum(len(key) + len(header) for key, header in headers or [])
+        for value, headers in encoded
+    )
+    return wire_bytes / len(messages), encode_us, decode_us
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=500)
+    parser.add_argument('--html-dir', default=None)
+    parser.add_argument('--page-kb', type=int, default=250)
+    args = parser.parse_args()
+    pages = load_pages(args.html_dir, args.page_kb)
+    urls = [f'https://app.joinhandshake.com/jobs/{i}' for i in range(args.messages)]
+    cases = [
+        (HandshakeTransformer1Codec, [HandshakeTransformer1Codec(pages[i % len(pages)]) for i in range(args.messages)]),
+        (HandshakeTransformer1BinaryCodec, [HandshakeTransformer1BinaryCodec(pages[i % len(pages)]) for i in range(args.messages)]),
+        (HandshakeTransformer2Codec, [HandshakeTransformer2Codec(url, pages[i % len(pages)]) for i, url in enumerate(urls)]),
+        (HandshakeTransformer2BinaryCodec, [HandshakeTransformer2BinaryCodec(url, pages[i % len(pages)]) for i, url in enumerate(urls)]),
+    ]
+    print(f'{args.messages} messages, {sum(map(len, pages)) / len(pages) / 1024:,.1f} KB average page')
+    for codec, messages in cases:
+        wire_bytes, encode_us, decode_us = bench_codec(codec, messages)
+        print(f'{codec.__name__:<34}: {wire_bytes / 1024:>8,.1f} KB/msg {encode_us:>10,.1f} us encode {decode_us:>10,.1f} us decode')
+
+
+if __name__ == '__main__':
+    main()
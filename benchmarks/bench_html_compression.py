@@ -0,0 +1,73 @@
+"""Compares zlib levels with zstd, with and without a trained dictionary, on job pages.
+
+Reports the compression ratio and compress/decompress throughput (MB/s of html) per setting.
+The dictionary is trained on 90% of the pages and measured on the other 10%, or loaded from
+--dictionary (a '.zdict' file) when given. Pages are read from --html-dir when given;
+otherwise synthetic job pages of --page-kb kilobytes are generated.
+
+Usage:
+    python -m benchmarks.bench_html_compression [--html-dir pages/] [--dictionary dictionaries/handshake-v1.zdict]
+"""
+import argparse
+import time
+import zlib
+from pathlib import Path
+from typing import Callable
+import zstandard
+from benchmarks.bench_producer_presets import synthetic_page
+
+
+def bench(pages: list[bytes], compress: Callable[[bytes], bytes], decompress: Callable[[bytes], bytes],
+    repeat: int
+) -> tuple[float, float, float]:
+    """Returns the compression ratio and compress and decompress MB/s."""
+    raw = sum(map(len, pages)) * repeat
+    start = time.perf_counter()
+    for _ in range(repeat):
+        compressed = [compress(page) for page in pages]
+    compress_seconds = time.perf_counter() - start
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for blob in compressed:
+            decompress(blob)
+    decompress_seconds = time.perf_counter() - start
+    ratio = sum(map(len, pages)) / sum(map(len, compressed))
+    return ratio, raw / compress_seconds / 1e6, raw / decompress_seconds / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--html-dir', default=None)
+    parser.add_argument('--page-kb', type=int, default=250)
+    parser.add_argument('--pages', type=int, default=200)
+    parser.add_argument('--dictionary', default=None)
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    if args.html_dir:
+        pages = [p.read_bytes() for p in sorted(Path(args.html_dir).glob('*.html'))[:args.pages]]
+    else:
+        pages = [synthetic_page(args.page_kb, seed).encode() for seed in range(args.pages)]
+    test_pages = pages[::10]
+    if args.dictionary:
+        dictionary = zstandard.ZstdCompressionDict(Path(args.dictionary).read_bytes())
+    else:
+        dictionary = zstandard.train_dictionary(112 * 1024, [page for i, page in enumerate(pages) if i % 10])
+
+    settings: list[tuple[str, Callable[[bytes], bytes], Callable[[bytes], bytes]]] = []
+    for level in (1, 6, 9):
+        settings.append((f'zlib -{level}', lambda data, level=level: zlib.compress(data, level), zlib.decompress))
+    for level in (1, 3, 9, 19):
+        for dict_data in (None, dictionary):
+            compressor = zstandard.ZstdCompressor(level=level, dict_data=dict_data)
+            decompressor = zstandard.ZstdDecompressor(dict_data=dict_data)
+            name = f'zstd -{level}' + (' + dictionary' if dict_data is not None else '')
+            settings.append((name, compressor.compress, decompressor.decompress))
+
+    print(f'{len(test_pages)} pages measured, {sum(map(len, test_pages)) / len(test_pages) / 1024:,.1f} KB average')
+    for name, compress, decompress in settings:
+        ratio, compress_mb, decompress_mb = bench(test_pages, compress, decompress, args.repeat)
+        print(f'{name:<22}: {ratio:>6.2f}x {compress_mb:>8,.1f} MB/s compress {decompress_mb:>8,.1f} MB/s decompress')
+
+
+if __name__ == '__main__':
+    main()
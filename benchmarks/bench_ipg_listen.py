@@ -0,0 +1,125 @@
+"""Measures InterProcessGateway dispatch throughput for listen and listen_batch.
+
+The broker is replaced by an in-process stand-in so the numbers only reflect the gateway's own
+per-message cost (poll round-trips, registry lookups, deserialization and notification).
+
+Usage:
+    python -m benchmarks.bench_ipg_listen [--messages 200000] [--batch-size 500]
+"""
+import argparse
+import time
+from collections import deque
+from source.broker import InterProcessGateway, KafkaConnectionConfig, IPGConsumer
+from source.codec import HandshakeExtractor2Codec
+
+
+TOPIC = HandshakeExtractor2Codec.TOPIC
+
+
+class StandInMessage:
+
+    def __init__(self, topic: str, value: bytes, offset: int) -> None:
+        self._topic = topic
+        self._value = value
+        self._offset = offset
+
+    def topic(self) -> str:
+        return self._topic
+
+    def partition(self) -> int:
+        return 0
+
+    def offset(self) -> int:
+        return self._offset
+
+    def value(self) -> bytes:
+        return self._value
+
+    def headers(self) -> None:
+        return None
+
+    def error(self) -> None:
+        return None
+
+
+class StandInConsumer:
+
+    def __init__(self, messages: list[StandInMessage]) -> None:
+        self.messages = deque(messages)
+
+    def subscribe(self, topics: list[str], **kwargs) -> None:
+        _ = topics, kwargs
+
+    def poll(self, timeout: float) -> StandInMessage | None:
+        _ = timeout
+        return self.messages.popleft() if self.messages else None
+
+    def consume(self, num_messages: int, timeout: float) -> list[StandInMessage]:
+        _ = timeout
+        n = min(num_messages, len(self.messages))
+        return [self.messages.popleft() for _ in range(n)]
+
+
+class StandInProducer:
+
+    def poll(self, timeout: float) -> int:
+        _ = timeout
+        return 0
+
+
+def make_messages(n: int) -> list[StandInMessage]:
+    value = HandshakeExtractor2Codec.serialize(
+        HandshakeExtractor2Codec(job_id=10_000_000, role='Software Engineer Intern', url='https://app.joinhandshake.com/jobs/10000000')
+    )
+    return [StandInMessage(TOPIC, value, offset) for offset in range(n)]
+
+
+def make_gateway(messages: list[StandInMessage]) -> tuple[InterProcessGateway, list[int]]:
+    received = [0]
+
+    def on_notify(message):
+        _ = message
+        received[0] += 1
+
+    def on_notify_batch(messages):
+        received[0] += len(messages)
+
+    gateway = InterProcessGateway(KafkaConnectionConfig())
+    gateway.broker_consumer = StandInConsumer(messages)
+    gateway.broker_producer = StandInProducer()
+    gateway.set_consumers([IPGConsumer([TOPIC], HandshakeExtractor2Codec, on_notify, on_notify_batch)])
+    return gateway, received
+
+
+def bench_single(n: int) -> float:
+    gateway, received = make_gateway(make_messages(n))
+    start = time.perf_counter()
+    while received[0] < n:
+        gateway.listen(0)
+        gateway.emit()
+    return n / (time.perf_counter() - start)
+
+
+def bench_batch(n: int, batch_size: int) -> float:
+    gateway, received = make_gateway(make_messages(n))
+    start = time.perf_counter()
+    while received[0] < n:
+        gateway.listen_batch(batch_size, 0)
+        gateway.emit()
+    return n / (time.perf_counter() - start)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=200_000)
+    parser.add_argument('--batch-size', type=int, default=500)
+    args = parser.parse_args()
+    single = bench_single(args.messages)
+    batch = bench_batch(args.messages, args.batch_size)
+    print(f'listen        : {single:>12,.0f} msgs/sec')
+    print(f'listen_batch  : {batch:>12,.0f} msgs/sec (batch size {args.batch_size})')
+    print(f'speedup       : {batch / single:>12.2f}x')
+
+
+if __name__ == '__main__':
+    main()
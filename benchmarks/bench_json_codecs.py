@@ -0,0 +1,102 @@
+"""Measures every JSON codec under each available JSON backend.
+
+Payloads are shaped like the pipeline's own messages: extractor jobs, legacy transformer
+envelopes with compressed html, loader messages with a long description, and a metrics-like
+JsonCodec document. Each codec is timed encoding and decoding under every backend of
+source.codec.json_backend, so a slowdown in any codec or backend shows up side by side.
+Pure CPU: no broker or database is needed.
+
+Usage:
+    python -m benchmarks.bench_json_codecs [--messages 5000]
+"""
+import argparse
+import time
+from datetime import datetime
+from typing import Any, Callable
+from source.codec import (
+    json_backend,
+    JsonCodec,
+    HandshakeExtractor1Codec,
+    HandshakeExtractor2Codec,
+    HandshakeTransformer1Codec,
+    HandshakeTransformer2Codec,
+    HandshakeLoader1Codec
+)
+from source.utilities import trusted_producer
+
+
+def job_html(i: int) -> str:
+    return (
+        f'<html><body><h1>Data Engineering Intern {i}</h1>'
+        + '<p>Build data pipelines with Kafka and Python.</p>' * 60
+        + '</body></html>'
+    )
+
+
+def loader_message(i: int) -> HandshakeLoader1Codec:
+    return HandshakeLoader1Codec(
+        about='Build data pipelines with Kafka and Python. ' * 40,
+        apply_by=datetime(2026, 1, 1 + i % 28),
+        apply_type='Handshake',
+        company=f'Company {i % 50}',
+        documents=['Resume', 'Transcript'],
+        employment_type='Full-Time',
+        industry='Internet & Software',
+        job_type='Internship',
+        location='Remote',
+        location_type=['Remote'],
+        position=f'Data Engineering Intern {i}',
+        posted_at=datetime(2025, 12, 1 + i % 28),
+        url=f'https://app.joinhandshake.com/jobs/{i}',
+        wage=[25, 35],
+    )
+
+
+def metrics_document(i: int) -> JsonCodec:
+    return JsonCodec({
+        'stage': 'hst2',
+        'timestamp': 1_760_000_000.0 + i,
+        'topics': {
+            f'topic.{t}': {'messages_consumed': i * t, 'bytes_consumed': i * t * 512, 'handler_seconds': i * 0.001}
+            for t in range(8)
+        },
+        'partitions': [{'topic': 'topic.0', 'partition': p, 'consumer_lag': p * 3} for p in range(12)],
+    })
+
+
+def per_message_us(fn: Callable[[Any], object], items: list[Any]) -> float:
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - start) / len(items) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=5000)
+    args = parser.parse_args()
+    n = args.messages
+    cases: list[tuple[str, type, list[Any]]] = [
+        ('JsonCodec (metrics)', JsonCodec, [metrics_document(i) for i in range(n)]),
+        ('HandshakeExtractor1Codec', HandshakeExtractor1Codec, [HandshakeExtractor1Codec(i, i + 40) for i in range(n)]),
+        ('HandshakeExtractor2Codec', HandshakeExtractor2Codec,
+            [HandshakeExtractor2Codec(i, 'role', f'/jobs/{i}') for i in range(n)]),
+        ('HandshakeTransformer1Codec', HandshakeTransformer1Codec, [HandshakeTransformer1Codec(job_html(i)) for i in range(n)]),
+        ('HandshakeTransformer2Codec', HandshakeTransformer2Codec,
+            [HandshakeTransformer2Codec(f'/jobs/{i}', job_html(i), datetime(2026, 1, 1)) for i in range(n)]),
+        ('HandshakeLoader1Codec', HandshakeLoader1Codec, [loader_message(i) for i in range(n)]),
+    ]
+    print(f"{'codec':<28} {'backend':<8} {'bytes':>7} {'serialize':>12} {'deserialize':>12}")
+    for backend in json_backend.JSON_BACKENDS:
+        json_backend.set_json_backend(backend)
+        for name, codec, messages in cases:
+            encoded = [codec.serialize(message) for message in messages]
+            with trusted_producer():
+                serialize_us = per_message_us(codec.serialize, messages)
+            deserialize_us = per_message_us(codec.deserialize, encoded)
+            size = sum(map(len, encoded)) // len(encoded)
+            print(f'{name:<28} {backend:<8} {size:>7,} {serialize_us:>9,.1f} us {deserialize_us:>9,.1f} us')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,81 @@
+"""Measures the HST2 -> loader hop: collecting HandshakeLoader1Codec props and encoding them.
+
+Compares building a TypeAdapter on every call (the previous behaviour) with the memoized
+adapters of source.utilities.validation, and validated with trusted producer serialization.
+Pure CPU: no broker or database is needed.
+
+Usage:
+    python -m benchmarks.bench_loader_hop [--messages 5000]
+"""
+import argparse
+import time
+from datetime import datetime
+from typing import Any, Callable
+from pydantic import TypeAdapter
+from source.codec import HandshakeLoader1Codec
+from source.utilities import Stock, trusted_producer
+
+
+def clean_data(i: int) -> dict:
+    return {
+        'about': 'Build data pipelines with Kafka and Python. ' * 40,
+        'apply_by': datetime(2026, 1, 1 + i % 28),
+        'apply_type': 'Handshake',
+        'company': f'Company {i % 50}',
+        'documents': ['Resume', 'Transcript'],
+        'employment_type': 'Full-Time',
+        'industry': 'Internet & Software',
+        'job_type': 'Internship',
+        'location': 'Remote',
+        'location_type': ['Remote'],
+        'position': f'Data Engineering Intern {i}',
+        'posted_at': datetime(2025, 12, 1 + i % 28),
+        'wage': [25, 35],
+        'scraped_at': datetime(2026, 1, 1),
+        'url': f'https://app.joinhandshake.com/jobs/{i}',
+    }
+
+
+def per_message_us(fn: Callable[[Any], object], items: list[Any]) -> float:
+    start = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - start) / len(items) * 1e6
+
+
+def collect_uncached(data: dict) -> dict:
+    TypeAdapter(HandshakeLoader1Codec.Props).validate_python(data)
+    keys = HandshakeLoader1Codec.Props.__annotations__.keys()
+    return {k: v for k, v in data.items() if k in keys}
+
+
+def collect_cached(data: dict) -> dict:
+    return Stock(data).collect(HandshakeLoader1Codec.Props)
+
+
+def serialize_trusted(message: HandshakeLoader1Codec) -> bytes:
+    with trusted_producer():
+        return HandshakeLoader1Codec.serialize(message)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=5000)
+    args = parser.parse_args()
+    inventory = [clean_data(i) for i in range(args.messages)]
+    messages = [HandshakeLoader1Codec(**collect_cached(data)) for data in inventory]
+    encoded = [HandshakeLoader1Codec.serialize(message) for message in messages]
+    uncached_n = max(args.messages // 20, 1) #< adapter builds are slow; sample fewer
+    cases = [
+        ('collect, adapter per call', per_message_us(collect_uncached, inventory[:uncached_n])),
+        ('collect, cached adapter', per_message_us(collect_cached, inventory)),
+        ('serialize', per_message_us(HandshakeLoader1Codec.serialize, messages)),
+        ('serialize (trusted)', per_message_us(serialize_trusted, messages)),
+        ('deserialize', per_message_us(HandshakeLoader1Codec.deserialize, encoded)),
+    ]
+    for name, us in cases:
+        print(f'{name:<30}: {us:>10,.1f} us/msg')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,95 @@
+"""Measures produce throughput of each KafkaProducerConfig preset with HST2-sized payloads.
+
+Requires a running broker (KAFKA_BOOSTRAP_SERVERS). Payloads are HandshakeTransformer2BinaryCodec
+messages, so their size on the wire matches what HSE2 publishes. Pages are read from --html-dir
+(e.g. pages exported from the data lake) when given; otherwise a synthetic job page of --page-kb
+kilobytes is generated.
+
+Usage:
+    python -m benchmarks.bench_producer_presets [--messages 2000] [--html-dir pages/]
+"""
+import argparse
+import os
+import random
+import time
+from pathlib import Path
+from confluent_kafka import Producer
+from source.broker import KafkaProducerConfig, PRODUCER_PRESETS
+from source.codec import HandshakeTransformer2BinaryCodec
+
+
+TOPIC = 'bench.producer.presets'
+
+
+def synthetic_page(page_kb: int, seed: int) -> str:
+    # Repeated layout with varying text, so the page compresses roughly like a real one.
+    rng = random.Random(seed)
+    words = ['data', 'python', 'kafka', 'intern', 'team', 'build', 'remote', 'design', 'apply', 'role']
+    rows = []
+    size = 0
+    while size < page_kb * 1024:
+        text = ' '.join(rng.choice(words) + str(rng.randrange(10_000)) for _ in range(24))
+        row = (
+            f'<div class="sc-{rng.randrange(1 << 32):x}"><svg><path d="M2.5 8C2.22386 8 2 8.22386 2 8.5V11.5">'
+            f'</path></svg><div><div>${rng.randrange(15, 60)}/hr</div></div><p>{text}</p></div>'
+        )
+        rows.append(row)
+        size += len(row)
+    return f'<html><body><main>{"".join(rows)}</main></body></html>'
+
+
+def load_payloads(html_dir: str | None, page_kb: int, n: int) -> list[bytes]:
+    if html_dir:
+        pages = [p.read_text(errors='ignore') for p in sorted(Path(html_dir).glob('*.html'))]
+        if not pages:
+            raise ValueError(f'No .html files found in {html_dir}')
+    else:
+        pages = [synthetic_page(page_kb, seed) for seed in range(16)]
+    return [
+        HandshakeTransformer2BinaryCodec.serialize(HandshakeTransformer2BinaryCodec(
+            url=f'https://app.joinhandshake.com/jobs/{i}', html=pages[i % len(pages)]
+        ))
+        for i in range(n)
+    ]
+
+
+def bench_preset(preset: str | None, payloads: list[bytes]) -> tuple[float, float]:
+    bootstrap_servers = os.environ['KAFKA_BOOSTRAP_SERVERS']
+    if preset is None:
+        config = KafkaProducerConfig(bootstrap_servers=bootstrap_servers)
+    else:
+        config = KafkaProducerConfig.from_preset(preset, bootstrap_servers)
+    producer = Producer(config.as_dict())
+    start = time.perf_counter()
+    for payload in payloads:
+        while True:
+            try:
+                producer.produce(TOPIC, value=payload)
+                break
+            except BufferError:
+                producer.poll(0.1)
+        producer.poll(0)
+    remaining = producer.flush(60)
+    elapsed = time.perf_counter() - start
+    if remaining:
+        print(f'Warning: {remaining} messages were not delivered')
+    delivered = len(payloads) - remaining
+    return delivered / elapsed, sum(map(len, payloads)) / elapsed / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--messages', type=int, default=2000)
+    parser.add_argument('--html-dir', default=None)
+    parser.add_argument('--page-kb', type=int, default=250)
+    args = parser.parse_args()
+    payloads = load_payloads(args.html_dir, args.page_kb, args.messages)
+    avg_kb = sum(map(len, payloads)) / len(payloads) / 1024
+    print(f'{len(payloads)} messages, {avg_kb:,.1f} KB average payload')
+    for preset in [None, *PRODUCER_PRESETS]:
+        msgs_per_sec, mb_per_sec = bench_preset(preset, payloads)
+        print(f'{preset or "default":<12}: {msgs_per_sec:>10,.0f} msgs/sec {mb_per_sec:>8,.1f} MB/sec')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,23 @@
+import pytest
+
+_CODEC_REPORT: list[dict] = []
+
+
+@pytest.fixture()
+def codec_report():
+    """Collects one row per benchmark for the codec summary printed at the end of the session."""
+    return _CODEC_REPORT.append
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not _CODEC_REPORT:
+        return
+    terminalreporter.section('codec corpus')
+    terminalreporter.write_line(
+        f"{'topic':<34} {'codec':<34} {'backend':<7} {'op':<11} {'msg/s':>10} {'p50 us':>8} {'p99 us':>8} {'bytes':>8}"
+    )
+    for row in _CODEC_REPORT:
+        terminalreporter.write_line(
+            f"{row['topic']:<34} {row['codec']:<34} {row['backend']:<7} {row['operation']:<11} "
+            f"{row['msgs_per_s']:>10,.0f} {row['p50_us']:>8,.1f} {row['p99_us']:>8,.1f} {row['bytes_per_msg']:>8,.0f}"
+        )
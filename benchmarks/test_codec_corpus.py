@@ -0,0 +1,75 @@
+"""Replays the captured codec corpus through every codec that can decode each topic.
+
+Reports throughput, p50/p99 latency per message and bytes per message for serialize and
+deserialize, under every available JSON backend. Capture a corpus first with
+tools/capture_codec_corpus.py; without one, every benchmark is skipped.
+
+Usage:
+    python -m pytest benchmarks/test_codec_corpus.py [--benchmark-json out.json]
+"""
+import os
+import time
+import pytest
+from source.codec import json_backend
+from source.codec.corpus import CORPUS_CODECS, default_corpus_path, read_corpus, encode, decode, codec_name
+
+CORPUS_PATH = default_corpus_path()
+if not os.path.exists(CORPUS_PATH):
+    pytest.skip(f'No codec corpus at {CORPUS_PATH} (see tools/capture_codec_corpus.py)', allow_module_level=True)
+
+CORPUS = list(read_corpus(CORPUS_PATH))
+
+
+@pytest.fixture(params=list(json_backend.JSON_BACKENDS))
+def backend(request):
+    previous = json_backend.get_json_backend().name
+    json_backend.set_json_backend(request.param)
+    yield request.param
+    json_backend.set_json_backend(previous)
+
+
+def percentile(sorted_values: list[int], q: float) -> int:
+    return sorted_values[min(int(len(sorted_values) * q), len(sorted_values) - 1)]
+
+
+@pytest.mark.parametrize('operation', ['serialize', 'deserialize'])
+@pytest.mark.parametrize('topic,codec', [
+    pytest.param(topic, codec, id=f'{topic}-{codec_name(codec)}')
+    for topic, codecs in CORPUS_CODECS.items()
+    for codec in codecs
+])
+def test_codec(benchmark, codec_report, topic, codec, operation, backend):
+    records = [record for record in CORPUS if record.topic == topic]
+    if not records:
+        pytest.skip(f'The corpus holds no {topic} messages')
+    messages = [decode(CORPUS_CODECS[topic][0], record.value, record.headers) for record in records]
+    encoded = [encode(codec, message) for message in messages]
+    latencies: list[int] = []
+
+    def serialize_all():
+        for message in messages:
+            start = time.perf_counter_ns()
+            encode(codec, message)
+            latencies.append(time.perf_counter_ns() - start)
+
+    def deserialize_all():
+        for value, headers in encoded:
+            start = time.perf_counter_ns()
+            decode(codec, value, headers)
+            latencies.append(time.perf_counter_ns() - start)
+
+    benchmark(serialize_all if operation == 'serialize' else deserialize_all)
+    latencies.sort()
+    row = {
+        'topic': topic,
+        'codec': codec_name(codec),
+        'backend': backend,
+        'operation': operation,
+        'messages': len(messages),
+        'msgs_per_s': len(latencies) / (sum(latencies) / 1e9),
+        'p50_us': percentile(latencies, 0.50) / 1e3,
+        'p99_us': percentile(latencies, 0.99) / 1e3,
+        'bytes_per_msg': sum(len(value) + sum(len(k) + len(v) for k, v in headers) for value, headers in encoded) / len(encoded),
+    }
+    benchmark.extra_info.update(row)
+    codec_report(row)
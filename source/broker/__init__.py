@@ -1,3 +1,4 @@
 from .connections import *
 from .interfaces import *
 from .services import *
+from .metrics import *
@@ -3,8 +3,10 @@ from .kafka_connection import (
     KafkaConsumerConfig,
     KafkaProducerConfig,
     KafkaAdminConfig,
+    PRODUCER_PRESETS,
     get_kafka_admin
 )
+from .memory_connection import MemoryBroker, MemoryConsumer, MemoryProducer, MemoryMessage
 
 
-__all__ = ['KafkaConnectionConfig', 'KafkaConsumerConfig', 'KafkaProducerConfig', 'KafkaAdminConfig', 'get_kafka_admin']
+__all__ = ['KafkaConnectionConfig', 'KafkaConsumerConfig', 'KafkaProducerConfig', 'KafkaAdminConfig', 'PRODUCER_PRESETS', 'get_kafka_admin', 'MemoryBroker', 'MemoryConsumer', 'MemoryProducer', 'MemoryMessage']
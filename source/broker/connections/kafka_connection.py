@@ -7,29 +7,47 @@ from confluent_kafka import (
     Producer as KafkaProducer,
 )
 from confluent_kafka.admin import AdminClient as KafkaAdmin
+from source.broker.connections.memory_connection import MemoryConsumer, MemoryProducer
 
 
 # Refer to the official documentation for the librdkafka library for all, up-to-date, configuration properties.
 
+KAFKA_BACKENDS = ('kafka', 'memory')
+
+
 @dataclass(frozen=True)
 class KafkaConnectionConfig:
     consumer_config: Optional[KafkaConsumerConfig] = None
     producer_config: Optional[KafkaProducerConfig] = None
     admin_config: Optional[KafkaAdminConfig] = None
+    # 'memory' swaps Kafka for an in-process MemoryBroker named after bootstrap_servers.
+    backend: str = field(default_factory=lambda: os.environ.get('KAFKA_BACKEND', 'kafka'))
+
+    def __post_init__(self):
+        if self.backend not in KAFKA_BACKENDS:
+            raise ValueError(f"Unknown backend '{self.backend}'. Expected one of {list(KAFKA_BACKENDS)}")
 
-    def get_consumer(self) -> Optional[KafkaConsumer]:
+    def get_consumer(self, **overrides: Any) -> Optional[KafkaConsumer]:
+        """Creates the consumer; overrides are passed to librdkafka as-is (e.g. stats_cb)."""
         if self.consumer_config is None:
             return
-        return KafkaConsumer(self.consumer_config.as_dict())
+        if self.backend == 'memory':
+            return MemoryConsumer({**self.consumer_config.as_dict(), **overrides})
+        return KafkaConsumer({**self.consumer_config.as_dict(), **overrides})
     
-    def get_producer(self) -> Optional[KafkaProducer]:
+    def get_producer(self, **overrides: Any) -> Optional[KafkaProducer]:
+        """Creates the producer; overrides are passed to librdkafka as-is (e.g. stats_cb)."""
         if self.producer_config is None:
             return
-        return KafkaProducer(self.producer_config.as_dict())
+        if self.backend == 'memory':
+            return MemoryProducer({**self.producer_config.as_dict(), **overrides})
+        return KafkaProducer({**self.producer_config.as_dict(), **overrides})
     
     def get_admin(self) -> Optional[KafkaAdmin]:
         if self.admin_config is None:
             return
+        if self.backend == 'memory':
+            raise ValueError('The memory backend has no admin client: topics are created on first use')
         return KafkaAdmin(self.admin_config.as_dict())
 
 
@@ -70,6 +88,15 @@ class KafkaConsumerConfig:
         },
         default=None
     )
+    enable_auto_commit: Optional[bool] = field(
+        metadata={
+            'description': \
+                "Whether the consumer commits offsets periodically in the background. When False, "
+                "the InterProcessGateway commits offsets only after listeners acknowledge them.",
+            'example': False
+        },
+        default=None
+    )
 
     @classmethod
     def from_env(cls, group_id: str, **kwargs) -> KafkaConsumerConfig:
@@ -89,6 +116,30 @@ class KafkaConsumerConfig:
         }
 
 
+# Named producer presets. Values are field names of KafkaProducerConfig, so presets are validated
+# like any other keyword argument and reach librdkafka through as_dict.
+PRODUCER_PRESETS: dict[str, dict[str, Any]] = {
+    # Large HTML payloads: wait briefly to fill big batches, compress them, and keep delivery
+    # idempotent so retried batches are not duplicated.
+    'throughput': {
+        'linger_ms': 50,
+        'batch_size': 1_000_000,
+        'compression_type': 'zstd',
+        'acks': 'all',
+        'enable_idempotence': True,
+        'queue_buffering_max_messages': 500_000,
+    },
+    # Control messages: send immediately and skip compression.
+    'latency': {
+        'linger_ms': 0,
+        'batch_size': 16_384,
+        'compression_type': 'none',
+        'acks': '1',
+        'enable_idempotence': False,
+    },
+}
+
+
 @dataclass(frozen=True)
 class KafkaProducerConfig:
     bootstrap_servers: str = field(
@@ -104,9 +155,72 @@ class KafkaProducerConfig:
         },
         default=None
     )
+    linger_ms: Optional[int] = field(
+        metadata={
+            'description': \
+                "How long (ms) the producer waits for more messages before sending a batch. Higher "
+                "values trade a little latency for larger, better compressed batches.",
+            'example': 50
+        },
+        default=None
+    )
+    batch_size: Optional[int] = field(
+        metadata={
+            'description': "Maximum size (bytes) of all messages batched in one request to a partition",
+            'example': 1_000_000
+        },
+        default=None
+    )
+    compression_type: Optional[str] = field(
+        metadata={
+            'description': "Codec used to compress message batches (none, gzip, snappy, lz4, zstd)",
+            'example': "zstd"
+        },
+        default=None
+    )
+    acks: Optional[str] = field(
+        metadata={
+            'description': \
+                "Number of broker acknowledgements required before a message counts as delivered "
+                "('0', '1' or 'all'). Idempotence requires 'all'.",
+            'example': "all"
+        },
+        default=None
+    )
+    enable_idempotence: Optional[bool] = field(
+        metadata={
+            'description': "Guarantees that retried messages are written exactly once and in order",
+            'example': True
+        },
+        default=None
+    )
+    queue_buffering_max_messages: Optional[int] = field(
+        metadata={
+            'description': "Maximum number of messages allowed in the local producer queue",
+            'example': 500_000
+        },
+        default=None
+    )
+
+    def __post_init__(self):
+        if self.compression_type not in (None, 'none', 'gzip', 'snappy', 'lz4', 'zstd'):
+            raise ValueError(f"Unsupported compression_type: '{self.compression_type}'")
+        if self.enable_idempotence and self.acks not in (None, 'all', '-1'):
+            raise ValueError("enable_idempotence requires acks='all'")
+
+    @classmethod
+    def from_preset(cls, preset: str, bootstrap_servers: str, **kwargs) -> KafkaProducerConfig:
+        if preset not in PRODUCER_PRESETS:
+            raise ValueError(f"Unknown producer preset '{preset}'. Expected one of {list(PRODUCER_PRESETS)}")
+        return KafkaProducerConfig(
+            bootstrap_servers=bootstrap_servers,
+            **{**PRODUCER_PRESETS[preset], **kwargs}
+        )
 
     @classmethod
-    def from_env(cls, **kwargs) -> KafkaProducerConfig:
+    def from_env(cls, preset: Optional[str] = None, **kwargs) -> KafkaProducerConfig:
+        if preset is not None:
+            return cls.from_preset(preset, os.environ['KAFKA_BOOSTRAP_SERVERS'], **kwargs)
         return KafkaProducerConfig(
             bootstrap_servers=os.environ['KAFKA_BOOSTRAP_SERVERS'],
             **kwargs
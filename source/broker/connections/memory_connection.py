@@ -0,0 +1,373 @@
+"""In-process stand-in for the subset of confluent_kafka used by the InterProcessGateway."""
+from __future__ import annotations
+import itertools
+import json
+import threading
+import time
+import zlib
+from typing import Any, Callable, Optional
+from confluent_kafka import TopicPartition, OFFSET_BEGINNING, OFFSET_END
+
+
+class MemoryMessage:
+    """Mirrors confluent_kafka.Message for messages stored in a MemoryBroker."""
+
+    __slots__ = ('_topic', '_partition', '_offset', '_key', '_value', '_headers', '_timestamp')
+
+    def __init__(self, topic: str, partition: int, offset: int, key: Optional[bytes],
+        value: Optional[bytes], headers: Optional[list[tuple[str, bytes]]]
+    ) -> None:
+        self._topic = topic
+        self._partition = partition
+        self._offset = offset
+        self._key = key
+        self._value = value
+        self._headers = headers
+        self._timestamp = int(time.time() * 1000)
+
+    def topic(self) -> str:
+        return self._topic
+
+    def partition(self) -> int:
+        return self._partition
+
+    def offset(self) -> int:
+        return self._offset
+
+    def key(self) -> Optional[bytes]:
+        return self._key
+
+    def value(self) -> Optional[bytes]:
+        return self._value
+
+    def headers(self) -> Optional[list[tuple[str, bytes]]]:
+        return self._headers
+
+    def timestamp(self) -> tuple[int, int]:
+        return 1, self._timestamp #< TIMESTAMP_CREATE_TIME
+
+    def error(self) -> None:
+        return None
+
+    def __len__(self) -> int:
+        return len(self._value or b'')
+
+
+def _encode(data: Optional[str | bytes]) -> Optional[bytes]:
+    return data.encode() if isinstance(data, str) else data
+
+
+class MemoryBroker:
+    """A single-process Kafka cluster: partitioned topic logs, committed offsets and groups.
+
+    Brokers are looked up by name (the bootstrap.servers of a client config), so every client
+    configured with the same servers in one process shares the same broker. Topics are created
+    with num_partitions partitions the first time they are produced to or subscribed to.
+
+    Attributes:
+    - name (str): Name the broker is registered under.
+    - num_partitions (int): Partition count of automatically created topics.
+    """
+    _registry: dict[str, MemoryBroker] = {}
+    _registry_lock = threading.Lock()
+
+    def __init__(self, name: str, num_partitions: int = 3) -> None:
+        self.name = name
+        self.num_partitions = num_partitions
+        self.topics: dict[str, list[list[MemoryMessage]]] = {}
+        self.committed: dict[tuple[str, str, int], int] = {}  #< (group, topic, partition) -> offset
+        self.members: dict[str, list[MemoryConsumer]] = {}
+        self.condition = threading.Condition()
+
+    @classmethod
+    def get(cls, name: str) -> MemoryBroker:
+        with cls._registry_lock:
+            broker = cls._registry.get(name)
+            if broker is None:
+                broker = cls._registry[name] = MemoryBroker(name)
+            return broker
+
+    @classmethod
+    def reset(cls, name: Optional[str] = None) -> None:
+        """Forgets one broker (or all of them), with every topic and committed offset."""
+        with cls._registry_lock:
+            if name is None:
+                cls._registry.clear()
+            else:
+                cls._registry.pop(name, None)
+
+    def create_topic(self, topic: str, num_partitions: Optional[int] = None) -> None:
+        with self.condition:
+            if topic not in self.topics:
+                self.topics[topic] = [[] for _ in range(num_partitions or self.num_partitions)]
+                self._rebalance()
+
+    def append(self, topic: str, partition: int, key: Optional[bytes], value: Optional[bytes],
+        headers: Optional[list[tuple[str, bytes]]]
+    ) -> MemoryMessage:
+        with self.condition:
+            log = self.topics[topic][partition]
+            msg = MemoryMessage(topic, partition, len(log), key, value, headers)
+            log.append(msg)
+            self.condition.notify_all()
+            return msg
+
+    def high_watermark(self, topic: str, partition: int) -> int:
+        return len(self.topics[topic][partition])
+
+    def join(self, consumer: MemoryConsumer) -> None:
+        with self.condition:
+            for topic in consumer.subscription:
+                if topic not in self.topics:
+                    self.topics[topic] = [[] for _ in range(self.num_partitions)]
+            members = self.members.setdefault(consumer.group_id, [])
+            if consumer not in members:
+                members.append(consumer)
+            self._rebalance()
+
+    def leave(self, consumer: MemoryConsumer) -> None:
+        with self.condition:
+            members = self.members.get(consumer.group_id, [])
+            if consumer in members:
+                members.remove(consumer)
+                self._rebalance()
+
+    def _rebalance(self) -> None:
+        # Range-style assignment per topic over the members subscribed to it. Members pick
+        # up their new assignment (and run their rebalance callbacks) on their next poll.
+        for members in self.members.values():
+            assignments: dict[MemoryConsumer, list[tuple[str, int]]] = {m: [] for m in members}
+            for topic, partitions in self.topics.items():
+                subscribers = [m for m in members if topic in m.subscription]
+                for partition in range(len(partitions)):
+                    if subscribers:
+                        assignments[subscribers[partition % len(subscribers)]].append((topic, partition))
+            for member, assignment in assignments.items():
+                current = member._pending_assignment
+                if current is None:
+                    current = list(member._positions)
+                if sorted(assignment) != sorted(current):
+                    member._pending_assignment = assignment
+        self.condition.notify_all()
+
+
+class MemoryProducer:
+    """Mirrors confluent_kafka.Producer on top of a MemoryBroker.
+
+    Messages are appended to the broker as soon as they are produced; delivery callbacks are
+    served by poll and flush, like librdkafka's.
+    """
+
+    def __init__(self, config: dict[str, Any]) -> None:
+        self.broker = MemoryBroker.get(config['bootstrap.servers'])
+        self._callbacks: list[tuple[Callable, MemoryMessage]] = []
+        self._lock = threading.Lock()
+        self._round_robin = itertools.count()
+
+    def _partition(self, topic: str, key: Optional[bytes]) -> int:
+        num_partitions = len(self.broker.topics[topic])
+        if key is None:
+            return next(self._round_robin) % num_partitions
+        return zlib.crc32(key) % num_partitions
+
+    def produce(self, topic: str, value: Optional[str | bytes] = None, key: Optional[str | bytes] = None,
+        partition: int = -1, on_delivery: Optional[Callable] = None, headers: Any = None, **kwargs: Any
+    ) -> None:
+        _ = kwargs
+        self.broker.create_topic(topic)
+        key = _encode(key)
+        if isinstance(headers, dict):
+            headers = list(headers.items())
+        headers = [(name, _encode(data)) for name, data in headers] if headers else None
+        if partition < 0:
+            partition = self._partition(topic, key)
+        msg = self.broker.append(topic, partition, key, _encode(value), headers)
+        if on_delivery is not None:
+            with self._lock:
+                self._callbacks.append((on_delivery, msg))
+
+    def poll(self, timeout: float = 0) -> int:
+        _ = timeout
+        with self._lock:
+            callbacks, self._callbacks = self._callbacks, []
+        for on_delivery, msg in callbacks:
+            on_delivery(None, msg)
+        return len(callbacks)
+
+    def flush(self, timeout: float = -1) -> int:
+        self.poll(timeout)
+        return 0
+
+    def __len__(self) -> int:
+        return len(self._callbacks)
+
+
+class MemoryConsumer:
+    """Mirrors confluent_kafka.Consumer on top of a MemoryBroker.
+
+    Supports subscribe (with on_assign/on_revoke), poll, consume, commit, committed, assignment,
+    pause/resume, seek and close. auto.offset.reset, enable.auto.commit and stats_cb (with
+    statistics.interval.ms) behave like their librdkafka counterparts.
+    """
+
+    def __init__(self, config: dict[str, Any]) -> None:
+        self.broker = MemoryBroker.get(config['bootstrap.servers'])
+        self.group_id = config['group.id']
+        self.client_id = config.get('client.id', 'memory-consumer')
+        self.auto_offset_reset = config.get('auto.offset.reset', 'latest')
+        self.enable_auto_commit = config.get('enable.auto.commit', True)
+        self.stats_cb = config.get('stats_cb')
+        self.statistics_interval = config.get('statistics.interval.ms', 0) / 1000
+        self.subscription: list[str] = []
+        self._on_assign: Optional[Callable] = None
+        self._on_revoke: Optional[Callable] = None
+        self._pending_assignment: Optional[list[tuple[str, int]]] = None
+        self._positions: dict[tuple[str, int], int] = {}
+        self._paused: set[tuple[str, int]] = set()
+        self._next_partition = 0
+        self._last_stats = time.monotonic()
+        self._is_closed = False
+
+    def subscribe(self, topics: list[str], on_assign: Optional[Callable] = None,
+        on_revoke: Optional[Callable] = None, **kwargs: Any
+    ) -> None:
+        _ = kwargs
+        self.subscription = list(topics)
+        self._on_assign = on_assign
+        self._on_revoke = on_revoke
+        self.broker.join(self)
+
+    def assignment(self) -> list[TopicPartition]:
+        return [TopicPartition(topic, partition) for topic, partition in self._positions]
+
+    def _start_offset(self, topic: str, partition: int) -> int:
+        committed = self.broker.committed.get((self.group_id, topic, partition))
+        if committed is not None:
+            return committed
+        if self.auto_offset_reset in ('earliest', 'smallest', 'beginning'):
+            return 0
+        return self.broker.high_watermark(topic, partition)
+
+    def _apply_rebalance(self) -> None:
+        # Called without holding the broker lock, since the callbacks may commit.
+        with self.broker.condition:
+            assignment, self._pending_assignment = self._pending_assignment, None
+        if assignment is None:
+            return
+        if self._positions:
+            revoked = self.assignment()
+            if self._on_revoke is not None:
+                self._on_revoke(self, revoked)
+            if self.enable_auto_commit:
+                self.commit(asynchronous=False)
+        with self.broker.condition:
+            self._positions = {tp: self._start_offset(*tp) for tp in assignment}
+        self._paused.clear()
+        if self._on_assign is not None:
+            self._on_assign(self, self.assignment())
+
+    def _next_message(self) -> Optional[MemoryMessage]:
+        keys = list(self._positions)
+        for i in range(len(keys)):
+            key = keys[(self._next_partition + i) % len(keys)]
+            if key in self._paused:
+                continue
+            position = self._positions[key]
+            log = self.broker.topics[key[0]][key[1]]
+            if position < len(log):
+                self._positions[key] = position + 1
+                self._next_partition = (self._next_partition + i + 1) % len(keys)
+                return log[position]
+        return None
+
+    def _emit_statistics(self) -> None:
+        if self.stats_cb is None or self.statistics_interval <= 0:
+            return
+        if time.monotonic() - self._last_stats < self.statistics_interval:
+            return
+        self._last_stats = time.monotonic()
+        topics: dict[str, dict[str, Any]] = {}
+        for (topic, partition), position in self._positions.items():
+            high = self.broker.high_watermark(topic, partition)
+            committed = self.broker.committed.get((self.group_id, topic, partition), position)
+            topics.setdefault(topic, {'partitions': {}})['partitions'][str(partition)] = {
+                'consumer_lag': high - committed,
+                'fetchq_cnt': high - position,
+            }
+        self.stats_cb(json.dumps({
+            'name': self.client_id, 'type': 'consumer', 'msg_cnt': 0, 'msg_size': 0, 'replyq': 0,
+            'topics': topics
+        }))
+
+    def consume(self, num_messages: int = 1, timeout: float = -1) -> list[MemoryMessage]:
+        if self._is_closed:
+            raise RuntimeError('Consumer closed')
+        if self._pending_assignment is not None:
+            self._apply_rebalance()
+        self._emit_statistics()
+        if self.enable_auto_commit:
+            self.commit()
+        deadline = time.monotonic() + (timeout if timeout >= 0 else float('inf'))
+        msgs: list[MemoryMessage] = []
+        with self.broker.condition:
+            while True:
+                while len(msgs) < num_messages and (msg := self._next_message()) is not None:
+                    msgs.append(msg)
+                remaining = deadline - time.monotonic()
+                if msgs or remaining <= 0 or self._pending_assignment is not None:
+                    return msgs
+                self.broker.condition.wait(remaining)
+
+    def poll(self, timeout: float = -1) -> Optional[MemoryMessage]:
+        msgs = self.consume(1, timeout)
+        return msgs[0] if msgs else None
+
+    def commit(self, message: Optional[MemoryMessage] = None, offsets: Optional[list[TopicPartition]] = None,
+        asynchronous: bool = True
+    ) -> Optional[list[TopicPartition]]:
+        if message is not None:
+            offsets = [TopicPartition(message.topic(), message.partition(), message.offset() + 1)]
+        elif offsets is None:
+            offsets = [TopicPartition(topic, partition, position) for (topic, partition), position in self._positions.items()]
+        with self.broker.condition:
+            for tp in offsets:
+                self.broker.committed[(self.group_id, tp.topic, tp.partition)] = tp.offset
+        return None if asynchronous else offsets
+
+    def committed(self, partitions: list[TopicPartition], timeout: float = -1) -> list[TopicPartition]:
+        _ = timeout
+        return [
+            TopicPartition(tp.topic, tp.partition, self.broker.committed.get((self.group_id, tp.topic, tp.partition), -1001))
+            for tp in partitions
+        ]
+
+    def position(self, partitions: list[TopicPartition]) -> list[TopicPartition]:
+        return [TopicPartition(tp.topic, tp.partition, self._positions.get((tp.topic, tp.partition), -1001)) for tp in partitions]
+
+    def pause(self, partitions: list[TopicPartition]) -> None:
+        self._paused.update((tp.topic, tp.partition) for tp in partitions)
+
+    def resume(self, partitions: list[TopicPartition]) -> None:
+        self._paused.difference_update((tp.topic, tp.partition) for tp in partitions)
+
+    def seek(self, partition: TopicPartition) -> None:
+        key = (partition.topic, partition.partition)
+        if key not in self._positions:
+            raise ValueError(f'{key} is not assigned')
+        offset = partition.offset
+        if offset == OFFSET_BEGINNING:
+            offset = 0
+        elif offset == OFFSET_END:
+            offset = self.broker.high_watermark(*key)
+        self._positions[key] = offset
+
+    def close(self) -> None:
+        if self._is_closed:
+            return
+        if self.enable_auto_commit:
+            self.commit(asynchronous=False)
+        if self._positions and self._on_revoke is not None:
+            self._on_revoke(self, self.assignment())
+        self._positions = {}
+        self.broker.leave(self)
+        self._is_closed = True
@@ -1,8 +1,16 @@
-from typing import Protocol, Any, Callable
+from typing import Protocol, Any, Callable, Optional, TYPE_CHECKING
 from dataclasses import dataclass
 
+if TYPE_CHECKING:
+    from source.broker.services.retry import RetryPolicy
+
 
 class IPGProtocol(Protocol):
+    """Encodes and decodes the messages of a topic.
+
+    A codec may also define headers(payload) -> list[tuple[str, bytes]]; the gateway then sends
+    those Kafka headers with the value and decodes with deserialize(payload, headers).
+    """
 
     def serialize(self, payload: Any) -> bytes:
         ...
@@ -10,15 +18,43 @@ class IPGProtocol(Protocol):
     def deserialize(self, payload: bytes) -> Any:
         ...
 
+    def partition_key(self, payload: Any) -> Optional[str]:
+        """Returns the message key, so related messages land on the same partition (None: any)."""
+        ...
+
 
 class IPGConsumerI(Protocol):
     topics: list[str]
     codec: IPGProtocol
-    notify: Callable[[Any], None]
+    notify: Callable[..., None]
+    notify_batch: Optional[Callable[..., None]]
+    manual_ack: bool
+    retry_policy: Optional['RetryPolicy']
+    max_in_flight: Optional[int]
 
 
 @dataclass(frozen=True)
 class IPGConsumer:
+    """Binds a codec and notify callbacks to a list of topics.
+
+    With manual_ack=False, notify(payload) and notify_batch(payloads) are called and the message
+    is acknowledged as soon as they return. With manual_ack=True, they are called as
+    notify(payload, ack) and notify_batch(payloads, acks) instead, and the listener calls each
+    ack (from any thread) once the message is fully processed.
+
+    With a retry_policy, messages whose codec or notify callback raises are forwarded to the
+    policy's retry topics (and finally its DLQ) instead of stopping the gateway. When
+    notify_batch raises, every message of the batch it has not acknowledged is forwarded, and none
+    is notified again; with manual_ack, acknowledge each message as soon as its side effects are
+    done, so a failure later in the batch does not repeat them on retry.
+
+    With max_in_flight, the gateway stops fetching the listener's topics while it holds that
+    many unacknowledged messages, and resumes once acks free capacity.
+    """
     topics: list[str]
     codec: IPGProtocol
-    notify: Callable[[Any], None]
\ No newline at end of file
+    notify: Callable[..., None]
+    notify_batch: Optional[Callable[..., None]] = None
+    manual_ack: bool = False
+    retry_policy: Optional['RetryPolicy'] = None
+    max_in_flight: Optional[int] = None
\ No newline at end of file
@@ -0,0 +1,5 @@
+from .ipg_metrics import IPGMetrics, TopicMetrics
+from .sinks import MetricsSink, PrometheusTextExporter, JsonLinesExporter, render_prometheus
+
+
+__all__ = ['IPGMetrics', 'TopicMetrics', 'MetricsSink', 'PrometheusTextExporter', 'JsonLinesExporter', 'render_prometheus']
\ No newline at end of file
@@ -0,0 +1,155 @@
+import json
+import os
+import threading
+import time
+from dataclasses import dataclass, asdict
+from typing import Any, Optional
+from source.broker.metrics.sinks import MetricsSink, PrometheusTextExporter, JsonLinesExporter
+
+
+@dataclass
+class TopicMetrics:
+    """Counters of one topic, as seen by one gateway."""
+    messages_consumed: int = 0
+    bytes_consumed: int = 0
+    messages_produced: int = 0
+    bytes_produced: int = 0
+    delivery_failures: int = 0
+    deserialize_seconds: float = 0.0
+    deserialize_count: int = 0
+    handler_seconds: float = 0.0
+    handler_count: int = 0
+
+
+class IPGMetrics:
+    """Collects gateway counters and librdkafka statistics, and exports them to metrics sinks.
+
+    Per-topic counters are updated by the gateway as it consumes, dispatches and produces.
+    librdkafka reports consumer lag and queue depths every statistics_interval_ms through the
+    clients' stats_cb. Snapshots are pushed to every sink at most once per export_interval_seconds,
+    from the gateway's emit.
+
+    Attributes:
+    - name (str): Name of the stage, exported as the 'stage' label.
+    - sinks (list[MetricsSink]): Where snapshots are exported.
+    - export_interval_seconds (float): Minimum time between two exports.
+    - statistics_interval_ms (int): How often librdkafka emits statistics (0 disables them).
+        Statistics are only requested when there is a sink to export them to.
+    """
+
+    def __init__(self, name: str, sinks: Optional[list[MetricsSink]] = None,
+        export_interval_seconds: float = 15.0, statistics_interval_ms: int = 15_000
+    ) -> None:
+        self.name = name
+        self.sinks = sinks or []
+        self.export_interval_seconds = export_interval_seconds
+        self.statistics_interval_ms = statistics_interval_ms
+        self._topics: dict[str, TopicMetrics] = {}
+        self._partitions: dict[tuple[str, int], dict[str, int]] = {}
+        self._queues: dict[str, dict[str, int]] = {}
+        self._lock = threading.Lock()
+        self._last_export = time.monotonic()
+
+    @classmethod
+    def from_env(cls, name: str, **kwargs) -> 'IPGMetrics':
+        """Exports to '<name>.prom' and '<name>.jsonl' in SCRAWLER_METRICS_DIR, when it is set."""
+        sinks: list[MetricsSink] = []
+        if (metrics_dir := os.environ.get('SCRAWLER_METRICS_DIR')):
+            sinks.append(PrometheusTextExporter(os.path.join(metrics_dir, f'{name}.prom')))
+            sinks.append(JsonLinesExporter(os.path.join(metrics_dir, f'{name}.jsonl')))
+        if (interval := os.environ.get('SCRAWLER_METRICS_INTERVAL_SECONDS')):
+            kwargs.setdefault('export_interval_seconds', float(interval))
+        return cls(name, sinks, **kwargs)
+
+    @property
+    def collects_statistics(self) -> bool:
+        """True if the gateway's clients should report librdkafka statistics (see stats_cb)."""
+        return bool(self.sinks) and self.statistics_interval_ms > 0
+
+    def _topic(self, topic: str) -> TopicMetrics:
+        metrics = self._topics.get(topic)
+        if metrics is None:
+            metrics = self._topics[topic] = TopicMetrics()
+        return metrics
+
+    def record_consumed(self, topic: str, num_bytes: int, num_messages: int = 1) -> None:
+        with self._lock:
+            metrics = self._topic(topic)
+            metrics.messages_consumed += num_messages
+            metrics.bytes_consumed += num_bytes
+
+    def record_produced(self, topic: str, num_bytes: int) -> None:
+        with self._lock:
+            metrics = self._topic(topic)
+            metrics.messages_produced += 1
+            metrics.bytes_produced += num_bytes
+
+    def record_delivery_failure(self, topic: str) -> None:
+        with self._lock:
+            self._topic(topic).delivery_failures += 1
+
+    def observe_deserialize(self, topic: str, seconds: float, num_messages: int = 1) -> None:
+        with self._lock:
+            metrics = self._topic(topic)
+            metrics.deserialize_seconds += seconds
+            metrics.deserialize_count += num_messages
+
+    def observe_handler(self, topic: str, seconds: float, num_messages: int = 1) -> None:
+        with self._lock:
+            metrics = self._topic(topic)
+            metrics.handler_seconds += seconds
+            metrics.handler_count += num_messages
+
+    def record_statistics(self, stats_json: str) -> None:
+        """Keeps the consumer lag and queue depths of a librdkafka statistics report (stats_cb)."""
+        stats = json.loads(stats_json)
+        client = stats.get('name', stats.get('type', 'client'))
+        with self._lock:
+            self._queues[client] = {
+                'msg_cnt': stats.get('msg_cnt', 0),
+                'msg_size': stats.get('msg_size', 0),
+                'replyq': stats.get('replyq', 0),
+            }
+            if stats.get('type') != 'consumer':
+                return
+            for topic, topic_stats in stats.get('topics', {}).items():
+                for partition, partition_stats in topic_stats.get('partitions', {}).items():
+                    if int(partition) < 0:
+                        continue #< internal UA partition
+                    self._partitions[(topic, int(partition))] = {
+                        'consumer_lag': partition_stats.get('consumer_lag', -1),
+                        'fetchq_cnt': partition_stats.get('fetchq_cnt', 0),
+                    }
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                'stage': self.name,
+                'timestamp': time.time(),
+                'topics': {topic: asdict(metrics) for topic, metrics in self._topics.items()},
+                'partitions': [
+                    {'topic': topic, 'partition': partition, **values}
+                    for (topic, partition), values in self._partitions.items()
+                ],
+                'queues': {client: dict(values) for client, values in self._queues.items()},
+            }
+
+    def export(self) -> None:
+        self._last_export = time.monotonic()
+        if not self.sinks:
+            return
+        snapshot = self.snapshot()
+        for sink in self.sinks:
+            try:
+                sink.export(snapshot)
+            except OSError as e:
+                print(f"Failed to export metrics with {type(sink).__name__}: {e}")
+
+    def maybe_export(self) -> None:
+        if time.monotonic() - self._last_export >= self.export_interval_seconds:
+            self.export()
+
+    def close(self) -> None:
+        self.export()
+        for sink in self.sinks:
+            sink.close()
@@ -0,0 +1,157 @@
+import json
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Optional, Protocol
+
+
+class MetricsSink(Protocol):
+
+    def export(self, snapshot: dict[str, Any]) -> None:
+        ...
+
+    def close(self) -> None:
+        ...
+
+
+# (snapshot key, metric name, type, help)
+_TOPIC_METRICS = [
+    ('messages_consumed', 'scrawler_ipg_messages_consumed_total', 'counter', 'Messages consumed'),
+    ('bytes_consumed', 'scrawler_ipg_bytes_consumed_total', 'counter', 'Message bytes consumed'),
+    ('messages_produced', 'scrawler_ipg_messages_produced_total', 'counter', 'Messages produced'),
+    ('bytes_produced', 'scrawler_ipg_bytes_produced_total', 'counter', 'Message bytes produced'),
+    ('delivery_failures', 'scrawler_ipg_delivery_failures_total', 'counter', 'Messages the broker did not accept'),
+]
+# (snapshot key of the _sum sample, of the _count sample, metric name, help)
+_TOPIC_SUMMARIES = [
+    ('deserialize_seconds', 'deserialize_count', 'scrawler_ipg_deserialize_seconds', 'Time spent deserializing messages'),
+    ('handler_seconds', 'handler_count', 'scrawler_ipg_handler_seconds', 'Time spent handling messages in notify'),
+]
+_PARTITION_METRICS = [
+    ('consumer_lag', 'scrawler_kafka_consumer_lag', 'gauge', 'Messages between the committed and high offsets'),
+    ('fetchq_cnt', 'scrawler_kafka_fetch_queue_messages', 'gauge', 'Messages fetched but not yet consumed'),
+]
+_QUEUE_METRICS = [
+    ('msg_cnt', 'scrawler_kafka_queue_messages', 'gauge', 'Messages waiting in the producer queue'),
+    ('msg_size', 'scrawler_kafka_queue_bytes', 'gauge', 'Bytes waiting in the producer queue'),
+    ('replyq', 'scrawler_kafka_reply_queue_ops', 'gauge', 'Callbacks waiting to be served by poll'),
+]
+
+
+def _labels(**labels: Any) -> str:
+    def escape(value: Any) -> str:
+        return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+    return '{' + ','.join(f'{key}="{escape(value)}"' for key, value in labels.items()) + '}'
+
+
+def render_prometheus(snapshot: dict[str, Any]) -> str:
+    """Renders a metrics snapshot in the Prometheus text exposition format."""
+    stage = snapshot['stage']
+    lines = []
+
+    def family(name: str, kind: str, help_text: str, samples: list[tuple[str, Any]]):
+        # samples are (series, value) pairs; a series is a metric name with its labels.
+        if not samples:
+            return
+        lines.append(f'# HELP {name} {help_text}')
+        lines.append(f'# TYPE {name} {kind}')
+        lines.extend(f'{series} {value}' for series, value in samples)
+
+    for key, name, kind, help_text in _TOPIC_METRICS:
+        family(name, kind, help_text, [
+            (name + _labels(stage=stage, topic=topic), metrics[key])
+            for topic, metrics in snapshot['topics'].items()
+        ])
+    for sum_key, count_key, name, help_text in _TOPIC_SUMMARIES:
+        family(name, 'summary', help_text, [
+            sample
+            for topic, metrics in snapshot['topics'].items()
+            for sample in [
+                (f'{name}_sum' + _labels(stage=stage, topic=topic), metrics[sum_key]),
+                (f'{name}_count' + _labels(stage=stage, topic=topic), metrics[count_key]),
+            ]
+        ])
+    for key, name, kind, help_text in _PARTITION_METRICS:
+        family(name, kind, help_text, [
+            (name + _labels(stage=stage, topic=p['topic'], partition=p['partition']), p[key])
+            for p in snapshot['partitions']
+        ])
+    for key, name, kind, help_text in _QUEUE_METRICS:
+        family(name, kind, help_text, [
+            (name + _labels(stage=stage, client=client), values[key])
+            for client, values in snapshot['queues'].items()
+        ])
+    return '\n'.join(lines) + '\n'
+
+
+class PrometheusTextExporter:
+    """Exposes the latest snapshot in the Prometheus text format.
+
+    The snapshot is written to path (atomically, for the node_exporter textfile collector)
+    and, with a port, served over HTTP for Prometheus to scrape directly.
+
+    Attributes:
+    - path (Optional[str]): File the metrics are written to.
+    - port (Optional[int]): Port of the HTTP endpoint.
+    """
+
+    def __init__(self, path: Optional[str] = None, port: Optional[int] = None) -> None:
+        self.path = path
+        self.port = port
+        self._text = ''
+        self._server: Optional[ThreadingHTTPServer] = None
+        if port is not None:
+            self._serve(port)
+
+    def _serve(self, port: int):
+        exporter = self
+
+        class Handler(BaseHTTPRequestHandler):
+
+            def do_GET(self):
+                body = exporter._text.encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(('', port), Handler)
+        threading.Thread(target=self._server.serve_forever, name='metrics-http', daemon=True).start()
+
+    def export(self, snapshot: dict[str, Any]) -> None:
+        self._text = render_prometheus(snapshot)
+        if self.path is None:
+            return
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        tmp_path = f'{self.path}.tmp'
+        with open(tmp_path, 'w') as f:
+            f.write(self._text)
+        os.replace(tmp_path, self.path)
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+
+
+class JsonLinesExporter:
+    """Appends every snapshot to a file as one JSON object per line.
+
+    Attributes:
+    - path (str): File the snapshots are appended to.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+
+    def export(self, snapshot: dict[str, Any]) -> None:
+        os.makedirs(os.path.dirname(self.path) or '.', exist_ok=True)
+        with open(self.path, 'a') as f:
+            f.write(json.dumps(snapshot) + '\n')
+
+    def close(self) -> None:
+        pass
@@ -1,4 +1,9 @@
 from .ipg import InterProcessGateway
+from .async_ipg import AsyncInterProcessGateway
+from .partition_workers import PartitionedInterProcessGateway, WorkerSetup
+from .offset_tracker import OffsetTracker, Acknowledgement
+from .retry import RetryPolicy
+from .batch import BatchCodec, Batch
 
 
-__all__ = ['InterProcessGateway']
+__all__ = ['InterProcessGateway', 'AsyncInterProcessGateway', 'PartitionedInterProcessGateway', 'WorkerSetup', 'OffsetTracker', 'Acknowledgement', 'RetryPolicy', 'BatchCodec', 'Batch']
\ No newline at end of file
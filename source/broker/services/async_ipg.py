@@ -0,0 +1,139 @@
+import asyncio
+import inspect
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional
+from confluent_kafka import Message
+from source.broker.connections import KafkaConnectionConfig
+from source.broker.metrics import IPGMetrics
+from source.broker.services.ipg import InterProcessGateway, EventListener, deserialize, unpack_batches
+from source.broker.services.batch import Batch
+from source.broker.services.offset_tracker import Acknowledgement
+
+
+class AsyncInterProcessGateway(InterProcessGateway):
+    """InterProcessGateway that dispatches messages on a single, long-lived event loop.
+
+    The blocking Consumer.poll runs in a dedicated executor thread, so the event loop stays free
+    while waiting on the broker. Listeners may provide either plain callables or coroutine
+    functions; coroutines are scheduled as tasks on the running loop instead of each handler
+    building (and tearing down) its own loop with asyncio.run.
+
+    At most max_in_flight handlers run concurrently. Once the bound is reached, polling stops
+    until a handler finishes, so the consumer never runs ahead of the handlers.
+
+    Attributes:
+    - max_in_flight (int): Maximum number of notify handlers running at the same time.
+    """
+
+    def __init__(self, config: KafkaConnectionConfig, max_in_flight: int = 1,
+        metrics: Optional[IPGMetrics] = None
+    ) -> None:
+        super().__init__(config, metrics)
+        if max_in_flight < 1:
+            raise ValueError('max_in_flight must be at least 1')
+        self.max_in_flight = max_in_flight
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='ipg-poll')
+        self._in_flight: set[asyncio.Task] = set()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._handler_error: Optional[BaseException] = None
+        self._is_running = False
+        self._stop_requested = False
+
+    @property
+    def is_closed(self):
+        return self._is_closed or self._stop_requested
+
+    def _get_slots(self) -> asyncio.Semaphore:
+        # The semaphore binds to the running loop, so it is created on first use.
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_in_flight)
+        return self._slots
+
+    async def _notify(self, msg: Message, event_listener: EventListener, ack: Acknowledgement) -> None:
+        try:
+            start = time.perf_counter()
+            payload = deserialize(event_listener.codec, msg.value(), msg.headers())
+            deserialized = time.perf_counter()
+            payloads, acks = unpack_batches([payload], [ack]) if isinstance(payload, Batch) else ([payload], [ack])
+            for payload, item_ack in zip(payloads, acks):
+                if event_listener.manual_ack:
+                    result = event_listener.notify(payload, item_ack)
+                else:
+                    result = event_listener.notify(payload)
+                if inspect.isawaitable(result):
+                    await result
+                if not event_listener.manual_ack:
+                    item_ack()
+            if self.metrics is not None:
+                self.metrics.observe_deserialize(msg.topic(), deserialized - start)
+                self.metrics.observe_handler(msg.topic(), time.perf_counter() - deserialized)
+        except Exception as error:
+            if event_listener.retry_policy is None:
+                raise
+            self._route_failure(msg, event_listener.retry_policy, error, ack)
+        finally:
+            self._get_slots().release()
+
+    def _on_handler_done(self, task: asyncio.Task) -> None:
+        self._in_flight.discard(task)
+        if task.cancelled():
+            return
+        if (error := task.exception()) is not None and self._handler_error is None:
+            self._handler_error = error
+
+    def _raise_handler_error(self) -> None:
+        if self._handler_error is not None:
+            error, self._handler_error = self._handler_error, None
+            raise error
+
+    async def alisten(self, timeout: float):
+        self._raise_handler_error()
+        self._before_poll()
+        loop = asyncio.get_running_loop()
+        msg = await loop.run_in_executor(self._executor, self.broker_consumer.poll, timeout)
+        if msg is None or self._is_error(msg) or not self._is_due(msg):
+            return
+        slots = self._get_slots()
+        listeners = self.listener_registry[msg.topic()]
+        acks = self._track(msg, listeners)
+        for event_listener, ack in zip(listeners, acks):
+            await slots.acquire()
+            task = loop.create_task(self._notify(msg, event_listener, ack))
+            self._in_flight.add(task)
+            task.add_done_callback(self._on_handler_done)
+
+    async def drain(self):
+        """Waits for every in-flight handler to finish."""
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+
+    async def arun(self, timeout: float):
+        """Listens and emits until close is called, then drains handlers and releases the clients.
+
+        Args:
+        - timeout (float): Maximum time, in seconds, each poll waits for a message.
+        """
+        self._is_running = True
+        try:
+            while not self.is_closed:
+                await self.alisten(timeout)
+                self.emit()
+            await self.drain()
+            self._raise_handler_error()
+        finally:
+            self._is_running = False
+            self._close_clients()
+
+    def _close_clients(self):
+        self._executor.shutdown(wait=True)
+        if not self._is_closed:
+            super().close()
+
+    def close(self):
+        if self._is_running:
+            # Called from a signal handler or a handler task: let arun finish the poll in
+            # progress, drain handlers, and close the clients from the loop.
+            self._stop_requested = True
+            return
+        self._close_clients()
@@ -0,0 +1,141 @@
+import struct
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Generic, Optional, TypeVar
+from source.broker.interfaces import IPGProtocol
+
+
+T = TypeVar('T')
+
+HEADER_BATCH = 'x-batch'
+_LENGTH = struct.Struct('>I')
+
+
+@dataclass(frozen=True)
+class Batch(Generic[T]):
+    """The items of one batch record, as decoded by the gateway before dispatch."""
+    items: list[T]
+
+
+def pack_items(values: list[bytes]) -> bytes:
+    """Frames each value with its 4-byte big-endian length."""
+    parts = []
+    for value in values:
+        parts.append(_LENGTH.pack(len(value)))
+        parts.append(value)
+    return b''.join(parts)
+
+
+def unpack_items(value: bytes) -> list[bytes]:
+    view = memoryview(value)
+    items = []
+    offset = 0
+    while offset < len(view):
+        (length,) = _LENGTH.unpack_from(view, offset)
+        offset += _LENGTH.size
+        if offset + length > len(view):
+            raise ValueError('Truncated batch record')
+        items.append(bytes(view[offset:offset + length]))
+        offset += length
+    return items
+
+
+def batch_size(headers: Optional[list[tuple[str, bytes]]]) -> int | None:
+    """Returns the number of items of a batch record, or None if the record holds one message."""
+    if not headers:
+        return None
+    for key, value in headers:
+        if key == HEADER_BATCH:
+            return int(value)
+    return None
+
+
+def unpack_batch(codec: IPGProtocol, value: bytes, size: int,
+    headers: Optional[list[tuple[str, bytes]]] = None
+) -> Batch:
+    """Decodes the items of a batch record; codecs that use headers get the record's headers."""
+    if getattr(codec, 'headers', None) is None:
+        items = [codec.deserialize(item) for item in unpack_items(value)]
+    else:
+        items = [codec.deserialize(item, headers) for item in unpack_items(value)]
+    if len(items) != size:
+        raise ValueError(f'Batch record holds {len(items)} items, its header announced {size}')
+    return Batch(items)
+
+
+class BatchCodec(Generic[T]):
+    """Packs many messages of one codec into a single Kafka record.
+
+    Send a list of messages with it; listeners keep subscribing with the item codec, because the
+    gateway recognizes batch records by their x-batch header and unpacks them before dispatch.
+    Each item is then notified on its own (or all of them through notify_batch), and the record
+    is acknowledged once every item is.
+
+    Items cannot carry headers of their own. A codec whose headers are the same for every message
+    (record_headers, e.g. a VersionedCodec) can be batched: those headers go on the record.
+
+    Attributes:
+    - codec (IPGProtocol): Codec of the items.
+    """
+
+    def __init__(self, codec: IPGProtocol) -> None:
+        if (record_headers := getattr(codec, 'record_headers', None)) is not None:
+            item_headers = record_headers()
+        else:
+            item_headers = [] if getattr(codec, 'headers', None) is None else None
+        if item_headers is None:
+            raise ValueError(f'{getattr(codec, "__name__", codec)} sets headers per message, so its messages cannot be batched')
+        self.codec = codec
+        self._item_headers = item_headers
+
+    @property
+    def TOPIC(self) -> str | None:
+        return getattr(self.codec, 'TOPIC', None)
+
+    def partition_key(self, messages: list[T]) -> None:
+        return None
+
+    def headers(self, messages: list[T]) -> list[tuple[str, bytes]]:
+        return [(HEADER_BATCH, str(len(messages)).encode()), *self._item_headers]
+
+    def serialize(self, messages: list[T]) -> bytes:
+        return pack_items([self.codec.serialize(message) for message in messages])
+
+    def deserialize(self, value: bytes, headers: Optional[list[tuple[str, bytes]]] = None) -> list[T]:
+        size = batch_size(headers)
+        return unpack_batch(self.codec, value, len(unpack_items(value)) if size is None else size, headers).items
+
+
+def split_ack(ack: Callable[[], None], n: int) -> list['ItemAcknowledgement']:
+    """Returns one acknowledgement per item of a batch record; the last of them calls ack."""
+    counter = _ItemCounter(ack, n)
+    return [ItemAcknowledgement(counter) for _ in range(n)]
+
+
+class _ItemCounter:
+
+    def __init__(self, ack: Callable[[], None], remaining: int) -> None:
+        self.ack = ack
+        self.remaining = remaining
+        self.lock = threading.Lock()
+
+
+class ItemAcknowledgement:
+    """Marks one item of a batch record as processed. Thread-safe and idempotent."""
+
+    __slots__ = ('_counter', 'is_acked')
+
+    def __init__(self, counter: _ItemCounter) -> None:
+        self._counter = counter
+        self.is_acked = False
+
+    def __call__(self) -> None:
+        counter = self._counter
+        with counter.lock:
+            if self.is_acked:
+                return
+            self.is_acked = True
+            counter.remaining -= 1
+            is_last = counter.remaining == 0
+        if is_last:
+            counter.ack()
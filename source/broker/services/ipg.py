@@ -1,29 +1,166 @@
+import time
 from typing import Callable, TypeAlias, Any, Optional
 from dataclasses import dataclass
 from confluent_kafka import (
     KafkaError,
-    Message
+    KafkaException,
+    Message,
+    TopicPartition
 )
 from source.broker.connections import KafkaConnectionConfig
 from source.broker.interfaces import IPGProtocol, IPGConsumerI
+from source.broker.metrics import IPGMetrics
+from source.broker.services.offset_tracker import OffsetTracker, Acknowledgement, InFlightBudget
+from source.broker.services.batch import Batch, BatchCodec, batch_size, unpack_batch, split_ack
+from source.broker.services.retry import (
+    RetryPolicy,
+    HEADER_ATTEMPT,
+    HEADER_NOT_BEFORE,
+    get_header,
+    failure_headers
+)
 
 
 DeliveryCallback: TypeAlias = Callable[[KafkaError | None, Message | None], None]
 on_notify: TypeAlias = Callable[[Any], None]
+on_notify_batch: TypeAlias = Callable[[list[Any]], None]
 
 
 @dataclass(frozen=True)
 class EventListener:
     codec: IPGProtocol
     notify: on_notify
+    notify_batch: Optional[on_notify_batch] = None
+    manual_ack: bool = False
+    retry_policy: Optional[RetryPolicy] = None
+    budget: Optional[InFlightBudget] = None
+
+    def dispatch(self, payload: Any, ack: Acknowledgement) -> None:
+        if isinstance(payload, Batch):
+            self.dispatch_batch([payload], [ack])
+            return
+        if self.manual_ack:
+            self.notify(payload, ack)
+            return
+        self.notify(payload)
+        ack()
+
+    def dispatch_batch(self, payloads: list[Any], acks: list[Acknowledgement]) -> None:
+        unpacked = any(isinstance(payload, Batch) for payload in payloads)
+        if unpacked:
+            payloads, acks = unpack_batches(payloads, acks)
+            if not payloads:
+                return
+        if self.notify_batch is None:
+            for payload, ack in zip(payloads, acks):
+                self.dispatch(payload, ack)
+            return
+        if self.manual_ack:
+            self.notify_batch(payloads, acks)
+            return
+        self.notify_batch(payloads)
+        if unpacked:
+            for ack in acks:
+                ack()
+        elif acks:
+            acks[0].tracker.ack_many(acks)
+
+
+def unpack_batches(payloads: list[Any], acks: list[Callable[[], None]]) -> tuple[list[Any], list[Callable[[], None]]]:
+    """Replaces each Batch by its items, and its acknowledgement by one per item."""
+    items, item_acks = [], []
+    for payload, ack in zip(payloads, acks):
+        if not isinstance(payload, Batch):
+            items.append(payload)
+            item_acks.append(ack)
+            continue
+        if not payload.items:
+            ack()
+            continue
+        items.extend(payload.items)
+        item_acks.extend(split_ack(ack, len(payload.items)))
+    return items, item_acks
+
+
+def deserialize(codec: IPGProtocol, value: bytes, headers: Optional[list[tuple[str, bytes]]]) -> Any:
+    """Decodes a message value; codecs that write headers also get them back to decode.
+
+    Batch records (see BatchCodec) decode to a Batch of the codec's messages.
+    """
+    if headers and not isinstance(codec, BatchCodec) and (size := batch_size(headers)) is not None:
+        return unpack_batch(codec, value, size, headers)
+    if getattr(codec, 'headers', None) is None:
+        return codec.deserialize(value)
+    return codec.deserialize(value, headers)
+
+
+def build_listener_registry(consumers: list[IPGConsumerI]) -> tuple[dict[str, list[EventListener]], dict[str, str]]:
+    """Maps each topic (retry topics included) to its listeners, in consumer order.
+
+    Returns the registry and a mapping of each retry topic to its original topic.
+    """
+    listener_registry: dict[str, list[EventListener]] = {}
+    retry_topics: dict[str, str] = {}
+    for consumer in consumers:
+        retry_policy = getattr(consumer, 'retry_policy', None)
+        max_in_flight = getattr(consumer, 'max_in_flight', None)
+        event_listener = EventListener(
+            consumer.codec,
+            consumer.notify,
+            getattr(consumer, 'notify_batch', None),
+            getattr(consumer, 'manual_ack', False),
+            retry_policy,
+            None if max_in_flight is None else InFlightBudget(max_in_flight)
+        )
+        for topic in consumer.topics:
+            listener_registry.setdefault(topic, []).append(event_listener)
+            if retry_policy is None:
+                continue
+            for retry_topic in retry_policy.retry_topics(topic):
+                listener_registry.setdefault(retry_topic, []).append(event_listener)
+                retry_topics[retry_topic] = topic
+    return listener_registry, retry_topics
 
 
 class InterProcessGateway:
+    """Kafka-backed gateway that sends messages and dispatches consumed messages to listeners.
+
+    With auto-commit disabled on the consumer (enable_auto_commit=False), offsets are committed
+    by the gateway instead: a message's offset becomes committable once every listener has
+    acknowledged it (listeners without manual_ack acknowledge when notify returns), and acked
+    offsets are committed asynchronously in batches from emit. Unacknowledged messages are
+    redelivered after a restart or rebalance, which gives at-least-once processing.
+
+    Listeners with a max_in_flight budget apply backpressure: once one holds that many
+    unacknowledged messages, the partitions of its topics are paused until acks free capacity.
+    Budgets are checked before each poll, and listen_batch consumes no more messages than the
+    smallest remaining budget.
 
-    def __init__(self, config: KafkaConnectionConfig) -> None:
+    With metrics, the gateway counts consumed and produced messages and bytes, deserialize and
+    handler time and delivery failures per topic, subscribes to librdkafka statistics (consumer
+    lag, queue depths) when there are metrics sinks, and exports them to the sinks from emit.
+    """
+    COMMIT_BATCH_SIZE = 100
+    COMMIT_INTERVAL_SECONDS = 5.0
+
+    def __init__(self, config: KafkaConnectionConfig, metrics: Optional[IPGMetrics] = None) -> None:
         self.listener_registry = {}
-        self.broker_consumer = config.get_consumer()
-        self.broker_producer = config.get_producer()
+        self.metrics = metrics
+        client_overrides = {}
+        if metrics is not None and metrics.collects_statistics:
+            client_overrides = {
+                'stats_cb': metrics.record_statistics,
+                'statistics.interval.ms': metrics.statistics_interval_ms
+            }
+        self.broker_consumer = config.get_consumer(**client_overrides)
+        self.broker_producer = config.get_producer(**client_overrides)
+        self.manual_commit = \
+            config.consumer_config is not None and config.consumer_config.enable_auto_commit is False
+        self.offset_tracker = OffsetTracker()
+        self._last_commit = time.monotonic()
+        self._retry_topics: dict[str, str] = {}  #< retry topic -> original topic
+        self._paused_until: dict[tuple[str, int], float] = {}
+        self._backpressured_topics: set[str] = set()
         self._is_closed = False
 
     @property
@@ -31,42 +168,286 @@ class InterProcessGateway:
         return self._is_closed 
 
     def send(self, codec: IPGProtocol, topic: str, payload: Any,
-        key: Optional[str] = None, cb: Optional[DeliveryCallback] = None
+        key: Optional[str] = None, cb: Optional[DeliveryCallback] = None,
+        headers: Optional[list[tuple[str, bytes]]] = None
     ) -> None:
+        """Produces payload to topic, keyed by the codec's partition_key unless key is given.
+        headers are sent after the codec's own."""
         if self.broker_producer is None:
             raise ValueError('Producer is not initialized')
+        if key is None and (partition_key := getattr(codec, 'partition_key', None)) is not None:
+            key = partition_key(payload)
+        value = codec.serialize(payload)
+        if (codec_headers := getattr(codec, 'headers', None)) is not None:
+            headers = [*codec_headers(payload), *(headers or [])]
+        if self.metrics is not None:
+            self.metrics.record_produced(topic, len(value))
+            cb = self._count_delivery_failures(topic, cb)
         self.broker_producer.produce(
             topic=topic,
             key=key.encode() if isinstance(key, str) else key,
-            value=codec.serialize(payload),
+            value=value,
+            headers=headers,
             on_delivery=cb
         )
 
+    def _count_delivery_failures(self, topic: str, cb: Optional[DeliveryCallback]) -> DeliveryCallback:
+        metrics = self.metrics
+
+        def on_delivery(err: KafkaError | None, msg: Message | None):
+            if err is not None:
+                metrics.record_delivery_failure(topic)
+            if cb is not None:
+                cb(err, msg)
+
+        return on_delivery
+
     def set_consumers(self, consumers: list[IPGConsumerI]):
-        new_listener_registry = {}
-        for consumer in consumers:
-            event_listener = EventListener(consumer.codec, consumer.notify)
-            for topic in consumer.topics:
-                new_listeners = new_listener_registry.get(topic, [])
-                new_listeners.append(event_listener)
-                new_listener_registry[topic] = new_listeners
+        new_listener_registry, new_retry_topics = build_listener_registry(consumers)
         all_topics = list(new_listener_registry.keys())
-        self.broker_consumer.subscribe(all_topics)
+        self.broker_consumer.subscribe(all_topics, on_revoke=self._on_revoke)
         self.listener_registry = new_listener_registry
+        self._retry_topics = new_retry_topics
+
+    def _on_revoke(self, consumer, partitions: list[TopicPartition]):
+        _ = consumer
+        if self.manual_commit:
+            self._commit_sync(partitions)
+        self.offset_tracker.forget(partitions)
+        for tp in partitions:
+            self._paused_until.pop((tp.topic, tp.partition), None)
+
+    def _track(self, msg: Message, listeners: list[EventListener]) -> list[Acknowledgement]:
+        acks = self.offset_tracker.track(msg.topic(), msg.partition(), msg.offset(), len(listeners))
+        self._reserve(listeners, acks)
+        if self.metrics is not None:
+            self.metrics.record_consumed(msg.topic(), len(msg.value() or b''))
+        return acks
+
+    def _reserve(self, listeners: list[EventListener], acks: list[Acknowledgement]):
+        for event_listener, ack in zip(listeners, acks):
+            if event_listener.budget is not None:
+                ack.budget = event_listener.budget
+                event_listener.budget.acquire()
+
+    def _apply_backpressure(self):
+        """Pauses the topics of listeners that exhausted their budget and resumes relieved ones."""
+        exhausted = {
+            topic for topic, listeners in self.listener_registry.items()
+            if any(l.budget is not None and l.budget.is_exhausted for l in listeners)
+        }
+        relieved = self._backpressured_topics - exhausted
+        self._backpressured_topics = exhausted
+        if not exhausted and not relieved:
+            return
+        assignment = self.broker_consumer.assignment()
+        if exhausted:
+            # Paused again on every poll, so partitions assigned by a rebalance are covered too.
+            self.broker_consumer.pause([tp for tp in assignment if tp.topic in exhausted])
+        if relieved:
+            self.broker_consumer.resume([
+                tp for tp in assignment
+                if tp.topic in relieved and (tp.topic, tp.partition) not in self._paused_until
+            ])
+
+    def _batch_size(self, num_messages: int) -> int:
+        for listeners in self.listener_registry.values():
+            for l in listeners:
+                if l.budget is not None:
+                    num_messages = min(num_messages, max(l.budget.limit - l.budget.in_flight, 1))
+        return num_messages
+
+    def _before_poll(self):
+        self._apply_backpressure()
+        self._resume_due_partitions()
+
+    def _is_error(self, msg: Message) -> bool:
+        if (error := msg.error()) is None:
+            return False
+        if error.fatal():
+            raise KafkaException(error)
+        print(f"Kafka error: {error.str()}")
+        return True
+
+    def _is_due(self, msg: Message) -> bool:
+        """Returns False (and pauses the partition at msg) if a retry is not due yet."""
+        if msg.topic() not in self._retry_topics:
+            return True
+        if (not_before := get_header(msg, HEADER_NOT_BEFORE)) is None:
+            return True
+        wait_seconds = int(not_before) / 1000 - time.time()
+        if wait_seconds <= 0:
+            return True
+        # Every message of a retry topic waits equally long, so the rest of the partition is
+        # not due either: rewind to this message and stop fetching until it is.
+        tp = TopicPartition(msg.topic(), msg.partition(), msg.offset())
+        self.broker_consumer.pause([tp])
+        self.broker_consumer.seek(tp)
+        self._paused_until[(msg.topic(), msg.partition())] = time.monotonic() + wait_seconds
+        return False
+
+    def _resume_due_partitions(self):
+        if not self._paused_until:
+            return
+        now = time.monotonic()
+        due = [
+            key for key, until in self._paused_until.items()
+            if until <= now and key[0] not in self._backpressured_topics
+        ]
+        for key in due:
+            del self._paused_until[key]
+        if due:
+            self.broker_consumer.resume([TopicPartition(topic, partition) for topic, partition in due])
+
+    def _route_failure(self, msg: Message, retry_policy: RetryPolicy, error: Exception, ack: Acknowledgement):
+        """Forwards a failed message to its next retry topic (or the DLQ).
+
+        The message is acknowledged once the broker confirms the forwarded copy, so a failure to
+        forward leaves it uncommitted and it is redelivered.
+        """
+        if self.broker_producer is None:
+            raise ValueError('Producer is not initialized') from error
+        original_topic = self._retry_topics.get(msg.topic(), msg.topic())
+        attempt = int(get_header(msg, HEADER_ATTEMPT) or 0) if msg.topic() in self._retry_topics else 0
+        destination, delay_seconds = retry_policy.next_destination(original_topic, attempt)
+
+        def on_delivery(err: KafkaError | None, _: Message | None):
+            if err is not None:
+                print(f"Failed to forward message to '{destination}': {err.str()}")
+                return
+            ack()
+
+        if self.metrics is not None:
+            self.metrics.record_produced(destination, len(msg.value() or b''))
+            on_delivery = self._count_delivery_failures(destination, on_delivery)
+        self.broker_producer.produce(
+            topic=destination,
+            key=msg.key(),
+            value=msg.value(),
+            headers=failure_headers(msg, original_topic, attempt + 1, error, delay_seconds),
+            on_delivery=on_delivery
+        )
+        print(f"Forwarded message from '{msg.topic()}' to '{destination}': {error!r}")
+
+    def _dispatch(self, msg: Message, event_listener: EventListener, ack: Acknowledgement):
+        try:
+            start = time.perf_counter()
+            payload = deserialize(event_listener.codec, msg.value(), msg.headers())
+            deserialized = time.perf_counter()
+            event_listener.dispatch(payload, ack)
+            if self.metrics is not None:
+                self.metrics.observe_deserialize(msg.topic(), deserialized - start)
+                self.metrics.observe_handler(msg.topic(), time.perf_counter() - deserialized)
+        except Exception as error:
+            if event_listener.retry_policy is None:
+                raise
+            self._route_failure(msg, event_listener.retry_policy, error, ack)
+
+    def _dispatch_batch(self, batch: list[Message], event_listener: EventListener, acks: list[Acknowledgement]):
+        retry_policy = event_listener.retry_policy
+        start = time.perf_counter()
+        codec = event_listener.codec
+        payloads, decoded = [], []
+        for msg, ack in zip(batch, acks):
+            try:
+                payloads.append(deserialize(codec, msg.value(), msg.headers()))
+            except Exception as error:
+                if retry_policy is None:
+                    raise
+                self._route_failure(msg, retry_policy, error, ack)
+                continue
+            decoded.append((msg, ack))
+        if not decoded:
+            return
+        deserialized = time.perf_counter()
+        try:
+            event_listener.dispatch_batch(payloads, [ack for _, ack in decoded])
+        except Exception as error:
+            if retry_policy is None:
+                raise
+            # The handler may already have acted on part of the batch, so the batch is not
+            # dispatched again: its unacknowledged messages go to the retry topics as they are.
+            for msg, ack in decoded:
+                if not ack.is_acked:
+                    self._route_failure(msg, retry_policy, error, ack)
+            return
+        if self.metrics is not None:
+            topic = batch[0].topic()
+            self.metrics.observe_deserialize(topic, deserialized - start, len(decoded))
+            self.metrics.observe_handler(topic, time.perf_counter() - deserialized, len(decoded))
 
     def listen(self, timeout: float):
+        self._before_poll()
         msg = self.broker_consumer.poll(timeout)
-        if msg is None:
+        if msg is None or self._is_error(msg) or not self._is_due(msg):
+            return
+        self._handle(msg)
+
+    def _handle(self, msg: Message):
+        listeners = self.listener_registry[msg.topic()]
+        acks = self._track(msg, listeners)
+        for event_listener, ack in zip(listeners, acks):
+            self._dispatch(msg, event_listener, ack)
+
+    def listen_batch(self, num_messages: int, timeout: float):
+        """Consumes up to num_messages and dispatches them to the listeners grouped by topic.
+
+        Listeners that provide notify_batch receive every payload of a topic in one call (in
+        partition order); the others are notified once per payload, like listen.
+        """
+        self._before_poll()
+        msgs = self.broker_consumer.consume(num_messages=self._batch_size(num_messages), timeout=timeout)
+        if not msgs:
             return
-        if (error := msg.error()):
-            raise Exception(error.str())
-        topic = msg.topic()
-        for event_listener in self.listener_registry[topic]:
-            payload = event_listener.codec.deserialize(msg.value())
-            event_listener.notify(payload)
+        batches: dict[str, list[Message]] = {}
+        deferred: set[tuple[str, int]] = set()
+        for msg in msgs:
+            if self._is_error(msg) or (msg.topic(), msg.partition()) in deferred:
+                continue
+            if not self._is_due(msg):
+                deferred.add((msg.topic(), msg.partition()))
+                continue
+            batches.setdefault(msg.topic(), []).append(msg)
+        for topic, batch in batches.items():
+            listeners = self.listener_registry[topic]
+            # acks_by_msg[i][j] acknowledges message i for listener j.
+            acks_by_msg = self.offset_tracker.track_many(
+                [(topic, msg.partition(), msg.offset()) for msg in batch], len(listeners)
+            )
+            if any(l.budget is not None for l in listeners):
+                for acks in acks_by_msg:
+                    self._reserve(listeners, acks)
+            if self.metrics is not None:
+                self.metrics.record_consumed(topic, sum(len(msg.value() or b'') for msg in batch), len(batch))
+            for j, event_listener in enumerate(listeners):
+                self._dispatch_batch(batch, event_listener, [acks[j] for acks in acks_by_msg])
+
+    def commit(self, partitions: Optional[list[TopicPartition]] = None, asynchronous: bool = True):
+        """Commits every acknowledged offset (optionally restricted to the given partitions)."""
+        offsets = self.offset_tracker.pop_committable(partitions)
+        if not offsets:
+            return
+        self.broker_consumer.commit(offsets=offsets, asynchronous=asynchronous)
+        self._last_commit = time.monotonic()
+
+    def _commit_sync(self, partitions: Optional[list[TopicPartition]] = None):
+        try:
+            self.commit(partitions, asynchronous=False)
+        except KafkaException as e:
+            print(f"Failed to commit offsets: {e}")
+
+    def _should_commit(self) -> bool:
+        if self.offset_tracker.num_acked_since_commit >= self.COMMIT_BATCH_SIZE:
+            return True
+        return time.monotonic() - self._last_commit >= self.COMMIT_INTERVAL_SECONDS
 
     def emit(self):
-        self.broker_producer.poll(0)
+        if self.broker_producer is not None:
+            self.broker_producer.poll(0)
+        if self.manual_commit and self._should_commit():
+            self.commit()
+        if self.metrics is not None:
+            self.metrics.maybe_export()
 
     def flush(self, timeout: int) -> int:
         num_remaining_messages = self.broker_producer.flush(timeout=timeout)
@@ -81,6 +462,8 @@ class InterProcessGateway:
                 pass
         
         def close_consumer():
+            if self.manual_commit:
+                self._commit_sync()
             self.broker_consumer.close()
 
         if self.broker_producer is not None:
@@ -88,6 +471,9 @@ class InterProcessGateway:
 
         if self.broker_consumer is not None:
             close_consumer()
+
+        if self.metrics is not None:
+            self.metrics.close()
         
         self._is_closed = True
         
\ No newline at end of file
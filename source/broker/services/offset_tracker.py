@@ -0,0 +1,179 @@
+import threading
+from collections import deque
+from confluent_kafka import TopicPartition
+
+
+class InFlightBudget:
+    """Counts a listener's unacknowledged messages against a fixed limit.
+
+    Attributes:
+    - limit (int): Number of unacknowledged messages the listener may hold.
+    """
+
+    def __init__(self, limit: int) -> None:
+        if limit < 1:
+            raise ValueError('limit must be at least 1')
+        self.limit = limit
+        self._in_flight = 0
+        self._lock = threading.Lock()
+
+    @property
+    def in_flight(self) -> int:
+        return self._in_flight
+
+    @property
+    def is_exhausted(self) -> bool:
+        return self._in_flight >= self.limit
+
+    def acquire(self, n: int = 1) -> None:
+        with self._lock:
+            self._in_flight += n
+
+    def release(self, n: int = 1) -> None:
+        with self._lock:
+            self._in_flight = max(self._in_flight - n, 0)
+
+
+class Acknowledgement:
+    """Marks one listener's processing of one message as finished.
+
+    Acknowledgements are thread-safe and idempotent, so a listener may hand them to a background
+    worker and call them whenever the work is done. Calling one more than once has no effect.
+
+    Attributes:
+    - topic (str): Topic of the acknowledged message.
+    - partition (int): Partition of the acknowledged message.
+    - offset (int): Offset of the acknowledged message.
+    - budget (InFlightBudget | None): The listener's in-flight budget, released on ack.
+    """
+
+    __slots__ = ('tracker', 'topic', 'partition', 'offset', 'is_acked', 'budget')
+
+    def __init__(self, tracker: 'OffsetTracker', topic: str, partition: int, offset: int) -> None:
+        self.tracker = tracker
+        self.topic = topic
+        self.partition = partition
+        self.offset = offset
+        self.is_acked = False
+        self.budget: InFlightBudget | None = None
+
+    def __call__(self) -> None:
+        self.tracker.ack(self)
+
+
+class _PartitionOffsets:
+
+    def __init__(self) -> None:
+        self.delivered: deque[int] = deque()  #< offsets in delivery order
+        self.remaining: dict[int, int] = {}   #< offset -> acknowledgements still expected
+        self.committable: int | None = None   #< next offset to commit, if not yet committed
+
+
+class OffsetTracker:
+    """Tracks delivered offsets per partition and computes which offsets are safe to commit.
+
+    An offset is safe to commit once the message at that offset, and every message delivered
+    before it on the same partition, has been acknowledged by all of its listeners. Acks may
+    arrive out of order and from any thread.
+    """
+
+    def __init__(self) -> None:
+        self._partitions: dict[tuple[str, int], _PartitionOffsets] = {}
+        self._lock = threading.Lock()
+        self._num_acked = 0
+        self._num_in_flight = 0
+
+    @property
+    def num_in_flight(self) -> int:
+        return self._num_in_flight
+
+    @property
+    def num_acked_since_commit(self) -> int:
+        return self._num_acked
+
+    def track(self, topic: str, partition: int, offset: int, num_listeners: int) -> list[Acknowledgement]:
+        """Registers a delivered message and returns one acknowledgement per listener."""
+        return self.track_many([(topic, partition, offset)], num_listeners)[0]
+
+    def track_many(self, entries: list[tuple[str, int, int]], num_listeners: int) -> list[list[Acknowledgement]]:
+        """Registers (topic, partition, offset) entries; returns acknowledgements per entry."""
+        with self._lock:
+            for topic, partition, offset in entries:
+                state = self._partitions.get((topic, partition))
+                if state is None:
+                    state = self._partitions[(topic, partition)] = _PartitionOffsets()
+                state.delivered.append(offset)
+                state.remaining[offset] = num_listeners
+            self._num_in_flight += len(entries)
+        acks = [
+            [Acknowledgement(self, topic, partition, offset) for _ in range(num_listeners)]
+            for topic, partition, offset in entries
+        ]
+        if num_listeners == 0:
+            self.ack_many([Acknowledgement(self, *entry) for entry in entries])
+        return acks
+
+    def ack(self, ack: Acknowledgement) -> None:
+        self.ack_many([ack])
+
+    def ack_many(self, acks: list[Acknowledgement]) -> None:
+        with self._lock:
+            for ack in acks:
+                self._ack(ack)
+
+    def _ack(self, ack: Acknowledgement) -> None:
+        if ack.is_acked:
+            return
+        ack.is_acked = True
+        if ack.budget is not None:
+            ack.budget.release()
+        state = self._partitions.get((ack.topic, ack.partition))
+        offset = ack.offset
+        if state is None or offset not in state.remaining:
+            return #< The partition was revoked after the message was delivered.
+        state.remaining[offset] = max(state.remaining[offset] - 1, 0)
+        if state.remaining[offset] != 0:
+            return
+        self._num_in_flight -= 1
+        self._num_acked += 1
+        while state.delivered and state.remaining.get(state.delivered[0]) == 0:
+            done = state.delivered.popleft()
+            del state.remaining[done]
+            state.committable = done + 1
+
+    def pop_committable(self, partitions: list[TopicPartition] | None = None) -> list[TopicPartition]:
+        """Returns the offsets to commit and forgets them, so each offset is committed once.
+
+        Args:
+        - partitions (list[TopicPartition] | None): Restricts the result to these partitions.
+            Defaults to every tracked partition.
+        """
+        keys = None if partitions is None else {(tp.topic, tp.partition) for tp in partitions}
+        offsets = []
+        with self._lock:
+            for (topic, partition), state in self._partitions.items():
+                if keys is not None and (topic, partition) not in keys:
+                    continue
+                if state.committable is None:
+                    continue
+                offsets.append(TopicPartition(topic, partition, state.committable))
+                state.committable = None
+            self._num_acked = 0
+        return offsets
+
+    def has_in_flight(self, partitions: list[TopicPartition]) -> bool:
+        """Returns True if any message of the given partitions still awaits an acknowledgement."""
+        with self._lock:
+            for tp in partitions:
+                state = self._partitions.get((tp.topic, tp.partition))
+                if state is not None and state.delivered:
+                    return True
+        return False
+
+    def forget(self, partitions: list[TopicPartition]) -> None:
+        """Drops the state of revoked partitions; their unacknowledged messages are redelivered."""
+        with self._lock:
+            for tp in partitions:
+                state = self._partitions.pop((tp.topic, tp.partition), None)
+                if state is not None:
+                    self._num_in_flight -= sum(1 for n in state.remaining.values() if n != 0)
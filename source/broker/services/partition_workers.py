@@ -0,0 +1,337 @@
+import multiprocessing
+import queue
+import signal
+import threading
+import time
+import zlib
+from dataclasses import dataclass
+from typing import Callable, Literal, Optional, Any
+from confluent_kafka import Message, TopicPartition
+from source.broker.connections import KafkaConnectionConfig
+from source.broker.metrics import IPGMetrics
+from source.broker.interfaces import IPGConsumerI
+from source.broker.services.ipg import InterProcessGateway, EventListener, build_listener_registry, deserialize
+from source.broker.services.offset_tracker import Acknowledgement
+from source.broker.services.retry import RemoteHandlerError
+
+
+ExecutionMode = Literal['thread', 'process']
+
+
+@dataclass(frozen=True)
+class WorkerSetup:
+    """Handlers built inside a worker process.
+
+    Attributes:
+    - consumers (list[IPGConsumerI]): The consumers given to the parent's set_consumers, in the
+        same order, bound to handlers that live in the worker process.
+    - gateway (Optional[InterProcessGateway]): The gateway those handlers send with. The worker
+        emits it between messages and closes it on shutdown.
+    """
+    consumers: list[IPGConsumerI]
+    gateway: Optional[InterProcessGateway] = None
+
+
+class _ThreadWorker:
+    MAX_BATCH_SIZE = 100
+
+    def __init__(self, gateway: 'PartitionedInterProcessGateway', name: str) -> None:
+        self.gateway = gateway
+        self.inbox: queue.SimpleQueue = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self.thread.start()
+
+    def submit(self, msg: Message, listeners: list[EventListener], acks: list[Acknowledgement]) -> None:
+        self.inbox.put((msg, listeners, acks))
+
+    def stop(self) -> None:
+        self.inbox.put(None)
+
+    def join(self, timeout: float) -> None:
+        self.thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            items = [self.inbox.get()]
+            while len(items) < self.MAX_BATCH_SIZE:
+                try:
+                    items.append(self.inbox.get_nowait())
+                except queue.Empty:
+                    break
+            is_stopping = items[-1] is None
+            self.gateway._work([item for item in items if item is not None])
+            if is_stopping:
+                return
+
+
+class _RemoteAck:
+    """Acknowledgement handed to listeners in a worker process; reports back to the parent."""
+
+    __slots__ = ('outbox', 'key', 'index', 'is_acked')
+
+    def __init__(self, outbox: Any, key: tuple[str, int, int], index: int) -> None:
+        self.outbox = outbox
+        self.key = key
+        self.index = index
+        self.is_acked = False
+
+    def __call__(self) -> None:
+        if self.is_acked:
+            return
+        self.is_acked = True
+        self.outbox.put((self.key, self.index, None, None))
+
+
+def _run_process_worker(worker_setup: Callable[[], WorkerSetup], inbox: Any, outbox: Any) -> None:
+    # Ctrl+C reaches the whole process group; the parent decides when workers stop.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    setup = worker_setup()
+    listener_registry, _ = build_listener_registry(setup.consumers)
+    while True:
+        try:
+            item = inbox.get(timeout=0.1)
+        except queue.Empty:
+            item = ()
+        if item is None:
+            break
+        if item:
+            topic, partition, offset, value, headers = item
+            key = (topic, partition, offset)
+            for index, event_listener in enumerate(listener_registry.get(topic, [])):
+                ack = _RemoteAck(outbox, key, index)
+                try:
+                    start = time.perf_counter()
+                    payload = deserialize(event_listener.codec, value, headers)
+                    deserialized = time.perf_counter()
+                    event_listener.dispatch(payload, ack)
+                    timings = (deserialized - start, time.perf_counter() - deserialized)
+                    outbox.put((key, index, None, timings))
+                except Exception as error:
+                    remote = RemoteHandlerError.from_exception(error)
+                    outbox.put((key, index, (remote.type_name, str(error), remote.remote_traceback), None))
+        if setup.gateway is not None:
+            setup.gateway.emit()
+    if setup.gateway is not None:
+        setup.gateway.close()
+
+
+class _ProcessWorker:
+
+    def __init__(self, context: Any, worker_setup: Callable[[], WorkerSetup], outbox: Any, name: str) -> None:
+        self.inbox = context.Queue()
+        self.process = context.Process(
+            target=_run_process_worker,
+            args=(worker_setup, self.inbox, outbox),
+            name=name,
+            daemon=True
+        )
+        self.process.start()
+
+    def submit(self, msg: Message) -> None:
+        self.inbox.put((msg.topic(), msg.partition(), msg.offset(), msg.value(), msg.headers()))
+
+    def stop(self) -> None:
+        self.inbox.put(None)
+
+    def join(self, timeout: float) -> None:
+        self.process.join(timeout)
+        if self.process.is_alive():
+            self.process.terminate()
+
+
+class PartitionedInterProcessGateway(InterProcessGateway):
+    """InterProcessGateway that hands each assigned partition to its own worker.
+
+    The consumer still polls from the calling thread, but messages are dispatched by a worker
+    per partition: a thread in 'thread' mode (IO-bound handlers, which must be thread-safe), or
+    a process in 'process' mode (CPU-bound handlers). A partition is always served by the same
+    worker, one message at a time, so ordering within a partition holds. With max_workers,
+    partitions share that many workers instead of getting one each.
+
+    Process workers do not share the parent's handlers: each one calls worker_setup, which must
+    be a picklable, module-level callable, to build its own. Acknowledgements and failures are
+    reported back to the parent, which tracks offsets and routes failures to the retry topics.
+
+    When partitions are revoked, the gateway waits (up to DRAIN_TIMEOUT_SECONDS) for their
+    in-flight messages to be acknowledged and commits them before the partitions move to
+    another consumer.
+
+    Attributes:
+    - mode (ExecutionMode): 'thread' or 'process'.
+    - worker_setup (Optional[Callable[[], WorkerSetup]]): Builds the handlers of a worker
+        process. Required in process mode.
+    - max_workers (Optional[int]): Upper bound on the number of workers. Defaults to one
+        worker per partition, the partitions of retry topics included.
+    """
+    DRAIN_TIMEOUT_SECONDS = 30.0
+
+    def __init__(self, config: KafkaConnectionConfig, mode: ExecutionMode = 'thread',
+        worker_setup: Optional[Callable[[], WorkerSetup]] = None, max_workers: Optional[int] = None,
+        metrics: Optional[IPGMetrics] = None
+    ) -> None:
+        super().__init__(config, metrics)
+        if mode not in ('thread', 'process'):
+            raise ValueError(f"Unknown execution mode: '{mode}'")
+        if mode == 'process' and worker_setup is None:
+            raise ValueError('worker_setup is required in process mode')
+        if max_workers is not None and max_workers < 1:
+            raise ValueError('max_workers must be at least 1')
+        self.mode = mode
+        self.worker_setup = worker_setup
+        self.max_workers = max_workers
+        self._workers: dict[Any, _ThreadWorker | _ProcessWorker] = {}
+        self._worker_error: Optional[BaseException] = None
+        self._context = multiprocessing.get_context('spawn')
+        self._outbox = self._context.Queue() if mode == 'process' else None
+        # (topic, partition, offset) -> message, its listeners and their pending acks
+        self._remote: dict[tuple[str, int, int], tuple[Message, list[EventListener], list[Acknowledgement]]] = {}
+
+    @property
+    def num_workers(self) -> int:
+        return len(self._workers)
+
+    def _worker_id(self, topic: str, partition: int) -> Any:
+        if self.max_workers is None:
+            return (topic, partition)
+        # crc32, unlike hash, is not salted per process: a partition keeps its worker across restarts.
+        return (zlib.crc32(topic.encode()) + partition) % self.max_workers
+
+    def _get_worker(self, topic: str, partition: int) -> _ThreadWorker | _ProcessWorker:
+        worker_id = self._worker_id(topic, partition)
+        worker = self._workers.get(worker_id)
+        if worker is None:
+            name = f'ipg-worker-{worker_id}'
+            if self.mode == 'thread':
+                worker = _ThreadWorker(self, name)
+            else:
+                worker = _ProcessWorker(self._context, self.worker_setup, self._outbox, name)
+            self._workers[worker_id] = worker
+        return worker
+
+    def _handle(self, msg: Message):
+        listeners = self.listener_registry[msg.topic()]
+        acks = self._track(msg, listeners)
+        worker = self._get_worker(msg.topic(), msg.partition())
+        if self.mode == 'thread':
+            worker.submit(msg, listeners, acks)
+            return
+        self._remote[(msg.topic(), msg.partition(), msg.offset())] = (msg, listeners, acks)
+        worker.submit(msg)
+
+    def _work(self, items: list[tuple[Message, list[EventListener], list[Acknowledgement]]]):
+        """Dispatches queued messages on a worker thread, batching consecutive ones per topic."""
+        start = 0
+        while start < len(items):
+            topic = items[start][0].topic()
+            end = start + 1
+            while end < len(items) and items[end][0].topic() == topic:
+                end += 1
+            run = items[start:end]
+            try:
+                for j, event_listener in enumerate(run[0][1]):
+                    if len(run) == 1:
+                        self._dispatch(run[0][0], event_listener, run[0][2][j])
+                    else:
+                        self._dispatch_batch([msg for msg, _, _ in run], event_listener, [acks[j] for _, _, acks in run])
+            except Exception as error:
+                # Unacknowledged messages are never committed; the error stops the stage from
+                # the polling thread, like it would without workers.
+                if self._worker_error is None:
+                    self._worker_error = error
+            start = end
+
+    def _collect_results(self):
+        if self._outbox is None:
+            return
+        while True:
+            try:
+                key, index, failure, timings = self._outbox.get_nowait()
+            except queue.Empty:
+                return
+            if timings is not None:
+                if self.metrics is not None:
+                    self.metrics.observe_deserialize(key[0], timings[0])
+                    self.metrics.observe_handler(key[0], timings[1])
+                continue
+            entry = self._remote.get(key)
+            if entry is None:
+                continue #< The partition was revoked in the meantime.
+            msg, listeners, acks = entry
+            if failure is None:
+                acks[index]()
+            elif (retry_policy := listeners[index].retry_policy) is not None:
+                self._route_failure(msg, retry_policy, RemoteHandlerError(*failure), acks[index])
+            elif self._worker_error is None:
+                self._worker_error = RemoteHandlerError(*failure)
+            if all(ack.is_acked for ack in acks):
+                del self._remote[key]
+
+    def _raise_worker_error(self):
+        for worker in self._workers.values():
+            if isinstance(worker, _ProcessWorker) and not worker.process.is_alive():
+                raise RuntimeError(f"Worker process '{worker.process.name}' exited with code {worker.process.exitcode}")
+        if self._worker_error is not None:
+            error, self._worker_error = self._worker_error, None
+            raise error
+
+    def listen(self, timeout: float):
+        self._raise_worker_error()
+        self._collect_results()
+        super().listen(timeout)
+
+    def listen_batch(self, num_messages: int, timeout: float):
+        """Consumes up to num_messages and hands each of them to its partition's worker."""
+        self._raise_worker_error()
+        self._collect_results()
+        self._before_poll()
+        msgs = self.broker_consumer.consume(num_messages=self._batch_size(num_messages), timeout=timeout)
+        deferred: set[tuple[str, int]] = set()
+        for msg in msgs:
+            if self._is_error(msg) or (msg.topic(), msg.partition()) in deferred:
+                continue
+            if not self._is_due(msg):
+                deferred.add((msg.topic(), msg.partition()))
+                continue
+            self._handle(msg)
+
+    def emit(self):
+        self._collect_results()
+        super().emit()
+
+    def _drain(self, partitions: list[TopicPartition], timeout: float):
+        """Waits until every delivered message of the given partitions is acknowledged."""
+        if not self._workers:
+            return #< Nothing is running that could still acknowledge them.
+        deadline = time.monotonic() + timeout
+        while self.offset_tracker.has_in_flight(partitions) and time.monotonic() < deadline:
+            self._collect_results()
+            if self.broker_producer is not None:
+                self.broker_producer.poll(0) #< delivery reports ack forwarded failures
+            time.sleep(0.01)
+        if self.offset_tracker.has_in_flight(partitions):
+            print(f"Revoking partitions with unacknowledged messages; they will be redelivered: {partitions}")
+
+    def _on_revoke(self, consumer, partitions: list[TopicPartition]):
+        self._drain(partitions, self.DRAIN_TIMEOUT_SECONDS)
+        super()._on_revoke(consumer, partitions)
+        revoked = {(tp.topic, tp.partition) for tp in partitions}
+        for key in [key for key in self._remote if key[:2] in revoked]:
+            del self._remote[key]
+        if self.max_workers is None:
+            # Dedicated workers are idle now; stop them rather than keep one per past partition.
+            self._stop_workers([self._workers.pop(key) for key in revoked if key in self._workers])
+
+    def _stop_workers(self, workers: list[_ThreadWorker | _ProcessWorker]):
+        for worker in workers:
+            worker.stop()
+        deadline = time.monotonic() + self.DRAIN_TIMEOUT_SECONDS
+        for worker in workers:
+            worker.join(max(deadline - time.monotonic(), 0))
+
+    def close(self):
+        if self.broker_consumer is not None:
+            self._drain(self.broker_consumer.assignment(), self.DRAIN_TIMEOUT_SECONDS)
+        workers, self._workers = list(self._workers.values()), {}
+        self._stop_workers(workers)
+        self._collect_results()
+        super().close()
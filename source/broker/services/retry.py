@@ -0,0 +1,123 @@
+import time
+import traceback
+from dataclasses import dataclass
+from confluent_kafka import Message
+
+
+HEADER_ORIGINAL_TOPIC = 'x-original-topic'
+HEADER_ORIGINAL_PARTITION = 'x-original-partition'
+HEADER_ORIGINAL_OFFSET = 'x-original-offset'
+HEADER_ATTEMPT = 'x-attempt'
+HEADER_EXCEPTION = 'x-exception'
+HEADER_EXCEPTION_MESSAGE = 'x-exception-message'
+HEADER_STACKTRACE = 'x-stacktrace'
+HEADER_FAILED_AT = 'x-failed-at'
+HEADER_NOT_BEFORE = 'x-not-before'
+_FAILURE_HEADERS = {
+    HEADER_ORIGINAL_TOPIC, HEADER_ORIGINAL_PARTITION, HEADER_ORIGINAL_OFFSET, HEADER_ATTEMPT,
+    HEADER_EXCEPTION, HEADER_EXCEPTION_MESSAGE, HEADER_STACKTRACE, HEADER_FAILED_AT, HEADER_NOT_BEFORE
+}
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """Routes messages whose handler raised to delayed retry topics, and finally to a DLQ.
+
+    A message that fails on '<topic>' is forwarded to '<topic>.retry.1', redelivered after
+    delays_seconds[0], then to '<topic>.retry.2' after delays_seconds[1], and so on. Once every
+    retry has failed, it is forwarded to '<topic>.dlq'. Failure metadata travels in Kafka headers.
+
+    Attributes:
+    - delays_seconds (tuple[float, ...]): Redelivery delay of each retry topic, in order.
+    """
+    delays_seconds: tuple[float, ...] = (30, 5 * 60)
+
+    @property
+    def max_retries(self) -> int:
+        return len(self.delays_seconds)
+
+    def retry_topic(self, topic: str, attempt: int) -> str:
+        return f'{topic}.retry.{attempt}'
+
+    def retry_topics(self, topic: str) -> list[str]:
+        return [self.retry_topic(topic, attempt) for attempt in range(1, self.max_retries + 1)]
+
+    def dlq_topic(self, topic: str) -> str:
+        return f'{topic}.dlq'
+
+    def next_destination(self, topic: str, attempt: int) -> tuple[str, float | None]:
+        """Returns the topic for the next attempt and its redelivery delay (None for the DLQ).
+
+        Args:
+        - topic (str): The original topic of the failed message.
+        - attempt (int): The attempt that failed (0 for the original delivery).
+        """
+        if attempt >= self.max_retries:
+            return self.dlq_topic(topic), None
+        return self.retry_topic(topic, attempt + 1), self.delays_seconds[attempt]
+
+
+class RemoteHandlerError(Exception):
+    """Stands in for an exception raised by a handler in another process."""
+
+    def __init__(self, type_name: str, message: str, remote_traceback: str) -> None:
+        super().__init__(message)
+        self.type_name = type_name
+        self.remote_traceback = remote_traceback
+
+    @classmethod
+    def from_exception(cls, error: BaseException) -> 'RemoteHandlerError':
+        return cls(exception_name(error), str(error), exception_traceback(error))
+
+    def __str__(self) -> str:
+        return f'{self.type_name}: {super().__str__()}'
+
+
+def exception_name(error: BaseException) -> str:
+    if isinstance(error, RemoteHandlerError):
+        return error.type_name
+    return type(error).__qualname__
+
+
+def exception_traceback(error: BaseException) -> str:
+    if isinstance(error, RemoteHandlerError):
+        return error.remote_traceback
+    return ''.join(traceback.format_exception(error))
+
+
+def get_header(msg: Message, name: str) -> bytes | None:
+    for key, value in msg.headers() or []:
+        if key == name:
+            return value
+    return None
+
+
+def failure_headers(msg: Message, original_topic: str, attempt: int, error: BaseException,
+    delay_seconds: float | None
+) -> list[tuple[str, bytes]]:
+    # Retried messages keep pointing at their first delivery.
+    original_partition = get_header(msg, HEADER_ORIGINAL_PARTITION) or str(msg.partition()).encode()
+    original_offset = get_header(msg, HEADER_ORIGINAL_OFFSET) or str(msg.offset()).encode()
+    # The codec's own headers travel with the message, so the retried copy still decodes.
+    headers = [(key, value) for key, value in msg.headers() or [] if key not in _FAILURE_HEADERS]
+    headers += [(HEADER_ORIGINAL_PARTITION, original_partition), (HEADER_ORIGINAL_OFFSET, original_offset)]
+    return headers + failure_metadata(original_topic, attempt, error, delay_seconds)
+
+
+def failure_metadata(original_topic: str, attempt: int, error: BaseException,
+    delay_seconds: float | None = None
+) -> list[tuple[str, bytes]]:
+    """Returns the failure headers of a payload that was not delivered as a record of its own
+    (e.g. one item of a batch record), so it has no original partition and offset."""
+    now_ms = int(time.time() * 1000)
+    headers = [
+        (HEADER_ORIGINAL_TOPIC, original_topic.encode()),
+        (HEADER_ATTEMPT, str(attempt).encode()),
+        (HEADER_EXCEPTION, exception_name(error).encode()),
+        (HEADER_EXCEPTION_MESSAGE, str(error)[:1000].encode()),
+        (HEADER_STACKTRACE, exception_traceback(error)[-4000:].encode()),
+        (HEADER_FAILED_AT, str(now_ms).encode()),
+    ]
+    if delay_seconds is not None:
+        headers.append((HEADER_NOT_BEFORE, str(now_ms + int(delay_seconds * 1000)).encode()))
+    return headers
@@ -1,9 +1,21 @@
+from .json_backend import JsonBackend, get_json_backend, set_json_backend
 from .json_codec import JsonCodec
 from .handshake_extractor_1_codec import HandshakeExtractor1Codec
 from .handshake_extractor_2_codec import HandshakeExtractor2Codec
 from .handshake_transformer_1_codec import HandshakeTransformer1Codec
 from .handshake_transformer_2_codec import HandshakeTransformer2Codec
 from .handshake_loader_1_codec import HandshakeLoader1Codec
+from .handshake_transformer_1_binary_codec import HandshakeTransformer1BinaryCodec
+from .handshake_transformer_2_binary_codec import HandshakeTransformer2BinaryCodec
+from .schema_registry import SchemaRegistry, SchemaVersion, VersionedCodec
+from .schemas import (
+    SCHEMA_REGISTRY,
+    EXTRACTOR_1_CODEC,
+    EXTRACTOR_2_CODEC,
+    TRANSFORMER_1_CODEC,
+    TRANSFORMER_2_CODEC,
+    LOADER_1_CODEC
+)
 
 
-__all__ = ['JsonCodec', 'HandshakeExtractor1Codec', 'HandshakeExtractor2Codec', 'HandshakeTransformer1Codec', 'HandshakeTransformer2Codec', 'HandshakeLoader1Codec']
+__all__ = ['JsonBackend', 'get_json_backend', 'set_json_backend', 'JsonCodec', 'HandshakeExtractor1Codec', 'HandshakeExtractor2Codec', 'HandshakeTransformer1Codec', 'HandshakeTransformer2Codec', 'HandshakeLoader1Codec', 'HandshakeTransformer1BinaryCodec', 'HandshakeTransformer2BinaryCodec', 'SchemaRegistry', 'SchemaVersion', 'VersionedCodec', 'SCHEMA_REGISTRY', 'EXTRACTOR_1_CODEC', 'EXTRACTOR_2_CODEC', 'TRANSFORMER_1_CODEC', 'TRANSFORMER_2_CODEC', 'LOADER_1_CODEC']
@@ -0,0 +1,42 @@
+import os
+import struct
+from functools import cache
+from typing import Optional
+from source.database.blob_store import BlobStore, FileSystemBlobStore, GridFSBlobStore, blob_digest
+
+
+CLAIM_CHECK_SHA256 = 'sha256'
+# SHA-256 digest and size of the blob: what a claim-check message carries instead of the blob.
+_REFERENCE = struct.Struct('>32sQ')
+
+
+@cache
+def get_claim_check_store() -> Optional[BlobStore]:
+    """Returns the store named by SCRAWLER_BLOB_STORE ('filesystem' or 'gridfs'), if it is set.
+
+    The filesystem store keeps its files in SCRAWLER_BLOB_DIR.
+    """
+    backend = os.environ.get('SCRAWLER_BLOB_STORE')
+    if not backend:
+        return None
+    if backend == 'filesystem':
+        return FileSystemBlobStore(os.environ['SCRAWLER_BLOB_DIR'])
+    if backend == 'gridfs':
+        return GridFSBlobStore()
+    raise ValueError(f"Unknown blob store '{backend}' (expected 'filesystem' or 'gridfs')")
+
+
+def check_in(store: BlobStore, data: bytes) -> bytes:
+    """Stores data and returns the reference to send in its place."""
+    digest = store.put(data)
+    return _REFERENCE.pack(bytes.fromhex(digest), len(data))
+
+
+def check_out(store: BlobStore, reference: bytes) -> bytes:
+    """Returns the blob a reference points to, after checking its size and digest."""
+    raw_digest, size = _REFERENCE.unpack(reference)
+    digest = raw_digest.hex()
+    data = store.get(digest)
+    if len(data) != size or blob_digest(data) != digest:
+        raise ValueError(f"Blob '{digest}' is corrupt: expected {size} bytes, found {len(data)}")
+    return data
@@ -0,0 +1,22 @@
+from .dictionaries import DictionaryStore
+from .compressors import (
+    CODEC_ZLIB,
+    CODEC_ZSTD,
+    Compressor,
+    ZlibCompressor,
+    ZstdCompressor,
+    CompressionRegistry,
+    get_compression_registry
+)
+
+
+__all__ = [
+    'DictionaryStore',
+    'CODEC_ZLIB',
+    'CODEC_ZSTD',
+    'Compressor',
+    'ZlibCompressor',
+    'ZstdCompressor',
+    'CompressionRegistry',
+    'get_compression_registry'
+]
@@ -0,0 +1,131 @@
+import os
+import threading
+import zlib
+from functools import cache
+from typing import Optional, Protocol
+import zstandard
+from source.codec.compression.dictionaries import DictionaryStore
+
+
+CODEC_ZLIB = 'zlib'
+CODEC_ZSTD = 'zstd'
+
+
+class Compressor(Protocol):
+    codec_id: str
+    dictionary: Optional[str]
+
+    def compress(self, data: bytes) -> bytes:
+        ...
+
+    def decompress(self, data: bytes | memoryview) -> bytes:
+        ...
+
+
+class ZlibCompressor:
+    """zlib at a fixed level; the format of the original JSON codecs.
+
+    Attributes:
+    - level (int): zlib compression level (1-9).
+    """
+    codec_id = CODEC_ZLIB
+    dictionary = None
+
+    def __init__(self, level: int = zlib.Z_DEFAULT_COMPRESSION) -> None:
+        self.level = level
+
+    def compress(self, data: bytes) -> bytes:
+        return zlib.compress(data, self.level)
+
+    def decompress(self, data: bytes | memoryview) -> bytes:
+        return zlib.decompress(data)
+
+
+class ZstdCompressor:
+    """zstd at a fixed level, optionally primed with a trained dictionary.
+
+    zstd contexts are not thread-safe, so each thread gets its own.
+
+    Attributes:
+    - level (int): zstd compression level (1-22).
+    - dictionary (Optional[str]): Name of the dictionary in the store, if any.
+    """
+    codec_id = CODEC_ZSTD
+
+    def __init__(self, level: int = 3, dictionary: Optional[str] = None,
+        store: Optional[DictionaryStore] = None
+    ) -> None:
+        if dictionary is not None and store is None:
+            raise ValueError('A dictionary store is required to use a dictionary')
+        self.level = level
+        self.dictionary = dictionary
+        self._dict_data = None if dictionary is None else store.load(dictionary)
+        self._local = threading.local()
+
+    def compress(self, data: bytes) -> bytes:
+        compressor = getattr(self._local, 'compressor', None)
+        if compressor is None:
+            compressor = self._local.compressor = zstandard.ZstdCompressor(level=self.level, dict_data=self._dict_data)
+        return compressor.compress(data)
+
+    def decompress(self, data: bytes | memoryview) -> bytes:
+        decompressor = getattr(self._local, 'decompressor', None)
+        if decompressor is None:
+            decompressor = self._local.decompressor = zstandard.ZstdDecompressor(dict_data=self._dict_data)
+        return decompressor.decompress(data)
+
+
+class CompressionRegistry:
+    """Picks the compressor for new messages and finds the one that decodes a given message.
+
+    The dictionary of new messages is resolved once, so a retrained dictionary is picked up by
+    producers on restart; consumers load any version a message names on demand.
+
+    Attributes:
+    - codec_id (str): Compression of new messages, 'zlib' or 'zstd'.
+    - store (Optional[DictionaryStore]): zstd dictionaries; new messages use its latest version.
+    """
+
+    def __init__(self, codec_id: str = CODEC_ZLIB, store: Optional[DictionaryStore] = None) -> None:
+        if codec_id not in (CODEC_ZLIB, CODEC_ZSTD):
+            raise ValueError(f"Unknown compression '{codec_id}'")
+        self.codec_id = codec_id
+        self.store = store
+        self._compressors: dict[tuple[str, Optional[str]], Compressor] = {}
+        self._default: Optional[Compressor] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'CompressionRegistry':
+        """Reads SCRAWLER_HTML_COMPRESSION and SCRAWLER_ZSTD_DICTIONARY_DIR."""
+        codec_id = os.environ.get('SCRAWLER_HTML_COMPRESSION', CODEC_ZLIB)
+        dictionary_dir = os.environ.get('SCRAWLER_ZSTD_DICTIONARY_DIR')
+        return cls(codec_id, DictionaryStore(dictionary_dir) if dictionary_dir else None)
+
+    def default(self) -> Compressor:
+        if self._default is None:
+            dictionary = None
+            if self.codec_id == CODEC_ZSTD and self.store is not None:
+                dictionary = self.store.latest()
+            self._default = self.get(self.codec_id, dictionary)
+        return self._default
+
+    def get(self, codec_id: str, dictionary: Optional[str] = None) -> Compressor:
+        key = (codec_id, dictionary)
+        compressor = self._compressors.get(key)
+        if compressor is not None:
+            return compressor
+        with self._lock:
+            if key not in self._compressors:
+                if codec_id == CODEC_ZLIB:
+                    self._compressors[key] = ZlibCompressor()
+                elif codec_id == CODEC_ZSTD:
+                    self._compressors[key] = ZstdCompressor(dictionary=dictionary, store=self.store)
+                else:
+                    raise ValueError(f"Unknown compression '{codec_id}'")
+            return self._compressors[key]
+
+
+@cache
+def get_compression_registry() -> CompressionRegistry:
+    return CompressionRegistry.from_env()
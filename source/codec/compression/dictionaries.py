@@ -0,0 +1,61 @@
+import os
+import re
+from pathlib import Path
+import zstandard
+
+
+DICTIONARY_SUFFIX = '.zdict'
+_VERSIONED_NAME = re.compile(r'^(?P<prefix>.+)-v(?P<version>\d+)$')
+
+
+class DictionaryStore:
+    """Versioned zstd dictionaries, stored as '<prefix>-v<version>.zdict' files in one directory.
+
+    Dictionaries are never overwritten: retraining adds the next version, and messages record
+    the name of the dictionary they were compressed with, so older messages keep decoding as
+    long as their dictionary file is kept.
+
+    Attributes:
+    - directory (Path): Where the dictionary files live.
+    - prefix (str): Name shared by every version, e.g. 'handshake'.
+    """
+
+    def __init__(self, directory: str | os.PathLike, prefix: str = 'handshake') -> None:
+        self.directory = Path(directory)
+        self.prefix = prefix
+        self._loaded: dict[str, zstandard.ZstdCompressionDict] = {}
+
+    def versions(self) -> list[int]:
+        if not self.directory.is_dir():
+            return []
+        versions = []
+        for path in self.directory.glob(f'*{DICTIONARY_SUFFIX}'):
+            match = _VERSIONED_NAME.match(path.name[:-len(DICTIONARY_SUFFIX)])
+            if match and match['prefix'] == self.prefix:
+                versions.append(int(match['version']))
+        return sorted(versions)
+
+    def name(self, version: int) -> str:
+        return f'{self.prefix}-v{version}'
+
+    def latest(self) -> str | None:
+        """Returns the name of the newest dictionary, or None if none was trained yet."""
+        versions = self.versions()
+        return self.name(versions[-1]) if versions else None
+
+    def load(self, name: str) -> zstandard.ZstdCompressionDict:
+        dictionary = self._loaded.get(name)
+        if dictionary is None:
+            path = self.directory / f'{name}{DICTIONARY_SUFFIX}'
+            if not path.is_file():
+                raise ValueError(f"Unknown zstd dictionary '{name}' (looked in {self.directory})")
+            dictionary = self._loaded[name] = zstandard.ZstdCompressionDict(path.read_bytes())
+        return dictionary
+
+    def save(self, dictionary: zstandard.ZstdCompressionDict) -> str:
+        """Stores a newly trained dictionary as the next version and returns its name."""
+        versions = self.versions()
+        name = self.name(versions[-1] + 1 if versions else 1)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        (self.directory / f'{name}{DICTIONARY_SUFFIX}').write_bytes(dictionary.as_bytes())
+        return name
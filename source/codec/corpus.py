@@ -0,0 +1,117 @@
+import base64
+import os
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Iterable, Iterator, Optional
+from source.broker.interfaces import IPGProtocol
+from source.broker.services.batch import HEADER_BATCH, batch_size, unpack_items
+from source.codec import json_backend
+from source.codec.handshake_extractor_1_codec import HandshakeExtractor1Codec
+from source.codec.handshake_extractor_2_codec import HandshakeExtractor2Codec
+from source.codec.handshake_transformer_1_binary_codec import HandshakeTransformer1BinaryCodec
+from source.codec.handshake_transformer_2_binary_codec import HandshakeTransformer2BinaryCodec
+from source.codec.handshake_loader_1_codec import HandshakeLoader1Codec
+from source.codec.schema_registry import VersionedCodec
+from source.codec.schemas import (
+    EXTRACTOR_1_CODEC,
+    EXTRACTOR_2_CODEC,
+    TRANSFORMER_1_CODEC,
+    TRANSFORMER_2_CODEC,
+    LOADER_1_CODEC
+)
+
+
+# Codecs that can decode each pipeline topic. The first one is the codec the pipeline listens
+# with; a new codec for a topic goes in its list, so the corpus tests prove it loss-free.
+CORPUS_CODECS: dict[str, list[IPGProtocol]] = {
+    HandshakeExtractor1Codec.TOPIC: [EXTRACTOR_1_CODEC, HandshakeExtractor1Codec],
+    HandshakeExtractor2Codec.TOPIC: [EXTRACTOR_2_CODEC, HandshakeExtractor2Codec],
+    HandshakeTransformer1BinaryCodec.TOPIC: [TRANSFORMER_1_CODEC, HandshakeTransformer1BinaryCodec],
+    HandshakeTransformer2BinaryCodec.TOPIC: [TRANSFORMER_2_CODEC, HandshakeTransformer2BinaryCodec],
+    HandshakeLoader1Codec.TOPIC: [LOADER_1_CODEC, HandshakeLoader1Codec],
+}
+
+
+@dataclass(frozen=True)
+class CorpusRecord:
+    """One message captured from a pipeline topic.
+
+    Attributes:
+    - topic (str): Topic the message was read from.
+    - value (bytes): Encoded message, as it was on the topic.
+    - headers (list[tuple[str, bytes]]): Headers of the message.
+    - key (Optional[bytes]): Key of the message.
+    """
+    topic: str
+    value: bytes
+    headers: list[tuple[str, bytes]] = field(default_factory=list)
+    key: Optional[bytes] = None
+
+
+def default_corpus_path() -> str:
+    return os.environ.get('SCRAWLER_CODEC_CORPUS', os.path.join('corpus', 'codec_corpus.jsonl'))
+
+
+def split_batch(record: CorpusRecord) -> list[CorpusRecord]:
+    """Returns the items of a batch record (see BatchCodec) as records of their own."""
+    size = batch_size(record.headers)
+    if size is None:
+        return [record]
+    headers = [(k, v) for k, v in record.headers if k != HEADER_BATCH]
+    return [CorpusRecord(record.topic, item, headers, record.key) for item in unpack_items(record.value)]
+
+
+def _b64(value: bytes) -> str:
+    return base64.b64encode(value).decode('ascii')
+
+
+def write_corpus(path: str, records: Iterable[CorpusRecord]) -> int:
+    """Writes records to path as JSON Lines (values and headers base64 encoded); returns their number."""
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = f'{path}.tmp'
+    n = 0
+    with open(tmp_path, 'wb') as f:
+        for record in records:
+            f.write(json_backend.dumps({
+                'topic': record.topic,
+                'key': None if record.key is None else _b64(record.key),
+                'value': _b64(record.value),
+                'headers': [[k, _b64(v)] for k, v in record.headers],
+            }))
+            f.write(b'\n')
+            n += 1
+    os.replace(tmp_path, path)
+    return n
+
+
+def read_corpus(path: str) -> Iterator[CorpusRecord]:
+    with open(path, 'rb') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            entry = json_backend.loads(line)
+            yield CorpusRecord(
+                topic=entry['topic'],
+                value=base64.b64decode(entry['value']),
+                headers=[(k, base64.b64decode(v)) for k, v in entry['headers']],
+                key=None if entry['key'] is None else base64.b64decode(entry['key'])
+            )
+
+
+def encode(codec: IPGProtocol, message: Any) -> tuple[bytes, list[tuple[str, bytes]]]:
+    """Encodes a message the way the gateway sends it: its value and its headers."""
+    headers = [] if (codec_headers := getattr(codec, 'headers', None)) is None else codec_headers(message)
+    return codec.serialize(message), headers
+
+
+def decode(codec: IPGProtocol, value: bytes, headers: list[tuple[str, bytes]]) -> Any:
+    """Decodes a message the way the gateway receives it."""
+    if getattr(codec, 'headers', None) is None:
+        return codec.deserialize(value)
+    return codec.deserialize(value, headers)
+
+
+def codec_name(codec: IPGProtocol) -> str:
+    if isinstance(codec, VersionedCodec):
+        return f'VersionedCodec({codec.name})'
+    return getattr(codec, '__name__', type(codec).__name__)
@@ -0,0 +1,62 @@
+from typing import Optional
+from source.codec.compression import CODEC_ZLIB, get_compression_registry
+from source.codec.claim_check import CLAIM_CHECK_SHA256, get_claim_check_store, check_in, check_out
+
+
+HEADER_CODEC = 'x-codec'
+HEADER_DICTIONARY = 'x-dictionary'
+HEADER_CLAIM_CHECK = 'x-claim-check'
+HEADER_ACTION = 'x-action'
+HEADER_URL = 'x-url'
+HEADER_CREATED_AT = 'x-created-at'
+
+
+def read_envelope(headers: Optional[list[tuple[str, bytes]]]) -> dict[str, bytes] | None:
+    """Returns the envelope headers of a message, or None if it was not sent as an envelope."""
+    if not headers:
+        return None
+    envelope = dict(headers)
+    if HEADER_CODEC not in envelope:
+        return None
+    return envelope
+
+
+def html_headers() -> list[tuple[str, bytes]]:
+    """Headers describing how encode_html currently encodes: compression and claim check."""
+    compressor = get_compression_registry().default()
+    headers = [(HEADER_CODEC, compressor.codec_id.encode())]
+    if compressor.dictionary is not None:
+        headers.append((HEADER_DICTIONARY, compressor.dictionary.encode()))
+    if get_claim_check_store() is not None:
+        headers.append((HEADER_CLAIM_CHECK, CLAIM_CHECK_SHA256.encode()))
+    return headers
+
+
+def encode_html(html: str) -> bytes:
+    """Compresses html. With SCRAWLER_BLOB_STORE set (claim-check mode), the compressed html is
+    written to the blob store once and only its reference is returned, to be sent instead."""
+    data = get_compression_registry().default().compress(html.encode('utf-8'))
+    if (store := get_claim_check_store()) is not None:
+        return check_in(store, data)
+    return data
+
+
+def decode_html(envelope: dict[str, bytes], value: bytes) -> str:
+    """Decompresses the value of an envelope straight from the message buffer.
+
+    Args:
+    - envelope (dict[str, bytes]): The message's envelope headers.
+    - value (bytes): The message value (the compressed html, or a claim-check reference).
+    """
+    if HEADER_CLAIM_CHECK in envelope:
+        if (store := get_claim_check_store()) is None:
+            raise ValueError('Received a claim-check message, but SCRAWLER_BLOB_STORE is not set')
+        value = check_out(store, value)
+    codec_id = envelope.get(HEADER_CODEC, CODEC_ZLIB.encode()).decode()
+    dictionary = envelope.get(HEADER_DICTIONARY)
+    compressor = get_compression_registry().get(codec_id, None if dictionary is None else dictionary.decode())
+    return compressor.decompress(memoryview(value)).decode('utf-8')
+
+
+def as_text(html: str | bytes) -> str:
+    return html.decode('utf-8') if isinstance(html, bytes) else html
@@ -1,6 +1,6 @@
 from __future__ import annotations
-import json
 from dataclasses import dataclass
+from source.codec import json_backend
 
 
 @dataclass(frozen=True)
@@ -10,6 +10,8 @@ class HandshakeExtractor1Codec:
     start_page: int = 1
     end_page: int = 40
     per_page: int = 50
+    # 'START_EXTRACT' crawls every page of the range; 'START_INCREMENTAL_EXTRACT' stops at the
+    # first page of known jobs (see HandshakeExtractor1.extract_incremental).
     action: str = 'START_EXTRACT'
 
     @property
@@ -23,11 +25,15 @@ class HandshakeExtractor1Codec:
             }
         }
 
+    @classmethod
+    def partition_key(cls, message: HandshakeExtractor1Codec) -> None:
+        return None
+
     @classmethod
     def serialize(cls, message: HandshakeExtractor1Codec) -> bytes:
-        return json.dumps(message.payload).encode()
+        return json_backend.dumps(message.payload)
         
     @classmethod
     def deserialize(cls, message: bytes) -> HandshakeExtractor1Codec:
-        payload = json.loads(message.decode())
+        payload = json_backend.loads(message)
         return cls(action=payload['action'], **payload['params'])
@@ -1,6 +1,6 @@
 from __future__ import annotations
-import json
 from dataclasses import dataclass
+from source.codec import json_backend
 
 
 @dataclass(frozen=True)
@@ -24,11 +24,15 @@ class HandshakeExtractor2Codec:
             }
         }
 
+    @classmethod
+    def partition_key(cls, message: HandshakeExtractor2Codec) -> str:
+        return str(message.job_id)
+
     @classmethod
     def serialize(cls, message: HandshakeExtractor2Codec) -> bytes:
-        return json.dumps(message.payload).encode()
+        return json_backend.dumps(message.payload)
         
     @classmethod
     def deserialize(cls, message: bytes) -> HandshakeExtractor2Codec:
-        payload = json.loads(message.decode())
+        payload = json_backend.loads(message)
         return cls(action=payload['action'], **payload['params'])
@@ -1,12 +1,13 @@
 from __future__ import annotations
 import base64
-import json
 import zlib
 from datetime import datetime
 from dataclasses import dataclass, fields
 from typing import TypedDict, Literal
 from pydantic import TypeAdapter, ValidationError
-from source.utilities import classproperty, as_typed_dict
+from source.codec import json_backend
+from source.utilities import classproperty, as_typed_dict, get_type_adapter, validate_outgoing
+from source.codec.partition_key import job_key_from_url
 
 
 @dataclass(frozen=True)
@@ -38,18 +39,18 @@ class HandshakeLoader1Codec:
             **cls.Props.__annotations__.copy(),
             'topic': Literal['load.handshake.job.v1'],
             'action': Literal['START_LOAD'],
-            'about_codec': Literal['zlib'],
-            'apply_by': str | None,
-            'posted_at': str | None
+            'about_codec': Literal['zlib']
         })
         return serializable_props
     
     @classproperty(cached=True)
-    def serial_props_ta(cls):
-        return TypeAdapter(cls.SerializableProps)
+    def serial_props_ta(cls) -> TypeAdapter:
+        return get_type_adapter(cls.SerializableProps)
       
     @property
-    def compressed_about(self) -> str:
+    def compressed_about(self) -> str | None:
+        if self.about is None:
+            return None
         about_bytes = self.about.encode('utf-8')
         about_compressed_bytes = zlib.compress(about_bytes)
         about_compressed_b64 = base64.b64encode(about_compressed_bytes)
@@ -58,43 +59,43 @@ class HandshakeLoader1Codec:
 
     @property
     def payload(self) -> HandshakeLoader1Codec.SerializableProps:
-        EXCLUDE_KEYS = ['about', 'apply_by', 'posted_at']
+        EXCLUDE_KEYS = ['about']
         serializable_dict = {
             **{field.name: getattr(self, field.name) for field in fields(self) if field.name not in EXCLUDE_KEYS},
             'topic': self.TOPIC,
             'action': self.ACTION,
             'about_codec': 'zlib',
-            'about': self.compressed_about,
-            'apply_by': str(self.apply_by),
-            'posted_at': str(self.posted_at)
+            'about': self.compressed_about
         }
         try:
-            serializable_dict = self.serial_props_ta.validate_python(serializable_dict)
+            # Skipped under trusted_producer(), e.g. when the props came from Stock.collect.
+            serializable_dict = validate_outgoing(self.SerializableProps, serializable_dict)
         except ValidationError:
             print('Unexpected Error: payload could not be coerced to the correct type')
             raise
         return serializable_dict
 
+    @classmethod
+    def partition_key(cls, message: HandshakeLoader1Codec) -> str | None:
+        return job_key_from_url(message.url)
+
     @classmethod
     def serialize(cls, message: HandshakeLoader1Codec) -> bytes:
-        return json.dumps(message.payload).encode('utf-8')
+        return json_backend.dumps(message.payload)
 
     @staticmethod
-    def _decompress_about(serial_props: HandshakeLoader1Codec.SerializableProps) -> str:
-        about_compressed_str = serial_props['about']
+    def _decompress_about(about_compressed_str: str | None) -> str | None:
+        if about_compressed_str is None:
+            return None
         about_compressed_b64 = base64.b64decode(about_compressed_str)
         about_bytes = zlib.decompress(about_compressed_b64)
         about = about_bytes.decode('utf-8')
         return about
-        
-    @staticmethod
-    def _to_datetime(datetime_iso_string: str) -> datetime:
-        return datetime.fromisoformat(datetime_iso_string)
 
     @classmethod
     def deserialize(cls, message: bytes) -> HandshakeLoader1Codec:
-        EXCLUDE_SERIAL_KEYS = ['about_codec', 'about', 'apply_by', 'posted_at']
-        payload = json.loads(message.decode('utf-8'))
+        EXCLUDE_SERIAL_KEYS = ['topic', 'action', 'about_codec', 'about']
+        payload = json_backend.loads(message)
         try: 
             serial_props = cls.serial_props_ta.validate_python(payload)
         except ValidationError:
@@ -102,8 +103,6 @@ class HandshakeLoader1Codec:
             raise
         props: HandshakeLoader1Codec.Props = {
             **{k: v for k, v in serial_props.items() if k not in EXCLUDE_SERIAL_KEYS},
-            'about': cls._decompress_about(serial_props['about']),
-            'apply_by': cls._to_datetime(serial_props['apply_by']),
-            'posted_at': cls._to_datetime(serial_props['posted_at'])
+            'about': cls._decompress_about(serial_props['about'])
         }
-        return cls(props)
+        return cls(**props)
@@ -0,0 +1,53 @@
+from __future__ import annotations
+from dataclasses import dataclass
+from typing import Optional
+from source.codec.handshake_transformer_1_codec import HandshakeTransformer1Codec
+from source.codec.envelope import (
+    HEADER_ACTION,
+    html_headers,
+    read_envelope,
+    encode_html,
+    decode_html,
+    as_text
+)
+
+
+@dataclass(frozen=True)
+class HandshakeTransformer1BinaryCodec:
+    """HandshakeTransformer1Codec as a binary envelope.
+
+    The value is the compressed html, or its claim check (see encode_html), and the metadata
+    travels in Kafka headers, so neither side pays for JSON or base64. Messages sent by
+    HandshakeTransformer1Codec (no headers) still decode, so both can share the topic during
+    a rollout.
+    """
+    TOPIC = HandshakeTransformer1Codec.TOPIC
+
+    html: str
+    action: str = 'START_TRANSFORM'
+
+    @classmethod
+    def partition_key(cls, message: HandshakeTransformer1BinaryCodec) -> None:
+        return None
+
+    @classmethod
+    def headers(cls, message: HandshakeTransformer1BinaryCodec) -> list[tuple[str, bytes]]:
+        return [
+            *html_headers(),
+            (HEADER_ACTION, message.action.encode()),
+        ]
+
+    @classmethod
+    def serialize(cls, message: HandshakeTransformer1BinaryCodec) -> bytes:
+        return encode_html(message.html)
+
+    @classmethod
+    def deserialize(cls, message: bytes, headers: Optional[list[tuple[str, bytes]]] = None) -> HandshakeTransformer1BinaryCodec:
+        envelope = read_envelope(headers)
+        if envelope is None:
+            legacy = HandshakeTransformer1Codec.deserialize(message)
+            return cls(html=as_text(legacy.html), action=legacy.action)
+        return cls(
+            html=decode_html(envelope, message),
+            action=envelope[HEADER_ACTION].decode()
+        )
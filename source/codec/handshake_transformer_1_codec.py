@@ -1,8 +1,8 @@
 from __future__ import annotations
 import base64
-import json
 import zlib
 from dataclasses import dataclass
+from source.codec import json_backend
 
 
 @dataclass(frozen=True)
@@ -26,13 +26,17 @@ class HandshakeTransformer1Codec:
             }
         }
 
+    @classmethod
+    def partition_key(cls, message: HandshakeTransformer1Codec) -> None:
+        return None
+
     @classmethod
     def serialize(cls, message: HandshakeTransformer1Codec) -> bytes:
-        return json.dumps(message.payload).encode('utf-8')
+        return json_backend.dumps(message.payload)
 
     @classmethod
     def deserialize(cls, message: bytes) -> HandshakeTransformer1Codec:
-        payload = json.loads(message.decode('utf-8'))
+        payload = json_backend.loads(message)
         action = payload['action']
         b64_html = payload['params']['b64']
         enc_html = base64.b64decode(b64_html)
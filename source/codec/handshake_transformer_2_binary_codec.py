@@ -0,0 +1,63 @@
+from __future__ import annotations
+from datetime import datetime
+from dataclasses import dataclass, field
+from typing import Optional
+from source.codec.partition_key import job_key_from_url
+from source.codec.handshake_transformer_2_codec import HandshakeTransformer2Codec
+from source.codec.envelope import (
+    HEADER_ACTION,
+    HEADER_URL,
+    HEADER_CREATED_AT,
+    html_headers,
+    read_envelope,
+    encode_html,
+    decode_html,
+    as_text
+)
+
+
+@dataclass(frozen=True)
+class HandshakeTransformer2BinaryCodec:
+    """HandshakeTransformer2Codec as a binary envelope.
+
+    The value is the compressed html, or its claim check (see encode_html), and the metadata
+    travels in Kafka headers, so neither side pays for JSON or base64. Messages sent by
+    HandshakeTransformer2Codec (no headers) still decode, so both can share the topic during
+    a rollout.
+    """
+    TOPIC = HandshakeTransformer2Codec.TOPIC
+
+    url: str
+    html: str
+    created_at: datetime = field(default_factory=datetime.now)
+    action: str = 'START_TRANSFORM'
+
+    @classmethod
+    def partition_key(cls, message: HandshakeTransformer2BinaryCodec) -> str | None:
+        return job_key_from_url(message.url)
+
+    @classmethod
+    def headers(cls, message: HandshakeTransformer2BinaryCodec) -> list[tuple[str, bytes]]:
+        return [
+            *html_headers(),
+            (HEADER_ACTION, message.action.encode()),
+            (HEADER_URL, message.url.encode()),
+            (HEADER_CREATED_AT, message.created_at.isoformat().encode()),
+        ]
+
+    @classmethod
+    def serialize(cls, message: HandshakeTransformer2BinaryCodec) -> bytes:
+        return encode_html(message.html)
+
+    @classmethod
+    def deserialize(cls, message: bytes, headers: Optional[list[tuple[str, bytes]]] = None) -> HandshakeTransformer2BinaryCodec:
+        envelope = read_envelope(headers)
+        if envelope is None:
+            legacy = HandshakeTransformer2Codec.deserialize(message)
+            return cls(url=legacy.url, html=as_text(legacy.html), created_at=legacy.created_at, action=legacy.action)
+        return cls(
+            url=envelope[HEADER_URL].decode(),
+            html=decode_html(envelope, message),
+            created_at=datetime.fromisoformat(envelope[HEADER_CREATED_AT].decode()),
+            action=envelope[HEADER_ACTION].decode()
+        )
@@ -1,9 +1,10 @@
 from __future__ import annotations
 import base64
-import json
 import zlib
 from datetime import datetime
 from dataclasses import dataclass
+from source.codec import json_backend
+from source.codec.partition_key import job_key_from_url
 
 
 @dataclass(frozen=True)
@@ -31,13 +32,17 @@ class HandshakeTransformer2Codec:
             }
         }
 
+    @classmethod
+    def partition_key(cls, message: HandshakeTransformer2Codec) -> str | None:
+        return job_key_from_url(message.url)
+
     @classmethod
     def serialize(cls, message: HandshakeTransformer2Codec) -> bytes:
-        return json.dumps(message.payload).encode('utf-8')
+        return json_backend.dumps(message.payload)
 
     @classmethod
     def deserialize(cls, message: bytes) -> HandshakeTransformer2Codec:
-        payload = json.loads(message.decode('utf-8'))
+        payload = json_backend.loads(message)
         action = payload['action']
         url = payload['params']['url']
         created_at = datetime.fromisoformat(payload['params']['created_at'])
@@ -0,0 +1,95 @@
+import dataclasses
+import json
+import os
+import re
+from datetime import date, datetime
+from typing import Any, Protocol
+
+try:
+    import orjson
+except ImportError: #< optional: the stdlib backend produces the same JSON, only slower
+    orjson = None
+
+
+class JsonBackend(Protocol):
+    name: str
+
+    def dumps(self, obj: Any) -> bytes:
+        ...
+
+    def loads(self, data: bytes | bytearray | memoryview | str) -> Any:
+        ...
+
+
+def _default(obj: Any) -> Any:
+    if isinstance(obj, (datetime, date)):
+        return obj.isoformat()
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    raise TypeError(f'Object of type {type(obj).__name__} is not JSON serializable')
+
+
+class StdlibJsonBackend:
+    """json from the standard library, configured to write what orjson writes."""
+    name = 'stdlib'
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, default=_default, separators=(',', ':'), ensure_ascii=False).encode('utf-8')
+
+    def loads(self, data: bytes | bytearray | memoryview | str) -> Any:
+        if isinstance(data, memoryview):
+            data = bytes(data)
+        return json.loads(data)
+
+
+# orjson reads ints wider than 64 bits as floats; any run of this many digits may be one.
+_LONG_DIGITS = re.compile(rb'\d{19}')
+_LONG_DIGITS_STR = re.compile(r'\d{19}')
+
+
+class OrjsonJsonBackend:
+    """orjson: writes bytes directly, and encodes datetimes and dataclasses natively. What orjson
+    cannot encode or decode exactly (ints wider than 64 bits) goes through the stdlib backend."""
+    name = 'orjson'
+
+    def __init__(self) -> None:
+        self._fallback = StdlibJsonBackend()
+
+    def dumps(self, obj: Any) -> bytes:
+        try:
+            # Like json, writes int, float, bool and None dict keys as strings.
+            return orjson.dumps(obj, default=_default, option=orjson.OPT_NON_STR_KEYS)
+        except TypeError:
+            return self._fallback.dumps(obj)
+
+    def loads(self, data: bytes | bytearray | memoryview | str) -> Any:
+        if (_LONG_DIGITS_STR if isinstance(data, str) else _LONG_DIGITS).search(data) is not None:
+            return self._fallback.loads(data)
+        return orjson.loads(data)
+
+
+JSON_BACKENDS: dict[str, type[JsonBackend]] = {'stdlib': StdlibJsonBackend}
+if orjson is not None:
+    JSON_BACKENDS['orjson'] = OrjsonJsonBackend
+
+_backend: JsonBackend = JSON_BACKENDS[os.environ.get('SCRAWLER_JSON_BACKEND', 'orjson' if orjson else 'stdlib')]()
+
+
+def get_json_backend() -> JsonBackend:
+    return _backend
+
+
+def set_json_backend(name: str) -> None:
+    """Switches every JSON codec to another backend (e.g. to benchmark them against each other)."""
+    global _backend
+    if name not in JSON_BACKENDS:
+        raise ValueError(f"Unavailable JSON backend '{name}' (available: {', '.join(JSON_BACKENDS)})")
+    _backend = JSON_BACKENDS[name]()
+
+
+def dumps(obj: Any) -> bytes:
+    return _backend.dumps(obj)
+
+
+def loads(data: bytes | bytearray | memoryview | str) -> Any:
+    return _backend.loads(data)
@@ -1,7 +1,7 @@
 from __future__ import annotations
-import json
 from dataclasses import dataclass
 from typing import Any
+from source.codec import json_backend
 
 
 @dataclass(frozen=True)
@@ -9,10 +9,14 @@ class JsonCodec:
     
     payload: Any
 
+    @classmethod
+    def partition_key(cls, message: JsonCodec) -> None:
+        return None
+
     @classmethod
     def serialize(cls, message: JsonCodec) -> bytes:
-        return json.dumps(message.payload).encode('utf-8')
+        return json_backend.dumps(message.payload)
     
     @classmethod
     def deserialize(cls, message: bytes) -> JsonCodec:
-        return cls(json.loads(message.decode('utf-8')))
\ No newline at end of file
+        return cls(json_backend.loads(message))
\ No newline at end of file
@@ -0,0 +1,13 @@
+import re
+
+
+JOB_ID_PATTERN = re.compile(r'/jobs/(\d+)')
+
+
+def job_key_from_url(url: str | None) -> str | None:
+    """Returns the job id in a Handshake job url, falling back to the url itself."""
+    if url is None:
+        return None
+    if (match := JOB_ID_PATTERN.search(url)):
+        return match.group(1)
+    return url
\ No newline at end of file
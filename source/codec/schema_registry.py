@@ -0,0 +1,156 @@
+from dataclasses import dataclass
+from typing import Any, Callable, Optional
+from source.broker.interfaces import IPGProtocol
+
+
+HEADER_SCHEMA = 'x-schema'
+HEADER_SCHEMA_VERSION = 'x-schema-version'
+HEADER_CONTENT_TYPE = 'content-type'
+
+CONTENT_TYPE_JSON = 'application/json'
+CONTENT_TYPE_BINARY = 'application/octet-stream'
+
+
+@dataclass(frozen=True)
+class SchemaVersion:
+    """One version of a schema.
+
+    Attributes:
+    - codec (IPGProtocol): Encodes and decodes messages of this version.
+    - content_type (str): Content type of the encoded value.
+    - upgrade (Optional[Callable[[Any], Any]]): Converts a message of this version into a message
+        of the next version. Required for every version but the latest.
+    """
+    codec: IPGProtocol
+    content_type: str = CONTENT_TYPE_JSON
+    upgrade: Optional[Callable[[Any], Any]] = None
+
+
+class SchemaRegistry:
+    """Codecs keyed by (schema name, version), so old and new message shapes decode side by side.
+
+    Producers always encode the latest version of a schema and name it in the message headers.
+    Consumers look the decoder up from those headers (no trial parsing) and upgrade the decoded
+    message version by version until it has the latest shape. Stages can therefore be redeployed
+    one at a time: deploy consumers that know the new version (with an upgrade from the old one)
+    first, then producers.
+    """
+
+    def __init__(self) -> None:
+        self._schemas: dict[str, dict[int, SchemaVersion]] = {}
+
+    def register(self, name: str, version: int, codec: IPGProtocol,
+        content_type: str = CONTENT_TYPE_JSON, upgrade: Optional[Callable[[Any], Any]] = None
+    ) -> None:
+        versions = self._schemas.setdefault(name, {})
+        if version in versions:
+            raise ValueError(f"Schema '{name}' v{version} is already registered")
+        versions[version] = SchemaVersion(codec, content_type, upgrade)
+
+    def versions(self, name: str) -> dict[int, SchemaVersion]:
+        try:
+            return self._schemas[name]
+        except KeyError:
+            raise ValueError(f"Unknown schema '{name}'") from None
+
+    def latest_version(self, name: str) -> int:
+        return max(self.versions(name))
+
+    def get(self, name: str, version: int) -> SchemaVersion:
+        try:
+            return self.versions(name)[version]
+        except KeyError:
+            raise ValueError(f"Unknown schema version '{name}' v{version}") from None
+
+    def upgrade(self, name: str, version: int, message: Any) -> Any:
+        """Upgrades a message of the given version to the latest version of its schema."""
+        latest = self.latest_version(name)
+        while version < latest:
+            upgrade = self.get(name, version).upgrade
+            if upgrade is None:
+                raise ValueError(f"Schema '{name}' v{version} has no upgrade to v{version + 1}")
+            message = upgrade(message)
+            version += 1
+        return message
+
+    def codec(self, name: str, legacy_version: int = 1) -> 'VersionedCodec':
+        """Returns the codec to send and listen with for a schema.
+
+        Args:
+        - name (str): Name of the schema.
+        - legacy_version (int): Version assumed for messages without schema headers.
+        """
+        return VersionedCodec(self, name, legacy_version)
+
+
+class VersionedCodec:
+    """Encodes the latest version of a schema and decodes (and upgrades) any registered version.
+
+    Attributes:
+    - registry (SchemaRegistry): Where the schema's versions are registered.
+    - name (str): Name of the schema.
+    - legacy_version (int): Version assumed for messages without schema headers.
+    """
+
+    def __init__(self, registry: SchemaRegistry, name: str, legacy_version: int = 1) -> None:
+        self.registry = registry
+        self.name = name
+        self.legacy_version = legacy_version
+
+    @property
+    def latest(self) -> SchemaVersion:
+        return self.registry.get(self.name, self.registry.latest_version(self.name))
+
+    @property
+    def TOPIC(self) -> Optional[str]:
+        return getattr(self.latest.codec, 'TOPIC', None)
+
+    def record_headers(self) -> Optional[list[tuple[str, bytes]]]:
+        """Headers shared by every message of the latest version, or None if the codec adds its own."""
+        latest = self.latest
+        if getattr(latest.codec, 'headers', None) is not None:
+            return None
+        return self._schema_headers(latest)
+
+    def _schema_headers(self, schema_version: SchemaVersion) -> list[tuple[str, bytes]]:
+        return [
+            (HEADER_SCHEMA, self.name.encode()),
+            (HEADER_SCHEMA_VERSION, str(self.registry.latest_version(self.name)).encode()),
+            (HEADER_CONTENT_TYPE, schema_version.content_type.encode()),
+        ]
+
+    def partition_key(self, message: Any) -> Optional[str]:
+        if (partition_key := getattr(self.latest.codec, 'partition_key', None)) is None:
+            return None
+        return partition_key(message)
+
+    def headers(self, message: Any) -> list[tuple[str, bytes]]:
+        latest = self.latest
+        headers = self._schema_headers(latest)
+        if (codec_headers := getattr(latest.codec, 'headers', None)) is not None:
+            headers += codec_headers(message)
+        return headers
+
+    def serialize(self, message: Any) -> bytes:
+        return self.latest.codec.serialize(message)
+
+    def deserialize(self, value: bytes, headers: Optional[list[tuple[str, bytes]]] = None) -> Any:
+        name, version, content_type = self.name, self.legacy_version, None
+        for key, header in headers or []:
+            if key == HEADER_SCHEMA:
+                name = header.decode()
+            elif key == HEADER_SCHEMA_VERSION:
+                version = int(header)
+            elif key == HEADER_CONTENT_TYPE:
+                content_type = header.decode()
+        if name != self.name:
+            raise ValueError(f"Expected a '{self.name}' message, got '{name}'")
+        schema_version = self.registry.get(name, version)
+        if content_type is not None and content_type != schema_version.content_type:
+            raise ValueError(f"'{name}' v{version} is {schema_version.content_type}, got {content_type}")
+        codec = schema_version.codec
+        if getattr(codec, 'headers', None) is None:
+            message = codec.deserialize(value)
+        else:
+            message = codec.deserialize(value, headers)
+        return self.registry.upgrade(name, version, message)
@@ -0,0 +1,22 @@
+from source.codec.schema_registry import SchemaRegistry, CONTENT_TYPE_BINARY
+from source.codec.handshake_extractor_1_codec import HandshakeExtractor1Codec
+from source.codec.handshake_extractor_2_codec import HandshakeExtractor2Codec
+from source.codec.handshake_transformer_1_binary_codec import HandshakeTransformer1BinaryCodec
+from source.codec.handshake_transformer_2_binary_codec import HandshakeTransformer2BinaryCodec
+from source.codec.handshake_loader_1_codec import HandshakeLoader1Codec
+
+
+# Schemas of the Handshake ETL pipeline. To change a message shape, register the new codec as the
+# next version with an upgrade from the current one, deploy the consumers, then the producers.
+SCHEMA_REGISTRY = SchemaRegistry()
+SCHEMA_REGISTRY.register('handshake.extractor1', 1, HandshakeExtractor1Codec)
+SCHEMA_REGISTRY.register('handshake.extractor2', 1, HandshakeExtractor2Codec)
+SCHEMA_REGISTRY.register('handshake.transformer1', 1, HandshakeTransformer1BinaryCodec, CONTENT_TYPE_BINARY)
+SCHEMA_REGISTRY.register('handshake.transformer2', 1, HandshakeTransformer2BinaryCodec, CONTENT_TYPE_BINARY)
+SCHEMA_REGISTRY.register('handshake.loader1', 1, HandshakeLoader1Codec)
+
+EXTRACTOR_1_CODEC = SCHEMA_REGISTRY.codec('handshake.extractor1')
+EXTRACTOR_2_CODEC = SCHEMA_REGISTRY.codec('handshake.extractor2')
+TRANSFORMER_1_CODEC = SCHEMA_REGISTRY.codec('handshake.transformer1')
+TRANSFORMER_2_CODEC = SCHEMA_REGISTRY.codec('handshake.transformer2')
+LOADER_1_CODEC = SCHEMA_REGISTRY.codec('handshake.loader1')
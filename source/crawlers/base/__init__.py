@@ -1,4 +1,7 @@
 from .crawler_factory import CrawlerFactory, CrawlerFactoryConfig
+from .crawler_pool import CrawlerPool, CrawlerLease, PoolStats, EventLoopThread, get_browser_loop
+from .http_fetcher import HttpFetcher, FetchResult, cookies_from_storage_state
+from .resource_blocking import ResourceBlocker, ResourceBlockingConfig, RoutingStats, TRACKER_DOMAINS
 
 
-__all__ = ['CrawlerFactory', 'CrawlerFactoryConfig']
\ No newline at end of file
+__all__ = ['CrawlerFactory', 'CrawlerFactoryConfig', 'CrawlerPool', 'CrawlerLease', 'PoolStats', 'EventLoopThread', 'get_browser_loop', 'HttpFetcher', 'FetchResult', 'cookies_from_storage_state', 'ResourceBlocker', 'ResourceBlockingConfig', 'RoutingStats', 'TRACKER_DOMAINS']
\ No newline at end of file
@@ -0,0 +1,274 @@
+import asyncio
+import os
+import threading
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Awaitable, Optional, TypeVar
+import psutil
+from crawl4ai import AsyncWebCrawler
+from source.crawlers.base.crawler_factory import CrawlerFactory
+
+
+T = TypeVar('T')
+
+
+class EventLoopThread:
+    """Runs an asyncio event loop in a daemon thread, so browsers outlive their callers' loops.
+
+    Playwright objects belong to the loop that created them. Every coroutine that touches a
+    pooled crawler must therefore run on this loop: use run from synchronous code and call from
+    coroutines running on another loop (e.g. under asyncio.run).
+    """
+
+    def __init__(self, name: str = 'browser-loop') -> None:
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, name=name, daemon=True)
+        self._thread.start()
+
+    def is_current(self) -> bool:
+        try:
+            return asyncio.get_running_loop() is self.loop
+        except RuntimeError:
+            return False
+
+    def run(self, coro: Awaitable[T]) -> T:
+        """Runs a coroutine on the loop and blocks until it is done."""
+        if self.is_current():
+            raise RuntimeError('EventLoopThread.run would block its own loop; await the coroutine instead')
+        return asyncio.run_coroutine_threadsafe(coro, self.loop).result()
+
+    async def call(self, coro: Awaitable[T]) -> T:
+        """Awaits a coroutine on the loop, from any loop."""
+        if self.is_current():
+            return await coro
+        return await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(coro, self.loop))
+
+    def close(self) -> None:
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self._thread.join()
+
+
+_browser_loop: Optional[EventLoopThread] = None
+_browser_loop_pid: Optional[int] = None
+_browser_loop_lock = threading.Lock()
+
+
+def get_browser_loop() -> EventLoopThread:
+    """The loop shared by every crawler pool of the process.
+
+    It is started on first use, in the process that uses it: a forked child does not inherit
+    its parent's loop thread, so it starts a loop of its own.
+    """
+    global _browser_loop, _browser_loop_pid
+    with _browser_loop_lock:
+        if _browser_loop is None or _browser_loop_pid != os.getpid():
+            _browser_loop = EventLoopThread()
+            _browser_loop_pid = os.getpid()
+        return _browser_loop
+
+
+def _forget_browser_loop() -> None:
+    global _browser_loop, _browser_loop_pid, _browser_loop_lock
+    _browser_loop, _browser_loop_pid = None, None
+    _browser_loop_lock = threading.Lock() #< may have been held by another thread at fork
+
+
+os.register_at_fork(after_in_child=_forget_browser_loop)
+
+
+def browser_rss_mb() -> float:
+    """Resident memory of this process's children (the browsers and their drivers), in MiB."""
+    total = 0
+    for child in psutil.Process().children(recursive=True):
+        try:
+            total += child.memory_info().rss
+        except psutil.Error:
+            continue #< exited in the meantime
+    return total / 2**20
+
+
+@dataclass(frozen=True)
+class PoolStats:
+    """A snapshot of a crawler pool.
+
+    Attributes:
+    - size (int): Crawlers the pool may hold.
+    - started (int): Crawlers running (idle or leased).
+    - leased (int): Crawlers lent out.
+    - waiting (int): Crawls waiting for a lease.
+    - leases (int): Leases granted so far.
+    - pages (int): Pages crawled so far.
+    - cold_starts (int): Crawlers started so far.
+    - recycles (int): Crawlers closed for exceeding max_pages or max_rss_mb, or after invalidate.
+    - rss_mb (float): Resident memory of the process's browsers, in MiB.
+    """
+    size: int
+    started: int
+    leased: int
+    waiting: int
+    leases: int
+    pages: int
+    cold_starts: int
+    recycles: int
+    rss_mb: float
+
+    @property
+    def utilization(self) -> float:
+        return self.leased / self.size
+
+
+class CrawlerLease:
+    """A pooled crawler lent to one crawl. Pages crawled through it count toward its recycling.
+
+    Attributes:
+    - crawler (AsyncWebCrawler): The started crawler.
+    - pages (int): Pages crawled during the lease.
+    """
+
+    def __init__(self, crawler: AsyncWebCrawler) -> None:
+        self.crawler = crawler
+        self.pages = 0
+
+    async def arun(self, url: str, config: Any = None, **kwargs) -> Any:
+        self.pages += 1
+        return await self.crawler.arun(url=url, config=config, **kwargs)
+
+    async def arun_many(self, urls: list[str], config: Any = None, dispatcher: Any = None, **kwargs) -> Any:
+        self.pages += len(urls)
+        return await self.crawler.arun_many(urls, config, dispatcher, **kwargs)
+
+
+class _PooledCrawler:
+
+    def __init__(self, crawler: AsyncWebCrawler, generation: int) -> None:
+        self.crawler = crawler
+        self.generation = generation
+        self.pages = 0
+
+
+class CrawlerPool:
+    """Keeps crawlers of one factory started between crawls, so batches skip browser cold starts.
+
+    A started crawler keeps its browser and its browser context, and with them the storage state
+    (cookies) it was created with. Crawlers are created on demand, up to size, and recycled
+    (closed, then replaced on the next lease) after max_pages pages, when the browsers' resident
+    memory exceeds max_rss_mb, or after invalidate, e.g. once the session storage changed.
+
+    Leases must be taken on the pool's loop (see EventLoopThread).
+
+    Attributes:
+    - factory (CrawlerFactory): Creates the pooled crawlers.
+    - size (int): Maximum number of crawlers; more concurrent leases wait.
+    - max_pages (int): Pages a crawler serves before it is recycled.
+    - max_rss_mb (Optional[float]): Browser memory above which a returned crawler is recycled.
+    - loop (EventLoopThread): Loop the crawlers run on. Defaults to the process's browser loop,
+        resolved on first use, so building a pool starts no thread.
+    """
+
+    def __init__(self, factory: CrawlerFactory, size: int = 1, max_pages: int = 500,
+        max_rss_mb: Optional[float] = None, loop: Optional[EventLoopThread] = None
+    ) -> None:
+        if size < 1:
+            raise ValueError('size must be at least 1')
+        self.factory = factory
+        self.size = size
+        self.max_pages = max_pages
+        self.max_rss_mb = max_rss_mb
+        self._loop = loop
+        self._slots = asyncio.Semaphore(size)
+        self._idle: list[_PooledCrawler] = []
+        self._generation = 0
+        self._started = 0
+        self._leased = 0
+        self._waiting = 0
+        self._leases = 0
+        self._pages = 0
+        self._cold_starts = 0
+        self._recycles = 0
+
+    @property
+    def loop(self) -> EventLoopThread:
+        return self._loop or get_browser_loop()
+
+    @asynccontextmanager
+    async def lease(self) -> AsyncIterator[CrawlerLease]:
+        if not self.loop.is_current():
+            raise RuntimeError('Crawlers must be leased on the pool loop (see EventLoopThread.run and call)')
+        self._waiting += 1
+        try:
+            await self._slots.acquire()
+        finally:
+            self._waiting -= 1
+        try:
+            pooled = await self._checkout()
+        except BaseException:
+            self._slots.release()
+            raise
+        self._leased += 1
+        self._leases += 1
+        lease = CrawlerLease(pooled.crawler)
+        try:
+            yield lease
+        finally:
+            self._leased -= 1
+            pooled.pages += lease.pages
+            self._pages += lease.pages
+            try:
+                await self._checkin(pooled)
+            finally:
+                self._slots.release()
+
+    async def _checkout(self) -> _PooledCrawler:
+        while self._idle:
+            pooled = self._idle.pop()
+            if pooled.generation == self._generation:
+                return pooled
+            await self._recycle(pooled)
+        crawler = self.factory.create_crawler()
+        await crawler.start()
+        self._started += 1
+        self._cold_starts += 1
+        return _PooledCrawler(crawler, self._generation)
+
+    async def _checkin(self, pooled: _PooledCrawler) -> None:
+        if (pooled.generation != self._generation
+            or pooled.pages >= self.max_pages
+            or (self.max_rss_mb is not None and browser_rss_mb() >= self.max_rss_mb)
+        ):
+            await self._recycle(pooled)
+        else:
+            self._idle.append(pooled)
+
+    async def _recycle(self, pooled: _PooledCrawler) -> None:
+        self._recycles += 1
+        await self._close(pooled)
+
+    async def _close(self, pooled: _PooledCrawler) -> None:
+        self._started -= 1
+        try:
+            await pooled.crawler.close()
+        except Exception as e:
+            print(f'Failed to close a pooled crawler: {e}')
+
+    def invalidate(self) -> None:
+        """Recycles every crawler started so far: idle ones on the next lease, leased ones on return."""
+        self._generation += 1
+
+    def stats(self) -> PoolStats:
+        return PoolStats(
+            size=self.size,
+            started=self._started,
+            leased=self._leased,
+            waiting=self._waiting,
+            leases=self._leases,
+            pages=self._pages,
+            cold_starts=self._cold_starts,
+            recycles=self._recycles,
+            rss_mb=browser_rss_mb()
+        )
+
+    async def close(self) -> None:
+        """Closes the idle crawlers. Leased crawlers are closed when they are returned."""
+        self.invalidate()
+        while self._idle:
+            await self._close(self._idle.pop())
@@ -0,0 +1,133 @@
+import asyncio
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Optional
+import httpx
+from source.utilities import async_exponential_backoff_with_jitter
+
+
+DEFAULT_HEADERS = {
+    'User-Agent': (
+        'Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 (KHTML, like Gecko) '
+        'Chrome/139.0.0.0 Safari/537.36'
+    ),
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.9',
+}
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+
+def cookies_from_storage_state(storage_state: str) -> httpx.Cookies:
+    """Loads the cookies of a Playwright storage state file (missing or empty files hold none)."""
+    cookies = httpx.Cookies()
+    try:
+        state = json.loads(Path(storage_state).read_text())
+    except (OSError, ValueError):
+        return cookies
+    for cookie in state.get('cookies', []):
+        cookies.set(cookie['name'], cookie['value'], domain=cookie.get('domain', ''), path=cookie.get('path', '/'))
+    return cookies
+
+
+@dataclass(frozen=True)
+class FetchResult:
+    """A page fetched over HTTP.
+
+    Attributes:
+    - url (str): Requested URL.
+    - status_code (int): Final HTTP status, or 0 if the request failed.
+    - html (str): Body of the final response.
+    - redirected_url (Optional[str]): Final URL, if the request was redirected.
+    - error_message (str): Why the request failed, if it did.
+    """
+    url: str
+    status_code: int
+    html: str = ''
+    redirected_url: Optional[str] = None
+    error_message: str = ''
+
+    @property
+    def success(self) -> bool:
+        return self.status_code == 200
+
+
+class HttpFetcher:
+    """Fetches pages with a pooled async HTTP client and the cookies of a browser session.
+
+    The cookies are read from a Playwright storage state file (the file the login crawler
+    saves), and reloaded whenever the file changes. Throttled and failed requests are retried
+    with exponential backoff. The client belongs to the event loop it was first used on.
+
+    Attributes:
+    - storage_state (str): Storage state file the cookies are read from.
+    - max_connections (int): Concurrent requests.
+    - timeout (float): Seconds per request.
+    - max_retries (int): Attempts per page.
+    - client_kwargs (dict[str, Any]): Extra httpx.AsyncClient arguments.
+    """
+
+    def __init__(self, storage_state: str, max_connections: int = 10, timeout: float = 15.0,
+        max_retries: int = 3, **client_kwargs: Any
+    ) -> None:
+        self.storage_state = storage_state
+        self.max_connections = max_connections
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.client_kwargs = client_kwargs
+        self._client: Optional[httpx.AsyncClient] = None
+        self._storage_mtime: Optional[int] = None
+
+    def _get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                headers=DEFAULT_HEADERS,
+                follow_redirects=True,
+                timeout=self.timeout,
+                limits=httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=self.max_connections),
+                http2=True,
+                **self.client_kwargs
+            )
+        try:
+            mtime = os.stat(self.storage_state).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime != self._storage_mtime:
+            self._storage_mtime = mtime
+            self._client.cookies = cookies_from_storage_state(self.storage_state)
+        return self._client
+
+    async def fetch(self, url: str) -> FetchResult:
+        client = self._get_client()
+
+        @async_exponential_backoff_with_jitter(max_retries=self.max_retries, base_delay=1, max_delay=10)
+        async def get() -> httpx.Response:
+            response = await client.get(url)
+            if response.status_code in RETRY_STATUS_CODES:
+                raise httpx.HTTPStatusError(f'HTTP {response.status_code}', request=response.request, response=response)
+            return response
+
+        try:
+            response = await get()
+        except httpx.HTTPError as e:
+            status_code = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else 0
+            return FetchResult(url, status_code, error_message=str(e))
+        redirected_url = str(response.url) if response.history else None
+        return FetchResult(url, response.status_code, response.text, redirected_url)
+
+    async def fetch_many(self, urls: list[str]) -> AsyncIterator[FetchResult]:
+        """Fetches urls concurrently (up to max_connections) and yields them as they complete."""
+        semaphore = asyncio.Semaphore(self.max_connections)
+
+        async def fetch(url: str) -> FetchResult:
+            async with semaphore:
+                return await self.fetch(url)
+
+        for task in asyncio.as_completed([fetch(url) for url in urls]):
+            yield await task
+
+    async def aclose(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
@@ -0,0 +1,131 @@
+import re
+from dataclasses import dataclass, field
+from typing import Any, Optional
+from urllib.parse import urlparse
+from playwright.async_api import Page, BrowserContext, Route, Request
+from source.crawlers.base.types import OnPageContextProtocol
+
+
+# Analytics, advertising and session-replay hosts: never needed to render page content.
+TRACKER_DOMAINS = frozenset({
+    'google-analytics.com', 'googletagmanager.com', 'doubleclick.net', 'googlesyndication.com',
+    'segment.io', 'segment.com', 'hotjar.com', 'fullstory.com', 'heap.io', 'heapanalytics.com',
+    'mixpanel.com', 'amplitude.com', 'facebook.net', 'bat.bing.com', 'ads.linkedin.com',
+    'ads-twitter.com', 'intercom.io', 'intercomcdn.com', 'sentry.io',
+    'browser-intake-datadoghq.com', 'newrelic.com', 'nr-data.net', 'optimizely.com', 'qualtrics.com',
+})
+
+
+def _matches_domain(host: str, domains: frozenset[str]) -> bool:
+    return any(host == domain or host.endswith(f'.{domain}') for domain in domains)
+
+
+@dataclass(frozen=True)
+class ResourceBlockingConfig:
+    """Which requests a crawler page aborts.
+
+    Attributes:
+    - blocked_resource_types (frozenset[str]): Playwright resource types to abort (e.g. 'image',
+        'media', 'font', 'stylesheet'). Documents are never blocked.
+    - blocked_domains (frozenset[str]): Hosts (and their subdomains) to abort.
+    - block_third_party (bool): Abort every host outside first_party_domains.
+    - first_party_domains (frozenset[str]): Hosts the page belongs to.
+    - allowed_url_patterns (tuple[str, ...]): Regular expressions of URLs never blocked, whatever
+        the rules above say (e.g. an image the page needs to render).
+    """
+    blocked_resource_types: frozenset[str] = frozenset({'image', 'media', 'font'})
+    blocked_domains: frozenset[str] = TRACKER_DOMAINS
+    block_third_party: bool = False
+    first_party_domains: frozenset[str] = frozenset()
+    allowed_url_patterns: tuple[str, ...] = ()
+
+    def __post_init__(self):
+        if self.block_third_party and not self.first_party_domains:
+            raise ValueError('block_third_party needs first_party_domains')
+
+    def block_reason(self, url: str, resource_type: str) -> Optional[str]:
+        """Returns why a request is blocked (its resource type, 'domain' or 'third-party'), or None."""
+        if resource_type == 'document' or any(re.search(pattern, url) for pattern in self.allowed_url_patterns):
+            return None
+        if resource_type in self.blocked_resource_types:
+            return resource_type
+        host = urlparse(url).hostname or ''
+        if _matches_domain(host, self.blocked_domains):
+            return 'domain'
+        if self.block_third_party and not _matches_domain(host, self.first_party_domains):
+            return 'third-party'
+        return None
+
+
+@dataclass
+class RoutingStats:
+    """Requests of the pages routed since the last pop_stats.
+
+    Attributes:
+    - allowed_requests (int): Requests let through.
+    - allowed_bytes (int): Bytes received for them (headers and bodies).
+    - blocked_requests (int): Requests aborted before anything was downloaded.
+    - blocked_by_reason (dict[str, int]): Aborted requests per resource type, 'domain' or 'third-party'.
+    """
+    allowed_requests: int = 0
+    allowed_bytes: int = 0
+    blocked_requests: int = 0
+    blocked_by_reason: dict[str, int] = field(default_factory=dict)
+
+    def __str__(self) -> str:
+        reasons = ', '.join(f'{reason}: {n}' for reason, n in sorted(self.blocked_by_reason.items()))
+        return (
+            f'{self.allowed_requests} requests allowed ({self.allowed_bytes / 2**20:.1f} MiB), '
+            f'{self.blocked_requests} blocked ({reasons or "none"})'
+        )
+
+
+class ResourceBlocker:
+    """Routes every request of a crawler's pages, aborting those its config blocks.
+
+    Use hook() as the crawler's on_page_context_created hook: routes are set on each page before
+    it navigates. Blocked requests are aborted before anything is downloaded, so only their
+    number is known; allowed requests are counted with the bytes they received.
+
+    Attributes:
+    - config (ResourceBlockingConfig): Which requests to block.
+    """
+
+    def __init__(self, config: ResourceBlockingConfig = ResourceBlockingConfig()) -> None:
+        self.config = config
+        self._stats = RoutingStats()
+
+    def hook(self) -> OnPageContextProtocol:
+
+        async def on_page_context_created(page: Page, context: BrowserContext, **kwargs: Any):
+            _ = context, kwargs
+            await self.attach(page)
+            return page
+
+        return on_page_context_created
+
+    async def attach(self, page: Page) -> None:
+        await page.route('**/*', self.route)
+        page.on('requestfinished', self._on_request_finished)
+
+    async def route(self, route: Route, request: Request) -> None:
+        reason = self.config.block_reason(request.url, request.resource_type)
+        if reason is None:
+            await route.continue_()
+            return
+        self._stats.blocked_requests += 1
+        self._stats.blocked_by_reason[reason] = self._stats.blocked_by_reason.get(reason, 0) + 1
+        await route.abort('blockedbyclient')
+
+    async def _on_request_finished(self, request: Request) -> None:
+        self._stats.allowed_requests += 1
+        try:
+            sizes = await request.sizes()
+        except Exception:
+            return #< the page closed before the sizes were read
+        self._stats.allowed_bytes += sizes['responseHeadersSize'] + sizes['responseBodySize']
+
+    def pop_stats(self) -> RoutingStats:
+        """Returns the stats since the last call (e.g. of one crawl) and starts counting anew."""
+        stats, self._stats = self._stats, RoutingStats()
+        return stats
@@ -1,2 +1,4 @@
 from .warehouse import *
-from .data_lake import *
\ No newline at end of file
+from .data_lake import *
+from .blob_store import *
+from .frontier import *
\ No newline at end of file
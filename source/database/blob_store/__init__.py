@@ -0,0 +1,6 @@
+from .blob_store import BlobStore, blob_digest
+from .filesystem_blob_store import FileSystemBlobStore
+from .gridfs_blob_store import GridFSBlobStore
+
+
+__all__ = ['BlobStore', 'blob_digest', 'FileSystemBlobStore', 'GridFSBlobStore']
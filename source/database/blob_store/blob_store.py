@@ -0,0 +1,19 @@
+import hashlib
+from typing import Protocol
+
+
+class BlobStore(Protocol):
+    """Content-addressed storage: blobs are keyed by the hex SHA-256 of their bytes."""
+
+    def put(self, data: bytes) -> str:
+        """Stores data unless a blob with the same digest exists, and returns the digest."""
+        ...
+
+    def get(self, digest: str) -> bytes:
+        """Returns the blob with the given digest; raises KeyError if there is none."""
+        ...
+
+
+def blob_digest(data: bytes | memoryview) -> str:
+    return hashlib.sha256(data).hexdigest()
+
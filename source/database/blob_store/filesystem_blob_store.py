@@ -0,0 +1,43 @@
+import os
+import tempfile
+from pathlib import Path
+from source.database.blob_store.blob_store import blob_digest
+
+
+class FileSystemBlobStore:
+    """Stores blobs as files named by their digest, under two levels of fan-out directories.
+
+    Writes go to a temporary file that is renamed into place, so readers never see a partial
+    blob and concurrent writers of the same blob are harmless.
+
+    Attributes:
+    - root (Path): Directory of the store.
+    """
+
+    def __init__(self, root: str | os.PathLike) -> None:
+        self.root = Path(root)
+
+    def _path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest[2:4] / digest
+
+    def put(self, data: bytes) -> str:
+        digest = blob_digest(data)
+        path = self._path(digest)
+        if path.exists():
+            return digest
+        path.parent.mkdir(parents=True, exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=path.parent, prefix=f'.{digest[:8]}-')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        try:
+            return self._path(digest).read_bytes()
+        except FileNotFoundError:
+            raise KeyError(f"Blob '{digest}' not found in {self.root}") from None
@@ -0,0 +1,50 @@
+import threading
+from gridfs import GridFSBucket, NoFile
+from source.database.data_lake.connections import MongoConnection
+from source.database.blob_store.blob_store import blob_digest
+
+
+class GridFSBlobStore:
+    """Stores blobs in a GridFS bucket, using the digest as the file name.
+
+    Files get GridFS' own ids, so two writers racing on the same blob add a redundant revision
+    instead of conflicting on (and aborting) each other's chunks.
+
+    Attributes:
+    - conn (MongoConnection): Connection to the data lake; connected on first use.
+    - bucket_name (str): Name of the GridFS bucket.
+    """
+
+    def __init__(self, conn: MongoConnection | None = None, bucket_name: str = 'blobs') -> None:
+        self.conn = conn or MongoConnection()
+        self.bucket_name = bucket_name
+        self._bucket: GridFSBucket | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def bucket(self) -> GridFSBucket:
+        if self._bucket is None:
+            with self._lock:
+                if self._bucket is None:
+                    self.conn.connect()
+                    self._bucket = GridFSBucket(self.conn.get_database(), bucket_name=self.bucket_name)
+        return self._bucket
+
+    def put(self, data: bytes) -> str:
+        digest = blob_digest(data)
+        bucket = self.bucket
+        files = self.conn.get_collection(f'{self.bucket_name}.files')
+        if files.find_one({'filename': digest}, {'_id': 1}) is None:
+            bucket.upload_from_stream(digest, data)
+        return digest
+
+    def get(self, digest: str) -> bytes:
+        try:
+            with self.bucket.open_download_stream_by_name(digest) as stream:
+                return stream.read()
+        except NoFile:
+            raise KeyError(f"Blob '{digest}' not found in GridFS bucket '{self.bucket_name}'") from None
+
+    def close(self) -> None:
+        self.conn.close()
+        self._bucket = None
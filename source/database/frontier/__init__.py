@@ -0,0 +1,5 @@
+from .bloom_filter import BloomFilter
+from .url_frontier import UrlFrontier, UrlFrontierConfig, Admission
+
+
+__all__ = ['BloomFilter', 'UrlFrontier', 'UrlFrontierConfig', 'Admission']
\ No newline at end of file
@@ -0,0 +1,46 @@
+import hashlib
+import math
+
+
+class BloomFilter:
+    """A set that may report false positives but never false negatives.
+
+    Sized for capacity items at error_rate; more items only raise the false positive rate.
+
+    Attributes:
+    - capacity (int): Items the filter is sized for.
+    - error_rate (float): False positive rate at capacity.
+    - n_bits (int): Size of the bit array.
+    - n_hashes (int): Bits set per item.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 0.01) -> None:
+        if capacity < 1:
+            raise ValueError('capacity must be at least 1')
+        if not 0 < error_rate < 1:
+            raise ValueError('error_rate must be between 0 and 1')
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.n_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.n_hashes = max(1, round(self.n_bits / capacity * math.log(2)))
+        self._bits = bytearray((self.n_bits + 7) // 8)
+        self._count = 0
+
+    def _indices(self, item: str) -> list[int]:
+        # Double hashing: the k indices derive from two 64-bit halves of one digest.
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], 'little')
+        h2 = int.from_bytes(digest[8:], 'little') | 1
+        return [(h1 + i * h2) % self.n_bits for i in range(self.n_hashes)]
+
+    def add(self, item: str) -> None:
+        for i in self._indices(item):
+            self._bits[i >> 3] |= 1 << (i & 7)
+        self._count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[i >> 3] & (1 << (i & 7)) for i in self._indices(item))
+
+    def __len__(self) -> int:
+        """Items added (duplicates included)."""
+        return self._count
@@ -0,0 +1,243 @@
+import os
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Iterable, Optional
+from source.database.frontier.bloom_filter import BloomFilter
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS frontier (
+    url TEXT PRIMARY KEY,
+    first_seen_at REAL NOT NULL,
+    last_crawled_at REAL,
+    last_success INTEGER,
+    scheduled_at REAL
+);
+CREATE TABLE IF NOT EXISTS watermarks (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL,
+    updated_at REAL NOT NULL
+);
+"""
+
+
+@dataclass(frozen=True)
+class UrlFrontierConfig:
+    """How often the frontier lets a URL be crawled.
+
+    Attributes:
+    - path (str): SQLite file of the exact store. Every process sharing the frontier must use it.
+    - refresh_interval_seconds (float): Age of its last crawl after which a URL is crawled again.
+    - schedule_timeout_seconds (float): Time after which a scheduled URL that was not crawled
+        (e.g. its crawl failed or its message was lost) may be scheduled again.
+    - max_recrawls_per_admit (Optional[int]): Re-crawls one admit may schedule, None for no limit.
+    - bloom_capacity (int): URLs the seen-set's Bloom filter is sized for.
+    """
+    path: str = os.path.join('frontier', 'url_frontier.sqlite3')
+    refresh_interval_seconds: float = 7 * 24 * 3600
+    schedule_timeout_seconds: float = 6 * 3600
+    max_recrawls_per_admit: Optional[int] = 10
+    bloom_capacity: int = 1_000_000
+
+    @classmethod
+    def from_env(cls) -> 'UrlFrontierConfig':
+        config = cls()
+        max_recrawls = os.environ.get('SCRAWLER_FRONTIER_MAX_RECRAWLS')
+        return cls(
+            path=os.environ.get('SCRAWLER_FRONTIER_PATH', config.path),
+            refresh_interval_seconds=float(os.environ.get('SCRAWLER_FRONTIER_REFRESH_HOURS', config.refresh_interval_seconds / 3600)) * 3600,
+            max_recrawls_per_admit=config.max_recrawls_per_admit if max_recrawls is None else int(max_recrawls),
+        )
+
+
+@dataclass(frozen=True)
+class Admission:
+    """The URLs of an admit to crawl now, in priority order: new ones, then re-crawls.
+
+    Attributes:
+    - new (list[str]): URLs never seen before, in the order they were offered.
+    - recrawl (list[str]): Seen URLs due for a refresh, stalest first.
+    """
+    new: list[str] = field(default_factory=list)
+    recrawl: list[str] = field(default_factory=list)
+
+    @property
+    def urls(self) -> list[str]:
+        return self.new + self.recrawl
+
+
+class UrlFrontier:
+    """Decides which offered URLs are crawled: new ones first, then stale ones, each at most once
+    per refresh interval.
+
+    The seen-set is an in-memory Bloom filter in front of an exact SQLite store, which also keeps
+    each URL's last crawl. URLs the filter has never seen skip the store lookup; the filter
+    catches up with the rows other processes added before each lookup, and the store stays the
+    source of truth, so processes sharing its file (the transformer admitting URLs, the
+    extractor marking them crawled) never schedule a URL twice.
+
+    Attributes:
+    - config (UrlFrontierConfig): Paths and refresh policy.
+    """
+
+    def __init__(self, config: UrlFrontierConfig = UrlFrontierConfig()) -> None:
+        self.config = config
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._seen: Optional[BloomFilter] = None
+        self._seen_rowid = 0
+
+    @classmethod
+    def from_env(cls) -> 'UrlFrontier':
+        return cls(UrlFrontierConfig.from_env())
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            Path(self.config.path).parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.config.path, timeout=30, isolation_level=None, check_same_thread=False)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            conn.executescript(_SCHEMA)
+            self._conn = conn
+        return self._conn
+
+    def _seen_set(self, conn: sqlite3.Connection) -> BloomFilter:
+        if self._seen is None:
+            (n_urls,) = conn.execute('SELECT COUNT(*) FROM frontier').fetchone()
+            self._seen = BloomFilter(max(self.config.bloom_capacity, 2 * n_urls))
+            self._seen_rowid = 0
+        # Catch up with the URLs other processes recorded (rows are never deleted, so rowids grow).
+        for rowid, url in conn.execute('SELECT rowid, url FROM frontier WHERE rowid > ?', (self._seen_rowid,)):
+            self._seen.add(url)
+            self._seen_rowid = rowid
+        return self._seen
+
+    def admit(self, urls: Iterable[str], now: Optional[float] = None) -> Admission:
+        """Records the unseen URLs and schedules the URLs to crawl now (see Admission)."""
+        now = time.time() if now is None else now
+        with self._lock:
+            conn = self._connect()
+            seen = self._seen_set(conn)
+            offered = list(dict.fromkeys(urls))
+            new = []
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                # The filter only rules URLs out: a hit may be a false positive, so the store decides.
+                known = self._known(conn, [url for url in offered if url in seen])
+                for url in offered:
+                    if url in known:
+                        continue
+                    seen.add(url)
+                    cursor = conn.execute(
+                        'INSERT OR IGNORE INTO frontier (url, first_seen_at, scheduled_at) VALUES (?, ?, ?)',
+                        (url, now, now)
+                    )
+                    # Another process may have recorded it since the filter caught up.
+                    if cursor.rowcount:
+                        new.append(url)
+                    else:
+                        known.add(url)
+                recrawl = self._due(conn, [url for url in offered if url in known], now)
+                conn.executemany('UPDATE frontier SET scheduled_at = ? WHERE url = ?', [(now, url) for url in recrawl])
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        return Admission(new, recrawl)
+
+    def seen(self, urls: Iterable[str]) -> set[str]:
+        """Returns the URLs the frontier has recorded, without admitting the others."""
+        with self._lock:
+            conn = self._connect()
+            seen = self._seen_set(conn)
+            return self._known(conn, [url for url in dict.fromkeys(urls) if url in seen])
+
+    def _known(self, conn: sqlite3.Connection, urls: list[str]) -> set[str]:
+        known = set()
+        for i in range(0, len(urls), 500):
+            chunk = urls[i:i + 500]
+            rows = conn.execute(f'SELECT url FROM frontier WHERE url IN ({",".join("?" * len(chunk))})', chunk)
+            known.update(url for (url,) in rows)
+        return known
+
+    def _due(self, conn: sqlite3.Connection, urls: list[str], now: float) -> list[str]:
+        due = []
+        for i in range(0, len(urls), 500):
+            chunk = urls[i:i + 500]
+            rows = conn.execute(
+                f'SELECT url, last_crawled_at, scheduled_at FROM frontier WHERE url IN ({",".join("?" * len(chunk))})',
+                chunk
+            )
+            for url, last_crawled_at, scheduled_at in rows:
+                if last_crawled_at is not None and now - last_crawled_at < self.config.refresh_interval_seconds:
+                    continue
+                if scheduled_at is not None and now - scheduled_at < self.config.schedule_timeout_seconds:
+                    continue #< already on its way to the extractor
+                due.append((last_crawled_at or 0.0, url))
+        due.sort()
+        return [url for _, url in due[:self.config.max_recrawls_per_admit]]
+
+    def mark_crawled(self, url: str, success: bool, now: Optional[float] = None) -> None:
+        """Records a crawl. A failed crawl stays scheduled, so it is retried after schedule_timeout."""
+        now = time.time() if now is None else now
+        with self._lock:
+            conn = self._connect()
+            if success:
+                conn.execute(
+                    'UPDATE frontier SET last_crawled_at = ?, last_success = 1, scheduled_at = NULL WHERE url = ?',
+                    (now, url)
+                )
+            else:
+                conn.execute('UPDATE frontier SET last_success = 0 WHERE url = ?', (url,))
+
+    def seed(self, crawls: Iterable[tuple[str, Optional[float]]]) -> int:
+        """Records URLs crawled before the frontier existed, as (url, last crawl or None) pairs.
+        Known URLs are left as they are. Returns how many URLs were recorded."""
+        now = time.time()
+        with self._lock:
+            conn = self._connect()
+            seen = self._seen_set(conn)
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                n = 0
+                for url, last_crawled_at in crawls:
+                    cursor = conn.execute(
+                        'INSERT OR IGNORE INTO frontier (url, first_seen_at, last_crawled_at, last_success) VALUES (?, ?, ?, ?)',
+                        (url, now, last_crawled_at, None if last_crawled_at is None else 1)
+                    )
+                    seen.add(url)
+                    n += cursor.rowcount
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+        return n
+
+    def get_watermark(self, name: str) -> Optional[int]:
+        with self._lock:
+            row = self._connect().execute('SELECT value FROM watermarks WHERE name = ?', (name,)).fetchone()
+        return None if row is None else row[0]
+
+    def set_watermark(self, name: str, value: int) -> None:
+        """Publishes a watermark (e.g. the newest job id a listing crawl saw); it never moves back."""
+        with self._lock:
+            self._connect().execute(
+                'INSERT INTO watermarks (name, value, updated_at) VALUES (?, ?, ?) '
+                'ON CONFLICT (name) DO UPDATE SET value = MAX(value, excluded.value), updated_at = excluded.updated_at',
+                (name, value, time.time())
+            )
+
+    def last_crawled(self, url: str) -> Optional[float]:
+        with self._lock:
+            row = self._connect().execute('SELECT last_crawled_at FROM frontier WHERE url = ?', (url,)).fetchone()
+        return None if row is None else row[0]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+            self._seen = None
@@ -14,6 +14,12 @@ from source.mcp.models import (
 
 @dataclass(frozen=True)
 class MCPHandshakeETLModel(MCPIterface):
+    """Runs each part of the ETL in a process of its own.
+
+    The part models build their brokers, repositories and services on first use (they are cached
+    properties), so in the process that runs them: defining a model, or forking the process that
+    defined it, opens no client and starts no thread.
+    """
 
     ETL_PARTS: list[tuple[str, MainControlProgram]] = field(default_factory=lambda: [
         ('hse1', MainControlProgram(MCPHandshakeExtractor1Model())),
@@ -1,10 +1,13 @@
+import asyncio
 from dataclasses import dataclass
+from functools import cached_property
 from source.mcp.interfaces import MCPIterface
 from source.broker import (
-    InterProcessGateway,
+    AsyncInterProcessGateway,
     KafkaConnectionConfig,
     KafkaConsumerConfig,
     KafkaProducerConfig,
+    IPGMetrics,
 )
 from source.services import HandshakeExtractor1
 
@@ -12,25 +15,31 @@ from source.services import HandshakeExtractor1
 @dataclass(frozen=True)
 class MCPHandshakeExtractor1Model(MCPIterface):
     LISTEN_INTERVAL_SECONDS = 1
-    BROKER = InterProcessGateway(
-        config=KafkaConnectionConfig(
-            producer_config=KafkaProducerConfig.from_env(),
-            consumer_config=KafkaConsumerConfig.from_env(
-                group_id="scrawler_handshake"
+
+    @cached_property
+    def BROKER(self) -> AsyncInterProcessGateway:
+        return AsyncInterProcessGateway(
+            config=KafkaConnectionConfig(
+                producer_config=KafkaProducerConfig.from_env(preset='throughput'),
+                consumer_config=KafkaConsumerConfig.from_env(
+                    group_id="scrawler_handshake",
+                    enable_auto_commit=False
+                ),
             ),
+            metrics=IPGMetrics.from_env('hse1')
+        )
+
+    @cached_property
+    def EXTRACTOR(self) -> HandshakeExtractor1:
+        return HandshakeExtractor1(
+            broker=self.BROKER,
         )
-    )
-    EXTRACTOR = HandshakeExtractor1(
-        broker=BROKER,
-    )
 
     def setup(self):
-        self.BROKER.set_consumers([self.EXTRACTOR.consumer_info])
+        self.BROKER.set_consumers([self.EXTRACTOR.async_consumer_info])
     
     def teardown(self):
         self.BROKER.close()
     
     def run_loop(self):
-        while not self.BROKER.is_closed:
-            self.BROKER.listen(self.LISTEN_INTERVAL_SECONDS)
-            self.BROKER.emit()
\ No newline at end of file
+        asyncio.run(self.BROKER.arun(self.LISTEN_INTERVAL_SECONDS))
\ No newline at end of file
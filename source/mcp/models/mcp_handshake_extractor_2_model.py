@@ -1,10 +1,12 @@
 from dataclasses import dataclass
+from functools import cached_property
 from source.mcp.interfaces import MCPIterface
 from source.broker import (
     InterProcessGateway,
     KafkaConnectionConfig,
     KafkaConsumerConfig,
     KafkaProducerConfig,
+    IPGMetrics,
 )
 from source.database import HandshakeLake
 from source.services import HandshakeExtractor2
@@ -13,27 +15,39 @@ from source.services import HandshakeExtractor2
 @dataclass(frozen=True)
 class MCPHandshakeExtractor2Model(MCPIterface):
     LISTEN_INTERVAL_SECONDS = 1
-    REPO = HandshakeLake('handshake')
-    BROKER = InterProcessGateway(
-        config=KafkaConnectionConfig(
-            producer_config=KafkaProducerConfig.from_env(),
-            consumer_config=KafkaConsumerConfig.from_env(
-                group_id="scrawler_handshake"
+
+    @cached_property
+    def REPO(self) -> HandshakeLake:
+        return HandshakeLake('handshake')
+
+    @cached_property
+    def BROKER(self) -> InterProcessGateway:
+        return InterProcessGateway(
+            config=KafkaConnectionConfig(
+                producer_config=KafkaProducerConfig.from_env(preset='throughput'),
+                consumer_config=KafkaConsumerConfig.from_env(
+                    group_id="scrawler_handshake",
+                    enable_auto_commit=False
+                ),
             ),
+            metrics=IPGMetrics.from_env('hse2')
+        )
+
+    @cached_property
+    def EXTRACTOR(self) -> HandshakeExtractor2:
+        return HandshakeExtractor2(
+            broker=self.BROKER,
+            repo=self.REPO
         )
-    )
-    EXTRACTOR = HandshakeExtractor2(
-        broker=BROKER, 
-        repo=REPO
-    )
 
     def setup(self):
         self.REPO.connect()
         self.BROKER.set_consumers([self.EXTRACTOR.consumer_info])
     
     def teardown(self):
-        self.BROKER.close()
+        # Drain the extractor first so its final acknowledgements are committed on close.
         self.EXTRACTOR.shutdown()
+        self.BROKER.close()
     
     def run_loop(self):
         while not self.BROKER.is_closed:
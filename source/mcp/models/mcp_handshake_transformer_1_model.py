@@ -1,10 +1,12 @@
 from dataclasses import dataclass
+from functools import cached_property
 from source.mcp.interfaces import MCPIterface
 from source.broker import (
-    InterProcessGateway,
+    PartitionedInterProcessGateway,
     KafkaConnectionConfig,
     KafkaConsumerConfig,
     KafkaProducerConfig,
+    IPGMetrics,
 )
 from source.database import HandshakeLake
 from source.services import HandshakeTransformer1
@@ -13,19 +15,33 @@ from source.services import HandshakeTransformer1
 @dataclass(frozen=True)
 class MCPHandshakeTransformer1Model(MCPIterface):
     LISTEN_INTERVAL_SECONDS = 1
-    BROKER = InterProcessGateway(
-        config=KafkaConnectionConfig(
-            producer_config=KafkaProducerConfig.from_env(),
-            consumer_config=KafkaConsumerConfig.from_env(
-                group_id="scrawler_handshake"
+    LISTEN_BATCH_SIZE = 100
+
+    @cached_property
+    def BROKER(self) -> PartitionedInterProcessGateway:
+        # Crawling is IO-bound: one worker thread per assigned partition.
+        return PartitionedInterProcessGateway(
+            config=KafkaConnectionConfig(
+                producer_config=KafkaProducerConfig.from_env(),
+                consumer_config=KafkaConsumerConfig.from_env(
+                    group_id="scrawler_handshake",
+                    enable_auto_commit=False
+                ),
             ),
+            mode='thread',
+            metrics=IPGMetrics.from_env('hst1')
+        )
+
+    @cached_property
+    def REPO(self) -> HandshakeLake:
+        return HandshakeLake('handshake')
+
+    @cached_property
+    def TRANSFORMER(self) -> HandshakeTransformer1:
+        return HandshakeTransformer1(
+            broker=self.BROKER,
+            repo=self.REPO,
         )
-    )
-    REPO = HandshakeLake('handshake')
-    TRANSFORMER = HandshakeTransformer1(
-        broker=BROKER,
-        repo=REPO,
-    )
 
     def setup(self):
         self.REPO.connect()
@@ -36,5 +52,5 @@ class MCPHandshakeTransformer1Model(MCPIterface):
     
     def run_loop(self):
         while not self.BROKER.is_closed:
-            self.BROKER.listen(self.LISTEN_INTERVAL_SECONDS)
+            self.BROKER.listen_batch(self.LISTEN_BATCH_SIZE, self.LISTEN_INTERVAL_SECONDS)
             self.BROKER.emit()
\ No newline at end of file
@@ -1,31 +1,53 @@
+import os
 from dataclasses import dataclass
+from functools import cached_property
 from source.mcp.interfaces import MCPIterface
 from source.broker import (
-    InterProcessGateway,
+    PartitionedInterProcessGateway,
     KafkaConnectionConfig,
     KafkaConsumerConfig,
     KafkaProducerConfig,
+    IPGMetrics,
 )
 from source.database import HandshakeLake
 from source.services import HandshakeTransformer2
+from source.services.hst2.worker import setup_transformer_worker
 
 
 @dataclass(frozen=True)
 class MCPHandshakeTransformer2Model(MCPIterface):
     LISTEN_INTERVAL_SECONDS = 1
-    BROKER = InterProcessGateway(
-        config=KafkaConnectionConfig(
-            producer_config=KafkaProducerConfig.from_env(),
-            consumer_config=KafkaConsumerConfig.from_env(
-                group_id="scrawler_handshake"
+    LISTEN_BATCH_SIZE = 100
+    # Parsing is CPU-bound: one worker process per core. Without a bound, every partition of the
+    # source topic and of each retry topic would get a process of its own.
+    MAX_WORKERS = os.cpu_count() or 1
+
+    @cached_property
+    def BROKER(self) -> PartitionedInterProcessGateway:
+        return PartitionedInterProcessGateway(
+            config=KafkaConnectionConfig(
+                producer_config=KafkaProducerConfig.from_env(preset='throughput'),
+                consumer_config=KafkaConsumerConfig.from_env(
+                    group_id="scrawler_handshake",
+                    enable_auto_commit=False
+                ),
             ),
+            mode='process',
+            worker_setup=setup_transformer_worker,
+            max_workers=self.MAX_WORKERS,
+            metrics=IPGMetrics.from_env('hst2')
+        )
+
+    @cached_property
+    def REPO(self) -> HandshakeLake:
+        return HandshakeLake('handshake')
+
+    @cached_property
+    def TRANSFORMER(self) -> HandshakeTransformer2:
+        return HandshakeTransformer2(
+            broker=self.BROKER,
+            repo=self.REPO,
         )
-    )
-    REPO = HandshakeLake('handshake')
-    TRANSFORMER = HandshakeTransformer2(
-        broker=BROKER,
-        repo=REPO,
-    )
 
     def setup(self):
         self.REPO.connect()
@@ -36,5 +58,5 @@ class MCPHandshakeTransformer2Model(MCPIterface):
     
     def run_loop(self):
         while not self.BROKER.is_closed:
-            self.BROKER.listen(self.LISTEN_INTERVAL_SECONDS)
+            self.BROKER.listen_batch(self.LISTEN_BATCH_SIZE, self.LISTEN_INTERVAL_SECONDS)
             self.BROKER.emit()
\ No newline at end of file
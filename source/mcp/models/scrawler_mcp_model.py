@@ -1,4 +1,4 @@
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from source.mcp.interfaces import MCPIterface
 from source.broker import (
     InterProcessGateway,
@@ -10,8 +10,7 @@ from source.broker import (
 
 @dataclass(frozen=True)
 class MCPScrawlerModel(MCPIterface):
-    broker: InterProcessGateway = \
-    InterProcessGateway(
+    broker: InterProcessGateway = field(default_factory=lambda: InterProcessGateway(
         config=KafkaConnectionConfig(
             consumer_config=KafkaConsumerConfig.from_env(
                 client_id="scrawler_v1",
@@ -21,7 +20,7 @@ class MCPScrawlerModel(MCPIterface):
                 client_id="scrawler_v1"
             )
         )
-    )
+    ))
 
     def setup(self):
         pass
@@ -3,8 +3,9 @@ from .topics import (
     get_topic_hse2,
     get_topic_hst1,
     get_topic_hst2,
-    get_topic_hsl
+    get_topic_hsl,
+    get_retry_topics
 )
 
 
-__all__ = ['get_topic_hse1', 'get_topic_hse2', 'get_topic_hst1', 'get_topic_hst2', 'get_topic_hsl']
\ No newline at end of file
+__all__ = ['get_topic_hse1', 'get_topic_hse2', 'get_topic_hst1', 'get_topic_hst2', 'get_topic_hsl', 'get_retry_topics']
\ No newline at end of file
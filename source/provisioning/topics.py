@@ -1,4 +1,5 @@
 from confluent_kafka.admin import NewTopic
+from source.broker import RetryPolicy
 
 
 def get_topic_hse1():
@@ -55,8 +56,37 @@ def get_topic_hsl():
         num_partitions=3,
         replication_factor=1,
         config={
-            'cleanup.policy': 'delete',
+            # Messages are keyed by job id, so compaction keeps the latest load of each job.
+            'cleanup.policy': 'compact,delete',
             'retention.ms': str(24 * 60 * 60 * 1000), # 24 hours
             'segment.ms': str(12 * 60 * 60 * 1000)    # 12 hours
         }
     )
+
+
+def get_retry_topics(topic: NewTopic, retry_policy: RetryPolicy) -> list[NewTopic]:
+    """Returns the retry topics and the dead-letter topic of a topic under a retry policy."""
+    retry_topics = [
+        NewTopic(
+            topic=retry_topic,
+            num_partitions=topic.num_partitions,
+            replication_factor=topic.replication_factor,
+            config={
+                'cleanup.policy': 'delete',
+                'retention.ms': str(24 * 60 * 60 * 1000), # 24 hours
+                'segment.ms': str(12 * 60 * 60 * 1000)    # 12 hours
+            }
+        )
+        for retry_topic in retry_policy.retry_topics(topic.topic)
+    ]
+    dlq_topic = NewTopic(
+        topic=retry_policy.dlq_topic(topic.topic),
+        num_partitions=1,
+        replication_factor=topic.replication_factor,
+        config={
+            'cleanup.policy': 'delete',
+            'retention.ms': str(7 * 24 * 60 * 60 * 1000), # 7 days, to leave time for inspection
+            'segment.ms': str(24 * 60 * 60 * 1000)        # 24 hours
+        }
+    )
+    return [*retry_topics, dlq_topic]
@@ -1,8 +1,8 @@
-from .handshake_auth import HandshakeAuth, HandshakeAuthConfig
+from .handshake_auth import HandshakeAuth, HandshakeAuthConfig, LoginError
 from .handshake_extractor_1 import HandshakeExtractor1Config, HandshakeExtractor1
 from .handshake_extractor_2 import HandshakeExtractor2Config, HandshakeExtractor2
 from .handshake_transformer_1 import HandshakeTransformer1, HandshakeTransformer1Config
 from .hst2.handshake_transformer_2 import HandshakeTransformer2, HandshakeTransformer2Config
 
 
-__all__ = ['HandshakeTransformer2', 'HandshakeTransformer2Config', 'HandshakeTransformer1', 'HandshakeTransformer1Config', 'HandshakeAuth', 'HandshakeAuthConfig', 'HandshakeExtractor1Config', 'HandshakeExtractor1', 'HandshakeExtractor2Config', 'HandshakeExtractor2']
+__all__ = ['HandshakeTransformer2', 'HandshakeTransformer2Config', 'HandshakeTransformer1', 'HandshakeTransformer1Config', 'HandshakeAuth', 'HandshakeAuthConfig', 'LoginError', 'HandshakeExtractor1Config', 'HandshakeExtractor1', 'HandshakeExtractor2Config', 'HandshakeExtractor2']
@@ -1,8 +1,14 @@
+import json
+import math
 import os
+import time
 from dataclasses import dataclass
 from pathlib import Path
+from typing import Optional
+from urllib.parse import urlparse
 from crawl4ai import BrowserConfig
-from source.crawlers.base import CrawlerFactory, CrawlerFactoryConfig
+from filelock import AsyncFileLock
+from source.crawlers.base import CrawlerFactory, CrawlerFactoryConfig, CrawlerPool, EventLoopThread
 from source.crawlers import handshake_login_hook, handshake_check_auth_hook
 
 
@@ -31,13 +37,59 @@ def make_auth_check_crawler_config(auth_url: str, session_storage: str):
     )
 
 
+def session_expiry(session_storage: str, domain: str, cookie_names: tuple[str, ...] = ()) -> Optional[float]:
+    """Returns when the session saved in a storage state file expires, in epoch seconds.
+
+    Without cookie_names, the session lasts as long as any cookie of the domain; with them, until
+    the first named cookie expires. Cookies without an expiry never expire. Returns None if the
+    file holds no matching cookie (e.g. before the first login).
+    """
+    try:
+        state = json.loads(Path(session_storage).read_text())
+    except (OSError, ValueError):
+        return None
+    cookies = [c for c in state.get('cookies', []) if domain.endswith(c.get('domain', '').lstrip('.'))]
+    if cookie_names:
+        cookies = [c for c in cookies if c.get('name') in cookie_names]
+    if not cookies:
+        return None
+    expiries = [c['expires'] if c.get('expires', -1) > 0 else math.inf for c in cookies]
+    return min(expiries) if cookie_names else max(expiries)
+
+
+class LoginError(Exception):
+    """Raised when a login did not produce a valid session."""
+
+
 @dataclass(frozen=True)
 class HandshakeAuthConfig:
+    """Credentials and session settings of HandshakeAuth.
+
+    Attributes:
+    - username (str): Handshake account.
+    - password (str): Password of the account.
+    - session_storage (str): Playwright storage state file the session is saved to.
+    - login_url (str): Login page.
+    - auth_url (str): Page that only loads for a logged-in user.
+    - lock_path (Optional[str]): Lock file serializing logins across processes. Defaults to the
+        session storage path with a '.lock' suffix; processes sharing an account share the lock.
+    - check_interval_seconds (float): How long a successful check_auth is trusted.
+    - expiry_margin_seconds (float): Cookies expiring sooner than this count as expired.
+    - session_cookies (tuple[str, ...]): Cookies that hold the session (see session_expiry).
+    """
     username: str
     password: str
     session_storage: str
     login_url: str = "https://app.joinhandshake.com/login"
     auth_url: str = "https://app.joinhandshake.com/explore"
+    lock_path: Optional[str] = None
+    check_interval_seconds: float = 300.0
+    expiry_margin_seconds: float = 300.0
+    session_cookies: tuple[str, ...] = ()
+
+    @property
+    def login_lock_path(self) -> str:
+        return self.lock_path or f'{self.session_storage}.lock'
 
     def get_login_crawler_config(self):
         return make_login_crawler_config(self.login_url, self.username, self.password, self.session_storage)
@@ -50,23 +102,120 @@ class HandshakeAuthConfig:
         username = os.environ['USER_APP_HANDSHAKE_COM']
         password = os.environ['PASS_APP_HANDSHAKE_COM']
         session_storage = str(Path(os.environ['SESSION_STORAGE']) / f'{session_name}.json')
-        return cls(username, password, session_storage)
+        # One lock per account: every session of the account logs in through it.
+        lock_path = str(Path(os.environ['SESSION_STORAGE']) / 'handshake_login.lock')
+        return cls(username, password, session_storage, lock_path=lock_path)
 
 
 class HandshakeAuth:
+    """Logs in to Handshake and checks the saved session, with crawlers kept warm between calls.
+
+    The auth check crawler stays started with the session storage loaded. Login crawlers serve a
+    single login, because the login flow needs a logged-out context. Every pool registered with
+    add_session_pool (and the auth check pool) is recycled whenever the session storage changes,
+    so its contexts reload the new session.
+
+    Crawls call ensure_session, which only logs in when the saved session is no longer valid.
 
-    def __init__(self, config = HandshakeAuthConfig.from_env()) -> None:
+    Args:
+    - config (HandshakeAuthConfig): Credentials, session storage and URLs.
+    - loop (Optional[EventLoopThread]): Loop the crawlers run on. Defaults to the shared browser loop.
+    """
+
+    def __init__(self, config = HandshakeAuthConfig.from_env(), loop: Optional[EventLoopThread] = None) -> None:
         self.config = config
-        self.login_crawler = CrawlerFactory(self.config.get_login_crawler_config()).create_crawler()
-        self.auth_check_crawler = CrawlerFactory(self.config.get_auth_check_crawler_config()).create_crawler()
+        self.login_pool = CrawlerPool(CrawlerFactory(self.config.get_login_crawler_config()), max_pages=1, loop=loop)
+        self.auth_check_pool = CrawlerPool(CrawlerFactory(self.config.get_auth_check_crawler_config()), loop=loop)
+        self._session_pools = [self.auth_check_pool]
+        self._login_lock = AsyncFileLock(config.login_lock_path)
+        self._checked_at = 0.0 #< time.time() of the last successful check_auth or login
+        self._storage_mtime: Optional[int] = None
+        self._redirected = False
+
+    def add_session_pool(self, pool: CrawlerPool) -> None:
+        """Registers a pool whose crawlers load the session storage; it is recycled after every login."""
+        self._session_pools.append(pool)
+
+    def report_redirect(self) -> None:
+        """Marks the session as lost, e.g. after a crawl was redirected to the login page."""
+        self._redirected = True
+
+    def is_login_redirect(self, url: Optional[str]) -> bool:
+        return url is not None and url.startswith(self.config.login_url)
 
     async def login(self):
-        await self.login_crawler.start()
-        result = await self.login_crawler.arun(url=self.config.auth_url)
-        await self.login_crawler.close()
+        await self.login_pool.loop.call(self._locked_login())
+
+    async def _locked_login(self):
+        async with self._login_lock:
+            await self._login()
+
+    async def _login(self):
+        async with self.login_pool.lease() as lease:
+            result = await lease.arun(url=self.config.auth_url)
+        self._sync_storage()
+        if not result.success:
+            raise LoginError(f'Login failed: {result.error_message}')
+        self._checked_at = time.time()
+        self._redirected = False
 
     async def check_auth(self) -> bool:
-        await self.auth_check_crawler.start()
-        result = await self.auth_check_crawler.arun(url=self.config.auth_url)
-        await self.auth_check_crawler.close()
-        return result.success
\ No newline at end of file
+        return await self.auth_check_pool.loop.call(self._check_auth())
+
+    async def _check_auth(self) -> bool:
+        async with self.auth_check_pool.lease() as lease:
+            result = await lease.arun(url=self.config.auth_url)
+        if result.success:
+            self._checked_at = time.time()
+        return result.success
+
+    def _sync_storage(self) -> bool:
+        """Recycles the session pools if the session storage changed; returns True if it did."""
+        try:
+            mtime = os.stat(self.config.session_storage).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime == self._storage_mtime:
+            return False
+        self._storage_mtime = mtime
+        for pool in self._session_pools:
+            pool.invalidate()
+        return True
+
+    def _has_unexpired_cookies(self) -> bool:
+        domain = urlparse(self.config.auth_url).hostname or ''
+        expiry = session_expiry(self.config.session_storage, domain, self.config.session_cookies)
+        return expiry is not None and expiry - self.config.expiry_margin_seconds > time.time()
+
+    async def ensure_session(self) -> None:
+        """Makes sure the session storage holds a valid session, logging in only if it does not.
+
+        A session with unexpired cookies is trusted for check_interval_seconds after it last
+        passed check_auth. Expired cookies, a failed check or a reported login redirect lead to a
+        login, under a file lock shared by the processes of the account. A process that waited for
+        the lock first checks the session the lock holder may just have saved.
+
+        Raises LoginError if the login fails, so callers do not crawl (or acknowledge their
+        messages) without a session.
+        """
+        await self.login_pool.loop.call(self._ensure_session())
+
+    async def _ensure_session(self) -> None:
+        self._sync_storage()
+        if not self._redirected and self._has_unexpired_cookies():
+            if time.time() - self._checked_at < self.config.check_interval_seconds:
+                return
+            if await self._check_auth():
+                return
+        async with self._login_lock:
+            if self._sync_storage() and self._has_unexpired_cookies() and await self._check_auth():
+                self._redirected = False
+                return
+            await self._login()
+
+    async def close(self):
+        await self.auth_check_pool.loop.call(self._close())
+
+    async def _close(self):
+        await self.login_pool.close()
+        await self.auth_check_pool.close()
\ No newline at end of file
@@ -1,36 +1,83 @@
 import os
+import re
 import asyncio
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
-from crawl4ai import BrowserConfig, CrawlerRunConfig, CacheMode, AsyncWebCrawler, MemoryAdaptiveDispatcher, RateLimiter
+from typing import Optional
+from crawl4ai import BrowserConfig, CrawlerRunConfig, CacheMode, MemoryAdaptiveDispatcher, RateLimiter
 from source.broker import InterProcessGateway, IPGConsumer
-from source.codec import HandshakeExtractor1Codec, HandshakeTransformer1Codec
-from source.crawlers.base import CrawlerFactory, CrawlerFactoryConfig
+from source.codec import HandshakeExtractor1Codec, HandshakeTransformer1BinaryCodec, EXTRACTOR_1_CODEC, TRANSFORMER_1_CODEC
+from source.crawlers.base import CrawlerFactory, CrawlerFactoryConfig, CrawlerPool, HttpFetcher, ResourceBlocker
 from source.crawlers import handshake_extractor_1_hook
+from source.database import UrlFrontier
 from source.services.handshake_auth import HandshakeAuth
 
 
 @dataclass(frozen=True)
 class HandshakeExtractor1Config:
     topics = ['extract.handshake.job.stage1.v1']
-    codec = HandshakeExtractor1Codec
+    codec = EXTRACTOR_1_CODEC
     base_url: str = "https://app.joinhandshake.com/job-search/?page={}&per_page={}"
+    # Job URLs as HST1 admits them to the frontier.
+    job_url: str = "https://app.joinhandshake.com/jobs/{}"
+    # Newest job id seen by incremental crawls, kept in the frontier's store.
+    watermark_name: str = 'handshake.listing'
+    # Seconds an incremental crawl waits for its pages to be delivered before moving the watermark.
+    delivery_timeout_seconds: float = 30
+    # 'http' fetches listing pages with the session cookies and renders in the browser only the
+    # pages that came back without job links; 'browser' renders every page.
+    fetch_backend: str = field(default_factory=lambda: os.environ.get('SCRAWLER_HSE1_FETCH_BACKEND', 'http'))
+
+    @property
+    def session_storage(self) -> Path:
+        return Path(os.environ['SESSION_STORAGE']) / 'handshake.json'
 
     def get_auth(self) -> HandshakeAuth:
         return HandshakeAuth()
 
-    def get_crawler(self) -> AsyncWebCrawler:
-        return CrawlerFactory(
-            CrawlerFactoryConfig(
-                browser_config=BrowserConfig(
-                    headless=True,
-                    storage_state=Path(os.environ['SESSION_STORAGE']) / 'handshake.json'
-                ),
-                hooks={
-                    'after_goto': handshake_extractor_1_hook()
-                }
+    def get_frontier(self) -> UrlFrontier:
+        return UrlFrontier.from_env()
+
+    def get_fetcher(self) -> HttpFetcher:
+        return HttpFetcher(str(self.session_storage))
+
+    def get_resource_blocker(self) -> ResourceBlocker:
+        # HST1 only reads the listing's job links, so nothing but the page and its scripts is loaded.
+        return ResourceBlocker()
+
+    def get_crawler_pool(self, resource_blocker: ResourceBlocker) -> CrawlerPool:
+        return CrawlerPool(
+            CrawlerFactory(
+                CrawlerFactoryConfig(
+                    browser_config=BrowserConfig(
+                        headless=True,
+                        storage_state=self.session_storage
+                    ),
+                    hooks={
+                        'on_page_context_created': resource_blocker.hook(),
+                        'after_goto': handshake_extractor_1_hook()
+                    }
+                )
             )
-        ).create_crawler()
+        )
+
+
+_ANCHOR = re.compile(r'<a\b[^>]*>', re.IGNORECASE)
+_JOB_HREF = re.compile(r'href="[^"]*/(?:jobs|job-search)/(\d+)')
+
+
+def listing_job_ids(html: str) -> list[int]:
+    """The ids of the jobs a listing page links to (the a[role="button"] HST1 extracts), in page order."""
+    ids = (
+        int(match.group(1)) for tag in _ANCHOR.findall(html)
+        if 'role="button"' in tag and (match := _JOB_HREF.search(tag))
+    )
+    return list(dict.fromkeys(ids))
+
+
+def has_job_links(html: str) -> bool:
+    """True if a listing page holds the job links HST1 extracts."""
+    return bool(listing_job_ids(html))
     
 
 class HandshakeExtractor1:
@@ -43,7 +90,11 @@ class HandshakeExtractor1:
         self.config = config
         self.broker = broker
         self.auth = config.get_auth()
-        self.crawler = config.get_crawler()
+        self.frontier = config.get_frontier()
+        self.fetcher = config.get_fetcher()
+        self.resource_blocker = config.get_resource_blocker()
+        self.crawler_pool = config.get_crawler_pool(self.resource_blocker)
+        self.auth.add_session_pool(self.crawler_pool)
 
     @property
     def consumer_info(self) -> IPGConsumer:
@@ -53,12 +104,27 @@ class HandshakeExtractor1:
             notify=self.on_notify
         )
 
+    @property
+    def async_consumer_info(self) -> IPGConsumer:
+        return IPGConsumer(
+            topics=self.config.topics,
+            codec=self.config.codec,
+            notify=self.aon_notify
+        )
+
     def on_notify(self, message: HandshakeExtractor1Codec) -> None:
+        asyncio.run(self.aon_notify(message))
+
+    async def aon_notify(self, message: HandshakeExtractor1Codec) -> None:
         match message.action:
             case 'START_EXTRACT':
-                asyncio.run(self.extract(
+                await self.extract(
+                    message.start_page, message.end_page, message.per_page
+                )
+            case 'START_INCREMENTAL_EXTRACT':
+                await self.extract_incremental(
                     message.start_page, message.end_page, message.per_page
-                ))
+                )
             case _:
                 pass
         return
@@ -68,17 +134,110 @@ class HandshakeExtractor1:
             self.config.base_url.format(page, per_page) 
             for page in range(start_page, end_page + 1)
         ]
+        await self.auth.ensure_session()
+        # The fetcher and the crawlers live on the browser loop, whatever loop notified us.
+        await self.crawler_pool.loop.call(self._extract(urls))
+
+    async def extract_incremental(self, start_page: int, end_page: int, per_page: int):
+        """Crawls listing pages in order, from start_page, until a page holds no new job.
+
+        Listings are sorted by recency, so the pages after the first page of known jobs are known
+        too: the crawl does work proportional to the new postings, and end_page is only a cap.
+        A job is known if the frontier recorded it or its id is at most the watermark, the newest
+        job id a previous incremental crawl saw (job ids grow with posting time). The watermark
+        moves only when the crawl reached known jobs and its pages were delivered. Known jobs are
+        not refreshed from listings this way; periodic full extracts offer them to the frontier.
+        """
+        await self.auth.ensure_session()
+        await self.crawler_pool.loop.call(self._extract_incremental(start_page, end_page, per_page))
+
+    async def _extract_incremental(self, start_page: int, end_page: int, per_page: int):
+        watermark = self.frontier.get_watermark(self.config.watermark_name)
+        newest = watermark
+        pages = 0
+        for page in range(start_page, end_page + 1):
+            pages += 1
+            html = await self.load_page(self.config.base_url.format(page, per_page))
+            if html is None:
+                # The watermark stays put, so the next crawl walks these pages again.
+                print(f'HSE1 incremental crawl failed to load page {page}')
+                return
+            job_ids = listing_job_ids(html)
+            seen = self.frontier.seen([self.config.job_url.format(job_id) for job_id in job_ids])
+            new_ids = [
+                job_id for job_id in job_ids
+                if (watermark is None or job_id > watermark) and self.config.job_url.format(job_id) not in seen
+            ]
+            if not new_ids:
+                break
+            self.propogate_message(html)
+            newest = max(newest or 0, *new_ids)
+        else:
+            # Jobs newer than the watermark may sit past end_page: it stays put, so the next crawl
+            # walks until it reaches the jobs this one sent.
+            print(f'HSE1 incremental crawl reached page {end_page} without finding known jobs')
+            newest = watermark
+        if newest is not None and newest != watermark:
+            # Only jobs whose pages reached the broker may count as known.
+            undelivered = await asyncio.to_thread(self.broker.flush, self.config.delivery_timeout_seconds)
+            if undelivered:
+                print(f'HSE1 incremental crawl left {undelivered} pages undelivered; the watermark stays at {watermark}')
+                return
+            self.frontier.set_watermark(self.config.watermark_name, newest)
+        print(
+            f'HSE1 crawled {pages} pages incrementally (watermark {newest}): '
+            f'{self.resource_blocker.pop_stats()}'
+        )
+
+    async def load_page(self, url: str) -> Optional[str]:
+        """Returns the HTML of a listing page, fetched over HTTP or rendered, or None if it failed."""
+        if self.config.fetch_backend == 'http':
+            result = await self.fetcher.fetch(url)
+            if self.auth.is_login_redirect(result.redirected_url):
+                self.auth.report_redirect() #< the next message logs in again
+            if result.success and has_job_links(result.html):
+                return result.html
+        async with self.crawler_pool.lease() as lease:
+            result = await lease.arun(url, CrawlerRunConfig(cache_mode=CacheMode.BYPASS))
+        if not result.success:
+            if self.auth.is_login_redirect(result.redirected_url):
+                self.auth.report_redirect()
+            return None
+        return result.html
+
+    async def _extract(self, urls: list[str]):
+        if self.config.fetch_backend == 'http':
+            urls = await self.fetch(urls)
+        if urls:
+            await self.render(urls)
+
+    async def fetch(self, urls: list[str]) -> list[str]:
+        """Fetches listing pages over HTTP; returns the URLs the browser still has to render."""
+        unfetched = []
+        async for result in self.fetcher.fetch_many(urls):
+            if self.auth.is_login_redirect(result.redirected_url):
+                self.auth.report_redirect() #< the next message logs in again
+            if result.success and has_job_links(result.html):
+                self.propogate_message(result.html)
+            else:
+                unfetched.append(result.url)
+        return unfetched
+
+    async def render(self, urls: list[str]):
         run_config = CrawlerRunConfig(stream=True, cache_mode=CacheMode.BYPASS)
         dispatcher = MemoryAdaptiveDispatcher(
             max_session_permit=5,
             rate_limiter=RateLimiter()
         )
-        await self.auth.login()
-        async for result in await self.crawler.arun_many(urls, run_config, dispatcher):
-            if not result.success:
-                continue
-            self.propogate_message(result.html)
+        async with self.crawler_pool.lease() as lease:
+            async for result in await lease.arun_many(urls, run_config, dispatcher):
+                if not result.success:
+                    if self.auth.is_login_redirect(result.redirected_url):
+                        self.auth.report_redirect() #< the next message logs in again
+                    continue
+                self.propogate_message(result.html)
+        print(f'HSE1 rendered {len(urls)} pages: {self.resource_blocker.pop_stats()}')
     
     def propogate_message(self, html: str):
-        message = HandshakeTransformer1Codec(html)
-        self.broker.send(HandshakeTransformer1Codec, HandshakeTransformer1Codec.TOPIC, message)
\ No newline at end of file
+        message = HandshakeTransformer1BinaryCodec(html)
+        self.broker.send(TRANSFORMER_1_CODEC, HandshakeTransformer1BinaryCodec.TOPIC, message)
\ No newline at end of file
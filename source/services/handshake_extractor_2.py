@@ -1,42 +1,84 @@
 import os
-import threading
-import asyncio
 import json
-import queue
+import asyncio
+import threading
 from dataclasses import dataclass
 from pathlib import Path
-from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, MemoryAdaptiveDispatcher, RateLimiter, CacheMode, JsonCssExtractionStrategy
-from source.crawlers import CrawlerFactory, CrawlerFactoryConfig, handshake_extractor_2_hook
+from typing import Optional, TypeAlias
+from crawl4ai import BrowserConfig, CrawlerRunConfig, RateLimiter, CacheMode, JsonCssExtractionStrategy
+from source.crawlers import CrawlerFactory, CrawlerFactoryConfig, CrawlerPool, CrawlerLease, ResourceBlocker, handshake_extractor_2_hook
 from source.services.handshake_auth import HandshakeAuth, HandshakeAuthConfig
-from source.codec import HandshakeExtractor2Codec, HandshakeTransformer2Codec
-from source.broker import InterProcessGateway, IPGConsumer
-from source.database import HandshakeLake
+from source.codec import HandshakeExtractor2Codec, HandshakeTransformer2BinaryCodec, EXTRACTOR_2_CODEC, TRANSFORMER_2_CODEC
+from source.broker import InterProcessGateway, IPGConsumer, Acknowledgement, RetryPolicy
+from source.broker.services.retry import failure_metadata
+from source.database import HandshakeLake, UrlFrontier
+
+
+Job: TypeAlias = tuple[HandshakeExtractor2Codec, Acknowledgement]
 
 
 @dataclass(frozen=True)
 class HandshakeExtractor2Config:
     TOPICS = ['extract.handshake.job.stage2.v1']
-    CODEC = HandshakeExtractor2Codec
+    CODEC = EXTRACTOR_2_CODEC
+    # Only its DLQ is used: jobs are retried in process, and sent to '<topic>.dlq' after the last attempt.
+    RETRY_POLICY = RetryPolicy()
     SESSION_NAME = 'handshake_e2'
-    MSG_BUF_SIZE = 100
-    MSG_BUF_TIMEOUT = 30
+    # Pages scraped concurrently; a queued job starts as soon as one of them finishes.
+    WINDOW = 5
+    # HST1 sends the jobs of a listing page as one batch record (about 50 jobs).
+    JOBS_PER_RECORD = 50
+    # Unacknowledged records the extractor may hold: one being scraped, one queued behind it.
+    MAX_IN_FLIGHT = max(2 * WINDOW // JOBS_PER_RECORD, 2)
+    # A lease is returned to the pool after this many pages (or when the queue runs dry), so the
+    # pool can recycle its crawler and the session is checked again.
+    PAGES_PER_LEASE = 100
+    # Seconds shutdown lets in-flight pages finish before cancelling them.
+    SHUTDOWN_DEADLINE_SECONDS = 30
+    # Scrapes of a job that may raise before it is dead-lettered.
+    MAX_SCRAPE_ATTEMPTS = 3
+    # Longest pause of the stream after a failed session check or lease.
+    STREAM_MAX_BACKOFF_SECONDS = 60
+    # The crawler stays warm between leases; it is restarted after this many pages, or when the
+    # browsers use more memory than this.
+    CRAWLER_MAX_PAGES = 1000
+    CRAWLER_MAX_RSS_MB = 2048
 
     def get_auth(self) -> HandshakeAuth:
         return HandshakeAuth(HandshakeAuthConfig.from_env(session_name=self.SESSION_NAME))
 
-    def get_crawler(self) -> AsyncWebCrawler:
-        return CrawlerFactory(CrawlerFactoryConfig(
+    def get_resource_blocker(self) -> ResourceBlocker:
+        # Job pages only need their HTML: images, media, fonts and trackers are aborted.
+        return ResourceBlocker()
+
+    def get_crawler_pool(self, resource_blocker: ResourceBlocker) -> CrawlerPool:
+        factory = CrawlerFactory(CrawlerFactoryConfig(
             BrowserConfig(
                 headless=True,
                 storage_state=Path(os.environ['SESSION_STORAGE']) / f'{self.SESSION_NAME}.json'
             ),
             hooks={
+                'on_page_context_created': resource_blocker.hook(),
                 'after_goto': handshake_extractor_2_hook()
             }
-        )).create_crawler()
+        ))
+        return CrawlerPool(factory, max_pages=self.CRAWLER_MAX_PAGES, max_rss_mb=self.CRAWLER_MAX_RSS_MB)
+
+    def get_frontier(self) -> UrlFrontier:
+        return UrlFrontier.from_env()
+
+    def get_rate_limiter(self) -> RateLimiter:
+        return RateLimiter()
 
 
 class HandshakeExtractor2:
+    """Scrapes job pages as their messages arrive.
+
+    Messages are queued on the browser loop, where a long-running stream (started with the first
+    message) scrapes up to WINDOW pages at a time and starts the next queued job as soon as a page
+    finishes. A message is acknowledged (and its offset committed) only after its page is scraped,
+    so messages still queued or in flight when the process dies are redelivered.
+    """
 
     def __init__(self,
             broker: InterProcessGateway,
@@ -44,25 +86,33 @@ class HandshakeExtractor2:
             config: HandshakeExtractor2Config = HandshakeExtractor2Config()
         ):
         self.config = config
-        self.crawler = config.get_crawler()
+        self.resource_blocker = config.get_resource_blocker()
+        self.crawler_pool = config.get_crawler_pool(self.resource_blocker)
         self.auth = config.get_auth()
+        self.auth.add_session_pool(self.crawler_pool)
         self.broker = broker
         self.repo = repo
-        self.msg_buf = queue.Queue()  #< Thread-safe
-        self.buf_size = config.MSG_BUF_SIZE
-        self.buf_timeout = config.MSG_BUF_TIMEOUT
-        self._buf_event = threading.Event()
-        self._worker = threading.Thread(target=self._worker, daemon=True)
-        self._worker.start()
-        self._worker_stop_event = threading.Event()
-        self._worker_closed_event = threading.Event()
+        self.frontier = config.get_frontier()
+        self.rate_limiter = config.get_rate_limiter()
+        self._queue: asyncio.Queue[Optional[Job]] = asyncio.Queue()
+        self._in_flight: dict[asyncio.Task, Job] = {}
+        self._unprocessed: list[Job] = []
+        self._attempts: dict[Acknowledgement, int] = {}
+        self._stopping = False
+        self._stop_event = asyncio.Event()
+        self._rotate = False
+        self._stream_task: Optional[asyncio.Task] = None
+        self._start_lock = threading.Lock()
 
     @property
     def consumer_info(self) -> IPGConsumer:
         return IPGConsumer(
             topics=self.config.TOPICS,
             codec=self.config.CODEC,
-            notify=self.on_notify
+            notify=self.on_notify,
+            notify_batch=self.on_notify_batch,
+            manual_ack=True,
+            max_in_flight=self.config.MAX_IN_FLIGHT
         )
 
     @property
@@ -76,60 +126,206 @@ class HandshakeExtractor2:
             'fields': []
         })
 
-    def on_notify(self, message: HandshakeExtractor2Codec):
-        self.msg_buf.put(message)
-        if self.msg_buf.qsize() >= self.buf_size:
-            self._buf_event.set()
-
-    def _worker(self):
-        while True:
-            self._buf_event.wait(self.buf_timeout)
-            if not self.msg_buf and self._worker_stop_event.is_set():
-                self._buf_event.clear()
-                break
-            if self.msg_buf.qsize() == 0:
-                # Using qsize opens a risk of race condition. Though, a race condition won't cause 
-                # damage because the system will process the queue in time (regardless).
-                self._buf_event.clear()
-                continue
-            batch = []
-            while True:
-                try:
-                    batch.append(self.msg_buf.get_nowait())
-                except queue.Empty:
-                    break
-            urls = [msg.url for msg in batch]
-            asyncio.run(self.extract(urls))
-            self._buf_event.clear()
-            if self._worker_stop_event.is_set():
-                break
-        self._worker_closed_event.set()
-
-    def shutdown(self):
-        self._worker_stop_event.set()
-        self._worker_closed_event.wait()
-
-    async def extract(self, urls: list[str]):
-        run_config = CrawlerRunConfig(
-            stream=True,
+    @property
+    def run_config(self) -> CrawlerRunConfig:
+        return CrawlerRunConfig(
             cache_mode=CacheMode.BYPASS,
             extraction_strategy=self.extraction_strategy,
         )
-        dispatcher = MemoryAdaptiveDispatcher(
-            max_session_permit=5,
-            rate_limiter=RateLimiter()
+
+    def on_notify(self, message: HandshakeExtractor2Codec, ack: Acknowledgement):
+        self.on_notify_batch([message], [ack])
+
+    def on_notify_batch(self, messages: list[HandshakeExtractor2Codec], acks: list[Acknowledgement]):
+        # Called on the broker's thread: the queue belongs to the browser loop.
+        self.start()
+        for job in zip(messages, acks):
+            self.crawler_pool.loop.loop.call_soon_threadsafe(self._queue.put_nowait, job)
+
+    def start(self) -> None:
+        """Starts the stream on the browser loop of this process, if it is not running yet.
+        Called with the first message; a stream that died is started again."""
+        with self._start_lock:
+            if self._stopping or (self._stream_task is not None and not self._stream_task.done()):
+                return
+            self._stream_task = self.crawler_pool.loop.run(self._start())
+
+    async def _start(self) -> asyncio.Task:
+        task = asyncio.create_task(self._stream())
+        task.add_done_callback(self._on_stream_done)
+        return task
+
+    def _on_stream_done(self, task: asyncio.Task) -> None:
+        if not task.cancelled() and (error := task.exception()) is not None:
+            print(f'HSE2 stream died: {error!r}; queued jobs wait for the next message to restart it')
+
+    async def _stream(self):
+        failures = 0
+        while not self._stopping:
+            if (job := await self._queue.get()) is None or self._stopping:
+                if job is not None:
+                    self._unprocessed.append(job)
+                break #< woken by shutdown
+            started = False
+            try:
+                await self.auth.ensure_session()
+                self._rotate = False
+                async with self.crawler_pool.lease() as lease:
+                    started = True
+                    await self._scrape_stream(lease, job)
+                print(f'HSE2 crawled {lease.pages} pages: {self.resource_blocker.pop_stats()}')
+                failures = 0
+            except Exception as e:
+                failures += 1
+                delay = min(2 ** failures, self.config.STREAM_MAX_BACKOFF_SECONDS)
+                print(f'HSE2 stream failed: {e!r}; retrying in {delay}s')
+                if not started:
+                    self._requeue(job)
+                try:
+                    await asyncio.wait_for(self._stop_event.wait(), delay)
+                except asyncio.TimeoutError:
+                    pass
+
+    def _requeue(self, job: Job) -> None:
+        if self._stopping:
+            self._unprocessed.append(job)
+        else:
+            self._queue.put_nowait(job)
+
+    def _admits(self, lease: CrawlerLease) -> bool:
+        return (
+            not self._stopping
+            and not self._rotate
+            and len(self._in_flight) < self.config.WINDOW
+            and lease.pages < self.config.PAGES_PER_LEASE
         )
-        await self.auth.login()
-        await self.crawler.start()
-        async for result in await self.crawler.arun_many(urls, run_config, dispatcher):
-            if result.success:
-                html = json.loads(result.extracted_content)[0]['main_html']
-                self.propogate_message(result.url, html)
-                self.repo.set_e2_success(result.url, True)
+
+    def _start_scrape(self, lease: CrawlerLease, job: Job) -> None:
+        self._in_flight[asyncio.create_task(self.scrape(lease, job[0].url))] = job
+
+    async def _scrape_stream(self, lease: CrawlerLease, first: Job):
+        """Scrapes jobs on one lease, admitting queued jobs as pages finish, until the queue runs
+        dry, the lease served PAGES_PER_LEASE pages, the session expired or shutdown began."""
+        self._start_scrape(lease, first)
+        getter: Optional[asyncio.Task] = None
+        try:
+            while self._in_flight:
+                while self._admits(lease) and not self._queue.empty():
+                    if (job := self._queue.get_nowait()) is not None:
+                        self._start_scrape(lease, job)
+                if getter is None and self._admits(lease):
+                    getter = asyncio.create_task(self._queue.get())
+                waiting = [*self._in_flight, getter] if getter is not None else list(self._in_flight)
+                done, _ = await asyncio.wait(waiting, return_when=asyncio.FIRST_COMPLETED)
+                if getter in done:
+                    if (job := getter.result()) is None:
+                        pass
+                    elif self._admits(lease):
+                        self._start_scrape(lease, job)
+                    else:
+                        self._requeue(job) #< for the next lease
+                    getter = None
+                for task in done & self._in_flight.keys():
+                    self._finish(task, self._in_flight.pop(task))
+        finally:
+            if getter is not None:
+                getter.cancel()
+                if getter.done() and not getter.cancelled() and getter.result() is not None:
+                    self._unprocessed.append(getter.result())
+            # Only reached with pages in flight when the stream failed or shutdown cancelled it.
+            for task in self._in_flight:
+                task.cancel()
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+            for task, job in list(self._in_flight.items()):
+                self._finish(task, job)
+            self._in_flight.clear()
+
+    def _finish(self, task: asyncio.Task, job: Job) -> None:
+        message, ack = job
+        if task.cancelled():
+            self._requeue(job)
+            return
+        if (error := task.exception()) is not None:
+            attempts = self._attempts[ack] = self._attempts.get(ack, 0) + 1
+            if attempts < self.config.MAX_SCRAPE_ATTEMPTS:
+                print(f'HSE2 failed to scrape {message.url} (attempt {attempts}): {error!r}')
+                self._requeue(job)
             else:
-                self.repo.set_e2_success(result.url, False)
-        await self.crawler.close()
-        
+                del self._attempts[ack]
+                self._dead_letter(job, error, attempts)
+            return
+        self._attempts.pop(ack, None)
+        ack()
+
+    def _dead_letter(self, job: Job, error: BaseException, attempts: int) -> None:
+        """Records the failed scrape and forwards the job to the DLQ. The job is acknowledged once
+        the broker confirms the forwarded copy, so a job that cannot be forwarded is redelivered."""
+        message, ack = job
+        topic = self.config.TOPICS[0]
+        destination = self.config.RETRY_POLICY.dlq_topic(topic)
+
+        def on_delivery(err, _):
+            if err is not None:
+                print(f"HSE2 failed to forward {message.url} to '{destination}': {err.str()}")
+                return
+            ack()
+
+        self.repo.set_e2_success(message.url, False)
+        self.frontier.mark_crawled(message.url, False)
+        self.broker.send(
+            self.config.CODEC, destination, message, cb=on_delivery,
+            headers=failure_metadata(topic, attempts, error)
+        )
+        print(f"HSE2 gave up on {message.url} after {attempts} attempts, forwarded to '{destination}': {error!r}")
+
+    async def scrape(self, lease: CrawlerLease, url: str):
+        await self.rate_limiter.wait_if_needed(url)
+        result = await lease.arun(url, self.run_config)
+        self.rate_limiter.update_delay(url, result.status_code or 0)
+        if result.success:
+            html = json.loads(result.extracted_content)[0]['main_html']
+            self.propogate_message(result.url, html)
+            self.repo.set_e2_success(result.url, True)
+            self.frontier.mark_crawled(result.url, True)
+        else:
+            if self.auth.is_login_redirect(result.redirected_url):
+                self.auth.report_redirect() #< the next lease logs in again
+                self._rotate = True
+            self.repo.set_e2_success(result.url, False)
+            self.frontier.mark_crawled(result.url, False)
+
+    def shutdown(self, deadline: Optional[float] = None) -> list[HandshakeExtractor2Codec]:
+        """Stops admitting jobs, lets the pages in flight finish for up to deadline seconds (by
+        default SHUTDOWN_DEADLINE_SECONDS), then cancels them.
+
+        Returns the messages that were not scraped. They are never acknowledged, so their offsets
+        are not committed and they are redelivered.
+        """
+        deadline = self.config.SHUTDOWN_DEADLINE_SECONDS if deadline is None else deadline
+        loop = self.crawler_pool.loop
+        with self._start_lock:
+            unprocessed = loop.run(self._stop(deadline))
+        loop.run(self.crawler_pool.close())
+        loop.run(self.auth.close())
+        self.frontier.close()
+        print(f'HSE2 stopped with {len(unprocessed)} jobs unprocessed')
+        return unprocessed
+
+    async def _stop(self, deadline: float) -> list[HandshakeExtractor2Codec]:
+        self._stopping = True
+        self._stop_event.set()
+        self._queue.put_nowait(None) #< wakes an idle stream
+        if self._stream_task is not None:
+            done, _ = await asyncio.wait([self._stream_task], timeout=deadline)
+            if not done:
+                self._stream_task.cancel()
+                await asyncio.gather(self._stream_task, return_exceptions=True)
+        while not self._queue.empty():
+            if (job := self._queue.get_nowait()) is not None:
+                self._unprocessed.append(job)
+        unprocessed, self._unprocessed = self._unprocessed, []
+        return [message for message, _ in unprocessed]
+
     def propogate_message(self, url: str, html: str):
-        message = HandshakeTransformer2Codec(url, html)
-        self.broker.send(HandshakeTransformer2Codec, HandshakeTransformer2Codec.TOPIC, message)
\ No newline at end of file
+        message = HandshakeTransformer2BinaryCodec(url, html)
+        self.broker.send(TRANSFORMER_2_CODEC, HandshakeTransformer2BinaryCodec.TOPIC, message)
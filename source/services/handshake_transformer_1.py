@@ -1,18 +1,25 @@
 import re
 import json
 import asyncio
+import threading
 from dataclasses import dataclass
 from crawl4ai import AsyncWebCrawler, BrowserConfig, CrawlerRunConfig, JsonCssExtractionStrategy, CacheMode
-from source.broker import InterProcessGateway, IPGConsumer
-from source.codec import HandshakeTransformer1Codec, HandshakeExtractor2Codec
+from source.broker import InterProcessGateway, IPGConsumer, RetryPolicy, BatchCodec
+from source.codec import HandshakeTransformer1BinaryCodec, HandshakeExtractor2Codec, TRANSFORMER_1_CODEC, EXTRACTOR_2_CODEC
 from source.crawlers import CrawlerFactory, CrawlerFactoryConfig
-from source.database import HandshakeLake
+from source.database import HandshakeLake, UrlFrontier
 
 
 @dataclass
 class HandshakeTransformer1Config:
     source_topics = ['raw.handshake.job.stage1.v1']
-    codec = HandshakeTransformer1Codec
+    codec = TRANSFORMER_1_CODEC
+    retry_policy = RetryPolicy()
+    # The jobs of one listing page travel as a single record.
+    sink_codec = BatchCodec(EXTRACTOR_2_CODEC)
+
+    def get_frontier(self) -> UrlFrontier:
+        return UrlFrontier.from_env()
 
     def get_crawler(self) -> AsyncWebCrawler:
         return CrawlerFactory(
@@ -36,7 +43,15 @@ class HandshakeTransformer1:
         self.config = config
         self.broker = broker
         self.repo = repo
-        self.crawler = config.get_crawler()
+        self.frontier = config.get_frontier()
+        self._local = threading.local()
+
+    @property
+    def crawler(self) -> AsyncWebCrawler:
+        # One crawler per thread, so partition workers never share a browser session.
+        if (crawler := getattr(self._local, 'crawler', None)) is None:
+            crawler = self._local.crawler = self.config.get_crawler()
+        return crawler
 
     @property
     def extraction_strategy(self) -> JsonCssExtractionStrategy:
@@ -68,10 +83,12 @@ class HandshakeTransformer1:
         return IPGConsumer(
             topics=self.config.source_topics,
             codec=self.config.codec,
-            notify=self.on_notify
+            notify=self.on_notify,
+            notify_batch=self.on_notify_batch,
+            retry_policy=self.config.retry_policy
         )
 
-    def on_notify(self, message: HandshakeTransformer1Codec):
+    def on_notify(self, message: HandshakeTransformer1BinaryCodec):
         match message.action:
             case 'START_TRANSFORM':
                 asyncio.run(self.transform(message.html))
@@ -79,6 +96,11 @@ class HandshakeTransformer1:
                 pass
         return
 
+    def on_notify_batch(self, messages: list[HandshakeTransformer1BinaryCodec]):
+        htmls = [message.html for message in messages if message.action == 'START_TRANSFORM']
+        if htmls:
+            asyncio.run(self.transform_many(htmls))
+
     def get_id(self, url: str) -> int:
         pattern = r'(?<=job-search/)\d+'
         if (match := re.search(pattern, url)):
@@ -103,22 +125,34 @@ class HandshakeTransformer1:
         return messages
 
     async def transform(self, html: str):
+        await self.transform_many([html])
+
+    async def transform_many(self, htmls: list[str]):
+        # One browser session is shared by every page of the batch.
         config = CrawlerRunConfig(
             extraction_strategy=self.extraction_strategy,
             cache_mode=CacheMode.BYPASS
         )
-        await self.crawler.start()
-        result = await self.crawler.arun(f'raw:{html}', config)
-        await self.crawler.close()
-        if not result.success:
-            return
-        job_data = self.process(result.extracted_content)
-        upserted_ind = self.repo.upsert_job_postings([
-            (i.job_id, i.role, i.url) 
-            for i in job_data
-        ])
+        # Each batch runs on its own event loop (asyncio.run), which the browser cannot outlive,
+        # so it is closed with the batch, also when a page raises.
+        crawler = self.crawler
+        await crawler.start()
+        try:
+            results = [await crawler.arun(f'raw:{html}', config) for html in htmls]
+        finally:
+            await crawler.close()
+        for result in results:
+            if not result.success:
+                continue
+            self.load(result.extracted_content)
 
-        messages = [job_data[i] for i in upserted_ind]
-
-        for msg in messages:
-            self.broker.send(HandshakeExtractor2Codec, HandshakeExtractor2Codec.TOPIC, msg)
+    def load(self, extracted_content: str):
+        # The frontier decides what is crawled: new jobs, then jobs due for a refresh. Only those
+        # reach Mongo, so listing pages of known jobs cost no round-trip.
+        jobs = {job.url: job for job in self.process(extracted_content)}
+        admission = self.frontier.admit(jobs)
+        messages = [jobs[url] for url in admission.urls]
+        if not messages:
+            return
+        self.repo.upsert_job_postings([(i.job_id, i.role, i.url) for i in messages])
+        self.broker.send(self.config.sink_codec, HandshakeExtractor2Codec.TOPIC, messages)
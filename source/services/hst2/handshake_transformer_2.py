@@ -1,9 +1,9 @@
 import asyncio
 from datetime import datetime
 from dataclasses import dataclass
-from source.utilities import Stock
-from source.broker import InterProcessGateway, IPGConsumer
-from source.codec import HandshakeTransformer2Codec, HandshakeLoader1Codec
+from source.utilities import Stock, trusted_producer
+from source.broker import InterProcessGateway, IPGConsumer, RetryPolicy
+from source.codec import HandshakeTransformer2BinaryCodec, HandshakeLoader1Codec, TRANSFORMER_2_CODEC, LOADER_1_CODEC
 from source.database import HandshakeLake
 from source.services.hst2.raw import HandshakeRawDataContainer
 from source.services.hst2.clean import HandshakeCleanDataContainer
@@ -12,7 +12,8 @@ from source.services.hst2.clean import HandshakeCleanDataContainer
 @dataclass
 class HandshakeTransformer2Config:
     source_topics = ['raw.handshake.job.stage2.v1']
-    codec = HandshakeTransformer2Codec
+    codec = TRANSFORMER_2_CODEC
+    retry_policy = RetryPolicy()
 
 
 class HandshakeTransformer2:
@@ -32,10 +33,12 @@ class HandshakeTransformer2:
         return IPGConsumer(
             topics=self.config.source_topics,
             codec=self.config.codec,
-            notify=self.on_notify
+            notify=self.on_notify,
+            notify_batch=self.on_notify_batch,
+            retry_policy=self.config.retry_policy
         )
 
-    def on_notify(self, message: HandshakeTransformer2Codec):
+    def on_notify(self, message: HandshakeTransformer2BinaryCodec):
         match message.action:
             case 'START_TRANSFORM':
                 asyncio.run(self.transform(message.url, message.html, message.created_at))
@@ -43,6 +46,15 @@ class HandshakeTransformer2:
                 pass
         return
 
+    def on_notify_batch(self, messages: list[HandshakeTransformer2BinaryCodec]):
+        messages = [message for message in messages if message.action == 'START_TRANSFORM']
+        if messages:
+            asyncio.run(self.transform_many(messages))
+
+    async def transform_many(self, messages: list[HandshakeTransformer2BinaryCodec]):
+        for message in messages:
+            await self.transform(message.url, message.html, message.created_at)
+
     async def transform(self, url: str, html: str, scraped_at: datetime):
         raw_container = HandshakeRawDataContainer(html)
         clean_container = HandshakeCleanDataContainer(raw_container, scraped_at)
@@ -55,4 +67,5 @@ class HandshakeTransformer2:
         message_props = stock.collect(HandshakeLoader1Codec.Props)
         message = HandshakeLoader1Codec(**message_props)
         self.repo.upsert_enriched_job_data(clean_data)
-        self.broker.send(HandshakeLoader1Codec, HandshakeLoader1Codec.TOPIC, message)
\ No newline at end of file
+        with trusted_producer(): #< stock.collect already validated the props
+            self.broker.send(LOADER_1_CODEC, HandshakeLoader1Codec.TOPIC, message)
\ No newline at end of file
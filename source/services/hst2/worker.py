@@ -0,0 +1,17 @@
+import os
+from source.broker import InterProcessGateway, WorkerSetup, KafkaConnectionConfig, KafkaProducerConfig, IPGMetrics
+from source.database import HandshakeLake
+from source.services.hst2.handshake_transformer_2 import HandshakeTransformer2
+
+
+def setup_transformer_worker() -> WorkerSetup:
+    # Runs in each partition worker process: parsing is CPU-bound, so every worker gets its own
+    # transformer, data lake connection and producer.
+    broker = InterProcessGateway(
+        config=KafkaConnectionConfig(producer_config=KafkaProducerConfig.from_env(preset='throughput')),
+        metrics=IPGMetrics.from_env(f'hst2-worker-{os.getpid()}')
+    )
+    repo = HandshakeLake('handshake')
+    repo.connect()
+    transformer = HandshakeTransformer2(broker=broker, repo=repo)
+    return WorkerSetup(consumers=[transformer.consumer_info], gateway=broker)
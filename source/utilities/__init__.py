@@ -1,5 +1,6 @@
 from .kafka_topic_manager import KafkaTopicManager
 from .backoff import async_exponential_backoff_with_jitter
+from .validation import get_type_adapter, validate_python, validate_outgoing, trusted_producer, is_trusted_producer
 from .stock import Stock
 from .as_typed_dict import as_typed_dict
 from .class_property_decorator import classproperty
@@ -27,6 +28,11 @@ __all__ = [
     'classproperty', 
     'as_typed_dict', 
     'Stock',
+    'get_type_adapter',
+    'validate_python',
+    'validate_outgoing',
+    'trusted_producer',
+    'is_trusted_producer',
     'async_exponential_backoff_with_jitter',
     'SyncEmbedChunks',
     'AsyncEmbedChunks',
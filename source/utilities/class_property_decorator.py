@@ -1,21 +1,29 @@
 class classproperty:
-    """Decorator for class-level properties (read-only)"""
+    """Decorator for class-level properties (read-only)
+
+    With cached=True, the result is computed once per class (subclasses get their own), and
+    falsy results are cached too.
+    """
     
     def __init__(self, func=None, *, cached=False):
         self.func = func
-        self.__doc__ = func.__doc__
+        self.__doc__ = None if func is None else func.__doc__
         self.cached = cached
-        self._cache = None
+        self._cache = {}
     
     def __get__(self, obj, objtype=None):
-        if self.cached and self._cache:
-            return self._cache
         if objtype is None:
             # The objtype is the class definition, and this guard protects against
             # the abnormal edge case where Python doesn't pass an objtype.
             objtype = type(obj)
+        if self.cached:
+            try:
+                return self._cache[objtype]
+            except KeyError:
+                pass
         result = self.func(objtype)
-        self._cache = result
+        if self.cached:
+            self._cache[objtype] = result
         return result
     
     def __set__(self, obj, value):
@@ -24,4 +32,5 @@ class classproperty:
     def __call__(self, func):
         # Support decorator usage with parameters: @classproperty(...)
         self.func = func
-        return self
\ No newline at end of file
+        self.__doc__ = func.__doc__
+        return self
@@ -1,5 +1,6 @@
 from typing import TypedDict, TypeVar, is_typeddict
-from pydantic import TypeAdapter, ValidationError
+from pydantic import ValidationError
+from source.utilities.validation import get_type_adapter
 
 
 GenericTypedDict = TypeVar('GenericTypedDict')
@@ -21,7 +22,7 @@ class Stock:
     def collect(self, typed_dict: type[GenericTypedDict]) -> GenericTypedDict | None:
         if not is_typeddict(typed_dict):
             raise ValueError("Error: expected typed_dict to be a 'TypedDict' type hint")
-        ta = TypeAdapter(typed_dict)
+        ta = get_type_adapter(typed_dict)
         try:
             ta.validate_python(self.inventory)
         except ValidationError:
@@ -0,0 +1,58 @@
+import contextlib
+from contextvars import ContextVar
+from functools import lru_cache
+from typing import Any, Iterator, TypeVar
+from pydantic import TypeAdapter
+
+
+T = TypeVar('T')
+
+_trusted_producer: ContextVar[bool] = ContextVar('trusted_producer', default=False)
+
+
+@lru_cache(maxsize=None)
+def _cached_type_adapter(tp: Any) -> TypeAdapter:
+    return TypeAdapter(tp)
+
+
+def get_type_adapter(tp: type[T]) -> TypeAdapter[T]:
+    """Returns the compiled validator of a type; building one is far slower than using it.
+
+    Adapters are memoized per type, so the same type object must be passed around (e.g. a
+    cached classproperty) rather than rebuilt for every call.
+    """
+    try:
+        return _cached_type_adapter(tp)
+    except TypeError: #< unhashable type, e.g. Annotated with unhashable metadata
+        return TypeAdapter(tp)
+
+
+def validate_python(tp: type[T], value: Any) -> T:
+    return get_type_adapter(tp).validate_python(value)
+
+
+@contextlib.contextmanager
+def trusted_producer() -> Iterator[None]:
+    """Skips validate_outgoing in this context, for payloads built from already validated data.
+
+    Example:
+    >> props = Stock(clean_data).collect(HandshakeLoader1Codec.Props)  #< validated here
+    >> with trusted_producer():
+    >>     broker.send(HandshakeLoader1Codec, HandshakeLoader1Codec.TOPIC, HandshakeLoader1Codec(**props))
+    """
+    token = _trusted_producer.set(True)
+    try:
+        yield
+    finally:
+        _trusted_producer.reset(token)
+
+
+def is_trusted_producer() -> bool:
+    return _trusted_producer.get()
+
+
+def validate_outgoing(tp: type[T], value: Any) -> T:
+    """Validates a payload about to be sent, unless the caller is a trusted producer."""
+    if _trusted_producer.get():
+        return value
+    return validate_python(tp, value)
@@ -0,0 +1,59 @@
+import pytest
+from source.codec import HandshakeTransformer2BinaryCodec
+from source.codec.claim_check import get_claim_check_store, check_in, check_out
+from source.codec.compression import get_compression_registry
+from source.database import FileSystemBlobStore, blob_digest
+
+HTML = b'<main>' + b'job posting ' * 100 + b'</main>'
+
+
+@pytest.fixture()
+def store(tmp_path) -> FileSystemBlobStore:
+    return FileSystemBlobStore(tmp_path / 'blobs')
+
+@pytest.fixture()
+def environment(monkeypatch, store):
+    # The claim-check store and the registry are read from the environment once per process.
+    monkeypatch.setenv('SCRAWLER_BLOB_STORE', 'filesystem')
+    monkeypatch.setenv('SCRAWLER_BLOB_DIR', str(store.root))
+    monkeypatch.delenv('SCRAWLER_HTML_COMPRESSION', raising=False)
+    get_claim_check_store.cache_clear()
+    get_compression_registry.cache_clear()
+    yield
+    get_claim_check_store.cache_clear()
+    get_compression_registry.cache_clear()
+
+def test_blobs_are_stored_once_under_their_digest(store):
+    digest = store.put(HTML)
+    assert digest == blob_digest(HTML)
+    assert store.put(HTML) == digest
+    assert store.get(digest) == HTML
+    assert [path.name for path in store.root.rglob('*') if path.is_file()] == [digest]
+    with pytest.raises(KeyError):
+        store.get(blob_digest(b'never stored'))
+
+def test_check_out_verifies_the_blob(store):
+    reference = check_in(store, HTML)
+    assert check_out(store, reference) == HTML
+
+    path = store._path(blob_digest(HTML))
+    path.write_bytes(HTML.replace(b'job', b'jab')) #< same size, other digest
+    with pytest.raises(ValueError, match='corrupt'):
+        check_out(store, reference)
+    path.write_bytes(HTML[:-1])
+    with pytest.raises(ValueError, match='corrupt'):
+        check_out(store, reference)
+    path.unlink()
+    with pytest.raises(KeyError):
+        check_out(store, reference)
+
+def test_claim_check_messages_round_trip(store, environment):
+    message = HandshakeTransformer2BinaryCodec('/jobs/1', HTML.decode())
+    value, headers = HandshakeTransformer2BinaryCodec.serialize(message), HandshakeTransformer2BinaryCodec.headers(message)
+    assert len(value) < len(HTML) and b'sha256' in dict(headers).values()
+    assert HandshakeTransformer2BinaryCodec.deserialize(value, headers) == message
+
+    # A message whose blob is gone cannot be decoded (and goes to the retry topics).
+    store._path(blob_digest(check_out(store, value))).unlink()
+    with pytest.raises(KeyError):
+        HandshakeTransformer2BinaryCodec.deserialize(value, headers)
@@ -1,9 +1,12 @@
+import asyncio
 import pytest
 from source import (
     KafkaConnectionConfig,
     KafkaConsumerConfig,
     KafkaProducerConfig,
     InterProcessGateway,
+    AsyncInterProcessGateway,
+    MemoryBroker,
     JsonCodec,
     IPGConsumer
 )
@@ -23,6 +26,21 @@ def conn_config():
     )
     return kafka_connection
 
+@pytest.fixture()
+def memory_config(request):
+    name = f'memory-{request.node.name}'
+    yield KafkaConnectionConfig(
+        consumer_config=KafkaConsumerConfig(
+            bootstrap_servers=name,
+            group_id="scrawler_pytest",
+            auto_offset_reset='earliest',
+            enable_auto_commit=False
+        ),
+        producer_config=KafkaProducerConfig(bootstrap_servers=name),
+        backend='memory'
+    )
+    MemoryBroker.reset(name)
+
 @pytest.fixture(scope='session')
 def broker(conn_config):
     ipg = InterProcessGateway(conn_config)
@@ -72,4 +90,54 @@ def test_round_trip(broker, consumers, producers):
     broker.set_consumers(consumers)
     for _ in range(RUN_FOR):
         broker.listen(timeout=1.0)
-        broker.emit()
\ No newline at end of file
+        broker.emit()
+
+def received_by(consumers, on_notify, on_notify_batch=None):
+    received = [[] for _ in consumers]
+    bound = [
+        IPGConsumer(
+            c.topics, c.codec, on_notify(received[i]),
+            None if on_notify_batch is None else on_notify_batch(received[i])
+        )
+        for i, c in enumerate(consumers)
+    ]
+    return received, bound
+
+def test_round_trip_batch(memory_config, consumers, producers, pytest_payload):
+    broker = InterProcessGateway(memory_config)
+    batches = []
+    def on_notify_batch(received):
+        def notify_batch(payloads):
+            batches.append(len(payloads))
+            received.extend(payloads)
+        return notify_batch
+    received, batch_consumers = received_by(consumers, lambda received: received.append, on_notify_batch)
+    for p in producers:
+        broker.send(*p)
+    broker.set_consumers(batch_consumers)
+    for _ in range(10):
+        broker.listen_batch(num_messages=100, timeout=0.01)
+        broker.emit()
+    broker.close()
+    # Each consumer reads its topics once: pytest_topic_2 holds two messages, the others one.
+    assert received == [[pytest_payload] * 3, [pytest_payload] * 3]
+    assert sum(batches) == 6
+
+@pytest.mark.asyncio
+async def test_async_round_trip(memory_config, consumers, producers, pytest_payload):
+    broker = AsyncInterProcessGateway(memory_config, max_in_flight=4)
+    def on_notify(received):
+        async def notify(payload):
+            await asyncio.sleep(0)
+            received.append(payload)
+        return notify
+    received, async_consumers = received_by(consumers, on_notify)
+    for p in producers:
+        broker.send(*p)
+    broker.set_consumers(async_consumers)
+    for _ in range(10):
+        await broker.alisten(timeout=0.01)
+        broker.emit()
+    await broker.drain()
+    broker.close()
+    assert received == [[pytest_payload] * 3, [pytest_payload] * 3]
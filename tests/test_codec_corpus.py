@@ -0,0 +1,36 @@
+import os
+import pytest
+from source.codec import json_backend
+from source.codec.corpus import CORPUS_CODECS, default_corpus_path, read_corpus, encode, decode, codec_name
+
+CORPUS_PATH = default_corpus_path()
+if not os.path.exists(CORPUS_PATH):
+    pytest.skip(f'No codec corpus at {CORPUS_PATH} (see tools/capture_codec_corpus.py)', allow_module_level=True)
+
+CORPUS = list(read_corpus(CORPUS_PATH))
+
+
+@pytest.fixture(params=list(json_backend.JSON_BACKENDS))
+def backend(request):
+    previous = json_backend.get_json_backend().name
+    json_backend.set_json_backend(request.param)
+    yield request.param
+    json_backend.set_json_backend(previous)
+
+def codec_cases():
+    return [
+        pytest.param(topic, codec, id=f'{topic}-{codec_name(codec)}')
+        for topic, codecs in CORPUS_CODECS.items()
+        for codec in codecs
+    ]
+
+
+@pytest.mark.parametrize('topic,codec', codec_cases())
+def test_captured_messages_survive_a_round_trip(topic, codec, backend):
+    records = [record for record in CORPUS if record.topic == topic]
+    if not records:
+        pytest.skip(f'The corpus holds no {topic} messages')
+    pipeline_codec = CORPUS_CODECS[topic][0]
+    for record in records:
+        message = decode(pipeline_codec, record.value, record.headers)
+        assert decode(codec, *encode(codec, message)) == message
@@ -0,0 +1,80 @@
+import random
+import pytest
+import zstandard
+from source.codec import HandshakeTransformer2BinaryCodec
+from source.codec.claim_check import get_claim_check_store
+from source.codec.compression import CompressionRegistry, DictionaryStore, get_compression_registry
+
+
+def job_page(rng: random.Random, template: str) -> bytes:
+    words = ' '.join(rng.choice(['python', 'data', 'intern', 'remote', 'summer', 'analyst']) for _ in range(40))
+    return template.format(id=rng.randrange(10 ** 6), words=words).encode()
+
+def train(template: str, seed: int) -> zstandard.ZstdCompressionDict:
+    rng = random.Random(seed)
+    return zstandard.train_dictionary(2048, [job_page(rng, template) for _ in range(400)])
+
+LAYOUT_1 = '<html><main class="job-posting" data-id="{id}"><h1>Job {id}</h1><section>{words}</section></main></html>'
+LAYOUT_2 = '<div id="root"><article role="main" data-job="{id}"><header>Posting {id}</header><p>{words}</p></article></div>'
+
+
+@pytest.fixture()
+def store(tmp_path) -> DictionaryStore:
+    return DictionaryStore(tmp_path / 'dictionaries')
+
+@pytest.fixture()
+def environment(monkeypatch, store):
+    # The registry and the claim-check store are read from the environment once per process.
+    monkeypatch.setenv('SCRAWLER_HTML_COMPRESSION', 'zstd')
+    monkeypatch.setenv('SCRAWLER_ZSTD_DICTIONARY_DIR', str(store.directory))
+    monkeypatch.delenv('SCRAWLER_BLOB_STORE', raising=False)
+    get_compression_registry.cache_clear()
+    get_claim_check_store.cache_clear()
+    yield
+    get_compression_registry.cache_clear()
+    get_claim_check_store.cache_clear()
+
+def test_dictionaries_are_versioned_and_never_overwritten(store):
+    assert store.latest() is None
+    assert store.save(train(LAYOUT_1, 1)) == 'handshake-v1'
+    assert store.save(train(LAYOUT_2, 2)) == 'handshake-v2'
+    DictionaryStore(store.directory, prefix='other').save(train(LAYOUT_2, 3))
+    assert store.versions() == [1, 2]
+    assert store.latest() == 'handshake-v2'
+    with pytest.raises(ValueError):
+        store.load('handshake-v3')
+
+def test_rotated_dictionaries_decode_older_messages(store):
+    page = job_page(random.Random(0), LAYOUT_1)
+    store.save(train(LAYOUT_1, 1))
+    producer = CompressionRegistry('zstd', store)
+    old = producer.default()
+    assert old.dictionary == 'handshake-v1'
+    old_data = old.compress(page)
+
+    store.save(train(LAYOUT_2, 2))
+    # A running producer keeps its dictionary; it picks up the new one on restart.
+    assert producer.default() is old
+    new = CompressionRegistry('zstd', store).default()
+    assert new.dictionary == 'handshake-v2'
+    new_data = new.compress(page)
+
+    consumer = CompressionRegistry('zstd', DictionaryStore(store.directory))
+    for name, data in [('handshake-v1', old_data), ('handshake-v2', new_data)]:
+        assert zstandard.get_frame_parameters(data).dict_id == store.load(name).dict_id()
+        assert consumer.get('zstd', name).decompress(memoryview(data)) == page
+
+def test_envelopes_written_before_a_rotation_still_decode(store, environment):
+    store.save(train(LAYOUT_1, 1))
+    before = HandshakeTransformer2BinaryCodec('/jobs/1', job_page(random.Random(1), LAYOUT_1).decode())
+    old_message = (HandshakeTransformer2BinaryCodec.serialize(before), HandshakeTransformer2BinaryCodec.headers(before))
+    assert b'handshake-v1' in dict(old_message[1]).values()
+
+    store.save(train(LAYOUT_2, 2))
+    get_compression_registry.cache_clear() #< the producer restarts
+    after = HandshakeTransformer2BinaryCodec('/jobs/2', job_page(random.Random(2), LAYOUT_2).decode())
+    new_message = (HandshakeTransformer2BinaryCodec.serialize(after), HandshakeTransformer2BinaryCodec.headers(after))
+    assert b'handshake-v2' in dict(new_message[1]).values()
+
+    assert HandshakeTransformer2BinaryCodec.deserialize(*old_message) == before
+    assert HandshakeTransformer2BinaryCodec.deserialize(*new_message) == after
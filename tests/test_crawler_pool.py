@@ -0,0 +1,83 @@
+import asyncio
+import multiprocessing
+from source.crawlers.base import CrawlerPool, EventLoopThread, get_browser_loop
+
+
+class StandInCrawler:
+
+    def __init__(self, log: list[str]) -> None:
+        self.log = log
+
+    async def start(self):
+        self.log.append('start')
+
+    async def close(self):
+        self.log.append('close')
+
+    async def arun(self, url, config=None, **kwargs):
+        return url
+
+
+class StandInFactory:
+
+    def __init__(self) -> None:
+        self.log: list[str] = []
+
+    def create_crawler(self) -> StandInCrawler:
+        return StandInCrawler(self.log)
+
+
+def test_crawlers_stay_warm_until_recycled():
+    loop = EventLoopThread()
+    factory = StandInFactory()
+    pool = CrawlerPool(factory, max_pages=3, loop=loop)
+
+    async def crawl(n: int):
+        async with pool.lease() as lease:
+            for i in range(n):
+                await lease.arun(f'/jobs/{i}')
+
+    loop.run(crawl(2))
+    loop.run(crawl(1)) #< reaches max_pages
+    loop.run(crawl(1))
+    pool.invalidate()  #< e.g. after a login
+    loop.run(crawl(1))
+    assert factory.log == ['start', 'close', 'start', 'close', 'start']
+    stats = pool.stats()
+    assert (stats.leases, stats.pages, stats.cold_starts, stats.recycles, stats.started) == (4, 5, 3, 2, 1)
+    loop.run(pool.close())
+    assert factory.log[-1] == 'close' and pool.stats().started == 0
+    loop.close()
+
+def test_leases_wait_for_a_free_crawler():
+    loop = EventLoopThread()
+    pool = CrawlerPool(StandInFactory(), size=2, loop=loop)
+    peak = []
+
+    async def crawl():
+        async with pool.lease():
+            peak.append(pool.stats().leased)
+            await asyncio.sleep(0.01)
+
+    async def crawl_all():
+        await asyncio.gather(*(crawl() for _ in range(6)))
+
+    loop.run(crawl_all())
+    assert max(peak) == 2 and pool.stats().cold_starts == 2
+    loop.close()
+
+def test_forked_children_start_their_own_browser_loop():
+    parent_loop = get_browser_loop()
+    assert parent_loop.run(asyncio.sleep(0, 'parent')) == 'parent'
+
+    def child(results):
+        loop = get_browser_loop()
+        results.put((loop is not parent_loop, loop.run(asyncio.sleep(0, 'child'))))
+
+    context = multiprocessing.get_context('fork')
+    results = context.Queue()
+    process = context.Process(target=child, args=(results,))
+    process.start()
+    assert results.get(timeout=10) == (True, 'child')
+    process.join(timeout=10)
+    assert get_browser_loop() is parent_loop
@@ -60,10 +60,10 @@ def E1_CMD():
 
 @pytest.fixture()
 def TOPIC_NAMES():
-    topics_hse1 = MCPHandshakeExtractor1Model.EXTRACTOR.consumer_info.topics
-    topics_hst1 = MCPHandshakeTransformer1Model.TRANSFORMER.consumer_info.topics
-    topics_hse2 = MCPHandshakeExtractor2Model.EXTRACTOR.consumer_info.topics
-    topics_hst2 = MCPHandshakeTransformer2Model.TRANSFORMER.consumer_info.topics
+    topics_hse1 = MCPHandshakeExtractor1Model().EXTRACTOR.consumer_info.topics
+    topics_hst1 = MCPHandshakeTransformer1Model().TRANSFORMER.consumer_info.topics
+    topics_hse2 = MCPHandshakeExtractor2Model().EXTRACTOR.consumer_info.topics
+    topics_hst2 = MCPHandshakeTransformer2Model().TRANSFORMER.consumer_info.topics
     return topics_hse1 + topics_hst1 + topics_hse2 + topics_hst2
 
 
@@ -0,0 +1,95 @@
+import json
+import time
+from dataclasses import dataclass
+from pathlib import Path
+import pytest
+from source.crawlers.base import CrawlerPool, EventLoopThread
+from source.services.handshake_auth import HandshakeAuth, HandshakeAuthConfig, LoginError, session_expiry
+
+
+@dataclass
+class StandInResult:
+    success: bool
+    error_message: str = ''
+
+
+class StandInSite:
+    """Plays Handshake: logins save a session cookie, auth checks pass while it is valid."""
+
+    def __init__(self, session_storage: Path) -> None:
+        self.session_storage = session_storage
+        self.valid = True
+        self.login_works = True
+        self.calls: list[str] = []
+
+    def factory(self, kind: str):
+        site = self
+
+        class Crawler:
+            async def start(self): pass
+            async def close(self): pass
+            async def arun(self, url, config=None, **kwargs):
+                site.calls.append(kind)
+                if kind == 'login':
+                    if not site.login_works:
+                        return StandInResult(False, 'wrong password')
+                    site.valid = True
+                    cookie = {'name': 'session', 'domain': '.joinhandshake.com', 'expires': time.time() + 3600}
+                    site.session_storage.write_text(json.dumps({'cookies': [cookie]}))
+                return StandInResult(site.valid)
+
+        class Factory:
+            def create_crawler(self):
+                return Crawler()
+
+        return Factory()
+
+
+@pytest.fixture()
+def auth(tmp_path):
+    session_storage = tmp_path / 'handshake.json'
+    site = StandInSite(session_storage)
+    loop = EventLoopThread()
+    auth = HandshakeAuth(HandshakeAuthConfig('user', 'pass', str(session_storage), check_interval_seconds=60), loop)
+    auth.login_pool = CrawlerPool(site.factory('login'), max_pages=1, loop=loop)
+    auth.auth_check_pool = CrawlerPool(site.factory('check'), loop=loop)
+    auth._session_pools = [auth.auth_check_pool]
+    yield auth, site, loop
+    loop.close()
+
+def test_logs_in_only_when_the_session_is_not_valid(auth):
+    auth, site, loop = auth
+    loop.run(auth.ensure_session())   #< no session saved yet
+    loop.run(auth.ensure_session())   #< trusted: checked less than a minute ago
+    assert site.calls == ['login']
+    auth._checked_at -= 120
+    loop.run(auth.ensure_session())   #< periodic check passes
+    assert site.calls == ['login', 'check']
+    auth.report_redirect()
+    loop.run(auth.ensure_session())
+    assert site.calls == ['login', 'check', 'login']
+    site.valid = False
+    auth._checked_at -= 120
+    loop.run(auth.ensure_session())   #< check fails, so log in again
+    assert site.calls == ['login', 'check', 'login', 'check', 'login']
+
+def test_failed_logins_raise(auth):
+    auth, site, loop = auth
+    site.login_works = False
+    with pytest.raises(LoginError, match='wrong password'):
+        loop.run(auth.ensure_session())
+    assert site.calls == ['login']
+    site.login_works = True
+    loop.run(auth.ensure_session())   #< the next call logs in again
+    assert site.calls == ['login', 'login']
+
+def test_session_expiry_reads_cookies(tmp_path):
+    path = tmp_path / 'state.json'
+    path.write_text(json.dumps({'cookies': [
+        {'name': 'session', 'domain': '.joinhandshake.com', 'expires': 2000},
+        {'name': 'tracker', 'domain': 'app.joinhandshake.com', 'expires': 1000},
+        {'name': 'other', 'domain': 'example.com', 'expires': 3000},
+    ]}))
+    assert session_expiry(str(path), 'app.joinhandshake.com') == 2000
+    assert session_expiry(str(path), 'app.joinhandshake.com', ('tracker',)) == 1000
+    assert session_expiry(str(tmp_path / 'missing.json'), 'app.joinhandshake.com') is None
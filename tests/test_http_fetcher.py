@@ -0,0 +1,36 @@
+import asyncio
+import json
+import httpx
+from source.crawlers.base import HttpFetcher
+
+
+def test_fetches_with_session_cookies_and_reports_redirects(tmp_path):
+    storage_state = tmp_path / 'handshake.json'
+    storage_state.write_text(json.dumps({'cookies': [
+        {'name': 'session', 'value': 'abc', 'domain': '.joinhandshake.com', 'path': '/'}
+    ]}))
+    throttled = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        if request.url.path == '/login':
+            return httpx.Response(200, text='<form>login</form>')
+        if 'session=abc' not in request.headers.get('cookie', ''):
+            return httpx.Response(302, headers={'location': 'https://app.joinhandshake.com/login'})
+        if request.url.params.get('page') == '2' and not throttled:
+            throttled.append(request)
+            return httpx.Response(429)
+        return httpx.Response(200, text=f'<a role="button" href="/jobs/{request.url.params["page"]}">')
+
+    async def fetch_all(fetcher: HttpFetcher) -> dict:
+        results = {r.url: r async for r in fetcher.fetch_many([f'https://app.joinhandshake.com/job-search/?page={i}' for i in (1, 2)])}
+        await fetcher.aclose()
+        return results
+
+    results = asyncio.run(fetch_all(HttpFetcher(str(storage_state), transport=httpx.MockTransport(handler))))
+    assert all(r.success and r.redirected_url is None for r in results.values())
+    assert results['https://app.joinhandshake.com/job-search/?page=2'].html == '<a role="button" href="/jobs/2">'
+    assert len(throttled) == 1
+
+    storage_state.write_text('{}') #< e.g. before the first login
+    results = asyncio.run(fetch_all(HttpFetcher(str(storage_state), transport=httpx.MockTransport(handler))))
+    assert all(r.redirected_url == 'https://app.joinhandshake.com/login' for r in results.values())
@@ -0,0 +1,121 @@
+from dataclasses import dataclass, field
+import httpx
+from source.crawlers.base import CrawlerPool, HttpFetcher, ResourceBlocker
+from source.database import UrlFrontier, UrlFrontierConfig
+from source.services.handshake_extractor_1 import HandshakeExtractor1, HandshakeExtractor1Config, listing_job_ids
+
+
+def listing_html(job_ids: list[int]) -> str:
+    return ''.join(f'<a role="button" aria-label="View Job {i}" href="/job-search/{i}?page=1">' for i in job_ids)
+
+
+@dataclass
+class StandInResult:
+    success: bool = True
+    html: str = ''
+    redirected_url: str | None = None
+
+
+class StandInCrawler:
+    async def start(self): pass
+    async def close(self): pass
+    async def arun(self, url, config=None, **kwargs):
+        return StandInResult() #< rendered pages past the last listing hold no jobs
+
+
+class StandInFactory:
+    def create_crawler(self):
+        return StandInCrawler()
+
+
+class StandInAuth:
+    def add_session_pool(self, pool): pass
+    async def ensure_session(self): pass
+    def is_login_redirect(self, url): return False
+    def report_redirect(self): pass
+
+
+class RecordingBroker:
+    def __init__(self) -> None:
+        self.sent = []
+        self.undelivered = 0
+
+    def send(self, codec, topic, message):
+        self.sent.append(listing_job_ids(message.html))
+
+    def flush(self, timeout):
+        return self.undelivered
+
+
+@dataclass(frozen=True)
+class StandInConfig(HandshakeExtractor1Config):
+    fetch_backend: str = 'http'
+    frontier_path: str = ''
+    # Listing pages (1-based), newest jobs first.
+    pages: list[list[int]] = field(default_factory=list)
+    requested: list[int] = field(default_factory=list)
+
+    def get_auth(self):
+        return StandInAuth()
+
+    def get_frontier(self):
+        return UrlFrontier(UrlFrontierConfig(path=self.frontier_path))
+
+    def get_fetcher(self):
+
+        def handler(request: httpx.Request) -> httpx.Response:
+            page = int(request.url.params['page'])
+            self.requested.append(page)
+            return httpx.Response(200, text=listing_html(self.pages[page - 1] if page <= len(self.pages) else []))
+
+        return HttpFetcher('missing.json', transport=httpx.MockTransport(handler))
+
+    def get_crawler_pool(self, resource_blocker: ResourceBlocker):
+        return CrawlerPool(StandInFactory())
+
+
+def test_listing_job_ids_reads_job_links_in_page_order():
+    html = listing_html([3, 1]) + '<a href="/job-search/9">' + '<a role="button" href="/jobs/7">' + listing_html([3])
+    assert listing_job_ids(html) == [3, 1, 7]
+
+
+def test_incremental_extract_stops_at_known_jobs(tmp_path):
+    config = StandInConfig(frontier_path=str(tmp_path / 'frontier.sqlite3'), pages=[[60, 59], [58, 57], [56, 55], [54, 53]])
+    broker = RecordingBroker()
+    extractor = HandshakeExtractor1(broker, config)
+    extractor.frontier.admit([config.job_url.format(i) for i in (56, 55, 54, 53)])
+
+    extractor.crawler_pool.loop.run(extractor._extract_incremental(1, 40, 2))
+    assert broker.sent == [[60, 59], [58, 57]]
+    assert config.requested == [1, 2, 3]
+    assert extractor.frontier.get_watermark(config.watermark_name) == 60
+
+    # Two jobs were posted since: only the first page is new. The watermark alone marks the
+    # jobs of the last crawl as known, whether or not HST1 admitted them yet.
+    config.pages[:] = [[62, 61], [60, 59], [58, 57]]
+    broker.sent.clear()
+    config.requested.clear()
+    extractor.crawler_pool.loop.run(extractor._extract_incremental(1, 40, 2))
+    assert broker.sent == [[62, 61]]
+    assert config.requested == [1, 2]
+    assert extractor.frontier.get_watermark(config.watermark_name) == 62
+
+
+def test_incremental_extract_keeps_the_watermark_without_full_coverage(tmp_path):
+    config = StandInConfig(frontier_path=str(tmp_path / 'frontier.sqlite3'), pages=[[60, 59], [58, 57], [56, 55]])
+    broker = RecordingBroker()
+    extractor = HandshakeExtractor1(broker, config)
+    extractor.frontier.set_watermark(config.watermark_name, 50)
+
+    # No known job within end_page: jobs 56-51 may be missing, so the watermark stays put.
+    extractor.crawler_pool.loop.run(extractor._extract_incremental(1, 2, 2))
+    assert broker.sent == [[60, 59], [58, 57]]
+    assert extractor.frontier.get_watermark(config.watermark_name) == 50
+
+    # Pages the broker did not deliver do not move it either.
+    broker.undelivered = 1
+    extractor.crawler_pool.loop.run(extractor._extract_incremental(1, 40, 2))
+    assert extractor.frontier.get_watermark(config.watermark_name) == 50
+    broker.undelivered = 0
+    extractor.crawler_pool.loop.run(extractor._extract_incremental(1, 40, 2))
+    assert extractor.frontier.get_watermark(config.watermark_name) == 60
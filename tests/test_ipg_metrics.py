@@ -0,0 +1,127 @@
+import json
+import pytest
+from source import (
+    KafkaConnectionConfig,
+    KafkaConsumerConfig,
+    KafkaProducerConfig,
+    InterProcessGateway,
+    IPGMetrics,
+    MemoryBroker,
+    JsonCodec,
+    IPGConsumer,
+    render_prometheus
+)
+
+TOPIC = 'pytest_metrics_topic'
+
+
+class RecordingSink:
+    def __init__(self) -> None:
+        self.snapshots = []
+
+    def export(self, snapshot):
+        self.snapshots.append(snapshot)
+
+    def close(self):
+        pass
+
+
+@pytest.fixture()
+def servers(request):
+    name = f'memory-{request.node.name}'
+    yield name
+    MemoryBroker.reset(name)
+
+def get_config(servers: str) -> KafkaConnectionConfig:
+    return KafkaConnectionConfig(
+        consumer_config=KafkaConsumerConfig(
+            bootstrap_servers=servers,
+            group_id='scrawler_pytest',
+            auto_offset_reset='earliest',
+            enable_auto_commit=False
+        ),
+        producer_config=KafkaProducerConfig(bootstrap_servers=servers),
+        backend='memory'
+    )
+
+def test_counters_add_up_per_topic():
+    metrics = IPGMetrics('hst1')
+    metrics.record_consumed('a', 10)
+    metrics.record_consumed('a', 30, num_messages=3)
+    metrics.record_produced('b', 7)
+    metrics.record_delivery_failure('b')
+    metrics.observe_deserialize('a', 0.5, num_messages=4)
+    metrics.observe_handler('a', 0.25)
+    metrics.observe_handler('a', 0.25, num_messages=3)
+    topics = metrics.snapshot()['topics']
+    assert topics['a'] == {
+        'messages_consumed': 4, 'bytes_consumed': 40, 'messages_produced': 0, 'bytes_produced': 0,
+        'delivery_failures': 0, 'deserialize_seconds': 0.5, 'deserialize_count': 4,
+        'handler_seconds': 0.5, 'handler_count': 4
+    }
+    assert topics['b']['messages_produced'] == 1 and topics['b']['delivery_failures'] == 1
+
+def test_statistics_keep_lag_and_queue_depths():
+    metrics = IPGMetrics('hst1')
+    metrics.record_statistics(json.dumps({
+        'name': 'consumer-1', 'type': 'consumer', 'msg_cnt': 0, 'msg_size': 0, 'replyq': 2,
+        'topics': {'a': {'partitions': {
+            '0': {'consumer_lag': 5, 'fetchq_cnt': 1},
+            '-1': {'consumer_lag': -1, 'fetchq_cnt': 0}
+        }}}
+    }))
+    metrics.record_statistics(json.dumps({'name': 'producer-1', 'type': 'producer', 'msg_cnt': 3, 'msg_size': 90, 'replyq': 0}))
+    snapshot = metrics.snapshot()
+    assert snapshot['partitions'] == [{'topic': 'a', 'partition': 0, 'consumer_lag': 5, 'fetchq_cnt': 1}]
+    assert snapshot['queues'] == {
+        'consumer-1': {'msg_cnt': 0, 'msg_size': 0, 'replyq': 2},
+        'producer-1': {'msg_cnt': 3, 'msg_size': 90, 'replyq': 0}
+    }
+
+def test_render_prometheus():
+    text = render_prometheus({
+        'stage': 'hs"t1',
+        'timestamp': 0.0,
+        'topics': {'a': {
+            'messages_consumed': 4, 'bytes_consumed': 40, 'messages_produced': 0, 'bytes_produced': 0,
+            'delivery_failures': 0, 'deserialize_seconds': 0.5, 'deserialize_count': 4,
+            'handler_seconds': 0.5, 'handler_count': 4
+        }},
+        'partitions': [{'topic': 'a', 'partition': 0, 'consumer_lag': 5, 'fetchq_cnt': 1}],
+        'queues': {},
+    })
+    lines = text.splitlines()
+    assert lines[:3] == [
+        '# HELP scrawler_ipg_messages_consumed_total Messages consumed',
+        '# TYPE scrawler_ipg_messages_consumed_total counter',
+        'scrawler_ipg_messages_consumed_total{stage="hs\\"t1",topic="a"} 4',
+    ]
+    assert 'scrawler_kafka_consumer_lag{stage="hs\\"t1",topic="a",partition="0"} 5' in lines
+    assert '# TYPE scrawler_kafka_consumer_lag gauge' in lines
+    # Timings are summaries: one family, with _sum and _count samples.
+    start = lines.index('# TYPE scrawler_ipg_handler_seconds summary')
+    assert lines[start + 1:start + 3] == [
+        'scrawler_ipg_handler_seconds_sum{stage="hs\\"t1",topic="a"} 0.5',
+        'scrawler_ipg_handler_seconds_count{stage="hs\\"t1",topic="a"} 4',
+    ]
+    # Families without samples are left out.
+    assert not any('scrawler_kafka_queue' in line for line in lines)
+    assert text.endswith('\n')
+
+def test_statistics_are_only_requested_with_sinks(servers):
+    quiet = InterProcessGateway(get_config(servers), IPGMetrics('quiet', statistics_interval_ms=1))
+    assert quiet.broker_consumer.stats_cb is None
+    quiet.close()
+
+    sink = RecordingSink()
+    metrics = IPGMetrics('hst1', [sink], export_interval_seconds=0, statistics_interval_ms=1)
+    broker = InterProcessGateway(get_config(servers), metrics)
+    broker.set_consumers([IPGConsumer([TOPIC], JsonCodec, lambda payload: None)])
+    broker.send(JsonCodec, TOPIC, JsonCodec(1))
+    for _ in range(5):
+        broker.listen(timeout=0.01)
+        broker.emit()
+    broker.close()
+    snapshot = sink.snapshots[-1]
+    assert snapshot['topics'][TOPIC]['messages_consumed'] == 1
+    assert {p['partition'] for p in snapshot['partitions'] if p['topic'] == TOPIC} == {0, 1, 2}
@@ -0,0 +1,40 @@
+from dataclasses import dataclass
+from datetime import date, datetime
+import pytest
+from source.codec import json_backend
+
+
+@dataclass
+class Job:
+    id: int
+    posted: date
+
+
+VALUES = [
+    {'title': 'Intern', 'remote': True, 'salary': None, 'tags': ['a', 'b'], 'score': 0.5},
+    {1: 'int keys', 2.5: 'float keys', None: 'null key', False: 'bool key'},
+    {'unicode': 'café – 東京', 'escapes': 'quote " backslash \\ newline \n'},
+    {'posted_at': datetime(2025, 1, 2, 3, 4, 5), 'job': Job(7, date(2025, 1, 2))},
+    [2 ** 63 - 1, -(2 ** 63), 2 ** 64, -(2 ** 70), 10 ** 30],
+]
+
+
+@pytest.fixture(params=list(json_backend.JSON_BACKENDS))
+def backend(request) -> json_backend.JsonBackend:
+    return json_backend.JSON_BACKENDS[request.param]()
+
+
+@pytest.mark.parametrize('value', VALUES)
+def test_backends_write_the_same_json(value, backend):
+    assert backend.dumps(value) == json_backend.StdlibJsonBackend().dumps(value)
+
+
+@pytest.mark.parametrize('value', VALUES)
+def test_values_survive_a_round_trip(value, backend):
+    stdlib = json_backend.StdlibJsonBackend()
+    assert backend.loads(backend.dumps(value)) == stdlib.loads(stdlib.dumps(value))
+
+
+def test_unserializable_values_raise(backend):
+    with pytest.raises(TypeError):
+        backend.dumps({'lock': object()})
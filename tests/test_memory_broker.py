@@ -0,0 +1,168 @@
+import pytest
+from source import (
+    KafkaConnectionConfig,
+    KafkaConsumerConfig,
+    KafkaProducerConfig,
+    InterProcessGateway,
+    MemoryBroker,
+    RetryPolicy,
+    BatchCodec,
+    JsonCodec,
+    IPGConsumer,
+    HandshakeExtractor2Codec,
+    HandshakeTransformer2Codec,
+    HandshakeTransformer2BinaryCodec
+)
+
+TOPIC = 'pytest_memory_topic'
+
+
+@pytest.fixture()
+def servers(request):
+    name = f'memory-{request.node.name}'
+    yield name
+    MemoryBroker.reset(name)
+
+def get_config(servers: str, group_id: str = 'scrawler_pytest') -> KafkaConnectionConfig:
+    return KafkaConnectionConfig(
+        consumer_config=KafkaConsumerConfig(
+            bootstrap_servers=servers,
+            group_id=group_id,
+            auto_offset_reset='earliest',
+            enable_auto_commit=False
+        ),
+        producer_config=KafkaProducerConfig(bootstrap_servers=servers),
+        backend='memory'
+    )
+
+def run(broker: InterProcessGateway, polls: int):
+    for _ in range(polls):
+        broker.listen(timeout=0.01)
+        broker.emit()
+
+def test_round_trip_keeps_keys_on_one_partition(servers):
+    broker = InterProcessGateway(get_config(servers))
+    received = []
+    broker.set_consumers([IPGConsumer([TOPIC], HandshakeExtractor2Codec, received.append)])
+    for i in range(30):
+        job_id = i % 3
+        broker.send(HandshakeExtractor2Codec, TOPIC, HandshakeExtractor2Codec(job_id, 'role', f'/jobs/{job_id}'))
+    run(broker, 40)
+    broker.close()
+    assert len(received) == 30
+    partitions = {}
+    for log in MemoryBroker.get(servers).topics[TOPIC]:
+        for msg in log:
+            partitions.setdefault(msg.key(), set()).add(msg.partition())
+    assert all(len(p) == 1 for p in partitions.values())
+
+def test_unacknowledged_messages_are_redelivered(servers):
+    held = []
+    first = InterProcessGateway(get_config(servers))
+    first.set_consumers([IPGConsumer([TOPIC], JsonCodec, lambda p, ack: held.append(ack), manual_ack=True)])
+    for i in range(10):
+        first.send(JsonCodec, TOPIC, JsonCodec(i), key='same')
+    run(first, 10)
+    for ack in held[:4]:
+        ack()
+    first.close()
+
+    received = []
+    second = InterProcessGateway(get_config(servers))
+    second.set_consumers([IPGConsumer([TOPIC], JsonCodec, lambda p: received.append(p.payload))])
+    run(second, 10)
+    second.close()
+    assert received == list(range(4, 10))
+
+def test_failed_messages_end_in_dlq(servers):
+    def on_notify(payload):
+        raise ValueError(payload)
+    policy = RetryPolicy(delays_seconds=(0, 0))
+    broker = InterProcessGateway(get_config(servers))
+    broker.set_consumers([IPGConsumer([TOPIC], JsonCodec, on_notify, retry_policy=policy)])
+    broker.send(JsonCodec, TOPIC, JsonCodec('boom'))
+    run(broker, 20)
+    broker.close()
+    dlq = MemoryBroker.get(servers).topics[policy.dlq_topic(TOPIC)]
+    [msg] = [m for partition in dlq for m in partition]
+    assert dict(msg.headers())['x-attempt'] == b'3'
+    assert dict(msg.headers())['x-original-topic'] == TOPIC.encode()
+
+def test_group_members_share_partitions(servers):
+    received = {'a': [], 'b': []}
+    a = InterProcessGateway(get_config(servers))
+    b = InterProcessGateway(get_config(servers))
+    a.set_consumers([IPGConsumer([TOPIC], JsonCodec, lambda p: received['a'].append(p.payload))])
+    b.set_consumers([IPGConsumer([TOPIC], JsonCodec, lambda p: received['b'].append(p.payload))])
+    for i in range(30):
+        a.send(JsonCodec, TOPIC, JsonCodec(i))
+    for _ in range(20):
+        run(a, 1)
+        run(b, 1)
+    a.close()
+    b.close()
+    assert received['a'] and received['b']
+    assert sorted(received['a'] + received['b']) == list(range(30))
+
+def test_binary_envelope_survives_retries_and_reads_legacy_messages(servers):
+    attempts = []
+    def on_notify(message):
+        attempts.append(message)
+        if [m.url for m in attempts].count('/jobs/1') == 1 and message.url == '/jobs/1':
+            raise ValueError('first attempt')
+    policy = RetryPolicy(delays_seconds=(0,))
+    broker = InterProcessGateway(get_config(servers))
+    broker.set_consumers([IPGConsumer([TOPIC], HandshakeTransformer2BinaryCodec, on_notify, retry_policy=policy)])
+    broker.send(HandshakeTransformer2BinaryCodec, TOPIC, HandshakeTransformer2BinaryCodec('/jobs/1', '<p>binary</p>'))
+    broker.send(HandshakeTransformer2Codec, TOPIC, HandshakeTransformer2Codec('/jobs/2', '<p>legacy</p>'))
+    run(broker, 20)
+    broker.close()
+    assert sorted((m.url, m.html) for m in attempts) == [
+        ('/jobs/1', '<p>binary</p>'), ('/jobs/1', '<p>binary</p>'), ('/jobs/2', '<p>legacy</p>')
+    ]
+
+def test_batch_records_are_unpacked_and_acked_per_item(servers):
+    batch_codec = BatchCodec(JsonCodec)
+    held = []
+    first = InterProcessGateway(get_config(servers))
+    first.set_consumers([IPGConsumer([TOPIC], JsonCodec, None, lambda p, acks: held.extend(zip(p, acks)), manual_ack=True)])
+    first.send(batch_codec, TOPIC, [JsonCodec(i) for i in range(3)], key='same')
+    first.send(batch_codec, TOPIC, [JsonCodec(i) for i in range(3, 5)], key='same')
+    for _ in range(10):
+        first.listen_batch(10, timeout=0.01)
+    assert [p.payload for p, _ in held] == list(range(5))
+    for _, ack in held[:4]: #< the second record stays unacknowledged
+        ack()
+    first.close()
+
+    received = []
+    second = InterProcessGateway(get_config(servers))
+    second.set_consumers([IPGConsumer([TOPIC], JsonCodec, lambda p: received.append(p.payload))])
+    run(second, 10)
+    second.close()
+    assert received == [3, 4]
+
+def test_failed_batches_are_forwarded_without_repeating_side_effects(servers):
+    out_topic = f'{TOPIC}_out'
+    policy = RetryPolicy(delays_seconds=(0,))
+    broker = InterProcessGateway(get_config(servers))
+    attempts = []
+    def on_notify_batch(payloads, acks):
+        for payload, ack in zip(payloads, acks):
+            attempts.append(payload.payload)
+            if payload.payload == 3 and attempts.count(3) == 1:
+                raise ValueError('first attempt')
+            broker.send(JsonCodec, out_topic, payload)
+            ack()
+    broker.set_consumers([IPGConsumer([TOPIC], JsonCodec, None, on_notify_batch, manual_ack=True, retry_policy=policy)])
+    for i in range(6):
+        broker.send(JsonCodec, TOPIC, JsonCodec(i), key='same')
+    for _ in range(20):
+        broker.listen_batch(10, timeout=0.01)
+        broker.emit()
+    broker.close()
+    state = MemoryBroker.get(servers)
+    sent = [JsonCodec.deserialize(m.value()).payload for log in state.topics[out_topic] for m in log]
+    assert sorted(sent) == list(range(6))
+    assert sorted(attempts) == [0, 1, 2, 3, 3, 4, 5]
+    assert policy.dlq_topic(TOPIC) not in state.topics
@@ -0,0 +1,60 @@
+from confluent_kafka import TopicPartition
+from source import OffsetTracker
+from source.broker.services.offset_tracker import InFlightBudget
+
+
+def test_commit_waits_for_contiguous_acks():
+    tracker = OffsetTracker()
+    acks = [tracker.track('topic', 0, offset, 1)[0] for offset in range(3)]
+    acks[1]()
+    acks[2]()
+    assert tracker.pop_committable() == []
+    acks[0]()
+    [tp] = tracker.pop_committable()
+    assert (tp.topic, tp.partition, tp.offset) == ('topic', 0, 3)
+    assert tracker.num_in_flight == 0
+    assert tracker.pop_committable() == []
+
+
+def test_every_listener_must_ack():
+    tracker = OffsetTracker()
+    first, second = tracker.track('topic', 1, 7, 2)
+    first()
+    first() #< acknowledging twice has no effect
+    assert tracker.pop_committable() == []
+    second()
+    [tp] = tracker.pop_committable()
+    assert tp.offset == 8
+
+
+def test_forget_revoked_partition():
+    tracker = OffsetTracker()
+    [ack] = tracker.track('topic', 2, 0, 1)
+    tracker.track('topic', 3, 0, 1)
+    tracker.forget([TopicPartition('topic', 2)])
+    ack() #< late acks for revoked partitions are ignored
+    assert tracker.pop_committable() == []
+    assert tracker.num_in_flight == 1
+
+
+def test_has_in_flight():
+    tracker = OffsetTracker()
+    [ack] = tracker.track('topic', 0, 0, 1)
+    tracker.track('topic', 1, 0, 0) #< no listeners: acknowledged right away
+    assert tracker.has_in_flight([TopicPartition('topic', 0)])
+    assert not tracker.has_in_flight([TopicPartition('topic', 1)])
+    ack()
+    assert not tracker.has_in_flight([TopicPartition('topic', 0)])
+
+
+def test_ack_releases_budget():
+    tracker = OffsetTracker()
+    budget = InFlightBudget(2)
+    acks = [tracker.track('topic', 0, offset, 1)[0] for offset in range(2)]
+    for ack in acks:
+        ack.budget = budget
+        budget.acquire()
+    assert budget.is_exhausted
+    acks[0]()
+    acks[0]()
+    assert budget.in_flight == 1 and not budget.is_exhausted
\ No newline at end of file
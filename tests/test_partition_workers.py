@@ -0,0 +1,132 @@
+import random
+import time
+import pytest
+from source import (
+    KafkaConnectionConfig,
+    KafkaConsumerConfig,
+    KafkaProducerConfig,
+    PartitionedInterProcessGateway,
+    WorkerSetup,
+    MemoryBroker,
+    RetryPolicy,
+    JsonCodec,
+    IPGConsumer
+)
+
+TOPIC = 'pytest_partition_topic'
+GROUP = 'scrawler_pytest'
+POLICY = RetryPolicy(delays_seconds=())
+
+
+@pytest.fixture()
+def servers(request):
+    name = f'memory-{request.node.name}'
+    yield name
+    MemoryBroker.reset(name)
+
+def get_config(servers: str) -> KafkaConnectionConfig:
+    return KafkaConnectionConfig(
+        consumer_config=KafkaConsumerConfig(
+            bootstrap_servers=servers,
+            group_id=GROUP,
+            auto_offset_reset='earliest',
+            enable_auto_commit=False
+        ),
+        producer_config=KafkaProducerConfig(bootstrap_servers=servers),
+        backend='memory'
+    )
+
+def run_until(broker: PartitionedInterProcessGateway, condition, timeout: float = 30.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        broker.listen_batch(10, timeout=0.01)
+        broker.emit()
+
+def committed(servers: str, topic: str = TOPIC) -> int:
+    offsets = MemoryBroker.get(servers).committed
+    return sum(offset for (group, t, _), offset in offsets.items() if group == GROUP and t == topic)
+
+def dead_letters(servers: str) -> list[int]:
+    dlq = MemoryBroker.get(servers).topics.get(POLICY.dlq_topic(TOPIC), [])
+    return [JsonCodec.deserialize(msg.value()).payload for log in dlq for msg in log]
+
+def fail_odd_numbers(payload: JsonCodec):
+    if payload.payload % 2:
+        raise ValueError(f'odd: {payload.payload}')
+
+def setup_odd_number_worker() -> WorkerSetup:
+    # Runs in each worker process.
+    return WorkerSetup(consumers=[IPGConsumer([TOPIC], JsonCodec, fail_odd_numbers, retry_policy=POLICY)])
+
+def test_thread_workers_keep_partition_order(servers):
+    received = []
+    def on_notify(payload: JsonCodec):
+        time.sleep(random.random() / 1000)
+        received.append(tuple(payload.payload))
+    broker = PartitionedInterProcessGateway(get_config(servers), mode='thread')
+    broker.set_consumers([IPGConsumer([TOPIC], JsonCodec, on_notify)])
+    for i in range(60):
+        key = f'job-{i % 6}'
+        broker.send(JsonCodec, TOPIC, JsonCodec([key, i]), key=key)
+    run_until(broker, lambda: len(received) == 60)
+    assert broker.num_workers == len({m.partition() for log in MemoryBroker.get(servers).topics[TOPIC] for m in log})
+    broker.close()
+    for key in {key for key, _ in received}:
+        sent = [i for i in range(60) if f'job-{i % 6}' == key]
+        assert [i for k, i in received if k == key] == sent
+    assert committed(servers) == 60
+
+def test_revoked_partitions_are_drained_and_committed(servers):
+    received = {'first': [], 'second': []}
+    def on_notify(name: str):
+        def notify(payload: JsonCodec):
+            time.sleep(0.02)
+            received[name].append(payload.payload)
+        return notify
+    first = PartitionedInterProcessGateway(get_config(servers), mode='thread')
+    first.set_consumers([IPGConsumer([TOPIC], JsonCodec, on_notify('first'))])
+    for i in range(12):
+        first.send(JsonCodec, TOPIC, JsonCodec(i), key='same')
+    first.listen_batch(12, timeout=0.1) #< every message is now with a worker
+    assert len(received['first']) < 12
+
+    second = PartitionedInterProcessGateway(get_config(servers), mode='thread')
+    second.set_consumers([IPGConsumer([TOPIC], JsonCodec, on_notify('second'))])
+    first.listen_batch(12, timeout=0.01) #< the rebalance revokes the partitions
+    assert received['first'] == list(range(12))
+    assert committed(servers) == 12
+
+    for _ in range(10):
+        for broker in (first, second):
+            broker.listen_batch(12, timeout=0.01)
+    first.close()
+    second.close()
+    assert received['second'] == []
+
+def test_process_workers_report_acks_and_failures(servers):
+    broker = PartitionedInterProcessGateway(get_config(servers), mode='process', worker_setup=setup_odd_number_worker)
+    broker.set_consumers([IPGConsumer([TOPIC], JsonCodec, fail_odd_numbers, retry_policy=POLICY)])
+    for i in range(6):
+        broker.send(JsonCodec, TOPIC, JsonCodec(i))
+    run_until(broker, lambda: len(dead_letters(servers)) == 3)
+    run_until(broker, lambda: not broker.offset_tracker.has_in_flight(broker.broker_consumer.assignment()))
+    broker.close()
+    assert sorted(dead_letters(servers)) == [1, 3, 5]
+    assert committed(servers) == 6
+
+def test_retry_topics_share_the_bounded_workers(servers):
+    received = []
+    def on_notify(payload: JsonCodec):
+        received.append(payload.payload)
+    policy = RetryPolicy(delays_seconds=(0, 0))
+    broker = PartitionedInterProcessGateway(get_config(servers), mode='thread', max_workers=2)
+    broker.set_consumers([IPGConsumer([TOPIC], JsonCodec, on_notify, retry_policy=policy)])
+    for topic in [TOPIC, *policy.retry_topics(TOPIC)]:
+        for i in range(6):
+            broker.send(JsonCodec, topic, JsonCodec(i), key=f'job-{i}')
+    run_until(broker, lambda: len(received) == 18)
+    assert broker.num_workers == 2
+    # Consecutive partitions of a topic go to different workers, whatever the hash seed.
+    assert {broker._worker_id(TOPIC, partition) for partition in range(2)} == {0, 1}
+    broker.close()
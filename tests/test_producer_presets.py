@@ -0,0 +1,37 @@
+import pytest
+from source import KafkaProducerConfig, PRODUCER_PRESETS
+
+
+def test_as_dict_uses_librdkafka_names_and_skips_unset_fields():
+    assert KafkaProducerConfig('localhost:9092').as_dict() == {'bootstrap.servers': 'localhost:9092'}
+    assert KafkaProducerConfig.from_preset('throughput', 'localhost:9092').as_dict() == {
+        'bootstrap.servers': 'localhost:9092',
+        'linger.ms': 50,
+        'batch.size': 1_000_000,
+        'compression.type': 'zstd',
+        'acks': 'all',
+        'enable.idempotence': True,
+        'queue.buffering.max.messages': 500_000,
+    }
+
+def test_explicit_arguments_override_the_preset():
+    config = KafkaProducerConfig.from_preset('latency', 'localhost:9092', client_id='hse1', linger_ms=5)
+    assert config.as_dict() == {
+        **KafkaProducerConfig.from_preset('latency', 'localhost:9092').as_dict(),
+        'client.id': 'hse1',
+        'linger.ms': 5,
+    }
+    assert PRODUCER_PRESETS['latency']['linger_ms'] == 0 #< presets are not modified
+
+def test_overrides_are_validated_like_the_preset(monkeypatch):
+    with pytest.raises(ValueError):
+        KafkaProducerConfig.from_preset('throughput', 'localhost:9092', acks='1')
+    config = KafkaProducerConfig.from_preset('throughput', 'localhost:9092', acks='1', enable_idempotence=False)
+    assert config.as_dict()['acks'] == '1'
+    with pytest.raises(ValueError):
+        KafkaProducerConfig.from_preset('throughput', 'localhost:9092', compression_type='brotli')
+    with pytest.raises(ValueError):
+        KafkaProducerConfig.from_preset('fastest', 'localhost:9092')
+
+    monkeypatch.setenv('KAFKA_BOOSTRAP_SERVERS', 'kafka:29092')
+    assert KafkaProducerConfig.from_env(preset='latency').bootstrap_servers == 'kafka:29092'
@@ -0,0 +1,58 @@
+import asyncio
+from dataclasses import dataclass
+import pytest
+from source.crawlers.base import ResourceBlocker, ResourceBlockingConfig
+
+
+@dataclass
+class StandInRequest:
+    url: str
+    resource_type: str
+
+
+class StandInRoute:
+
+    def __init__(self) -> None:
+        self.outcome = None
+
+    async def continue_(self):
+        self.outcome = 'continued'
+
+    async def abort(self, error_code: str):
+        self.outcome = error_code
+
+
+def test_blocks_resource_types_trackers_and_third_parties_unless_allowed():
+    config = ResourceBlockingConfig(
+        block_third_party=True,
+        first_party_domains=frozenset({'joinhandshake.com'}),
+        allowed_url_patterns=(r'^https://cdn\.example\.com/app\.js$',)
+    )
+    assert config.block_reason('https://app.joinhandshake.com/jobs/1', 'document') is None
+    assert config.block_reason('https://app.joinhandshake.com/logo.png', 'image') == 'image'
+    assert config.block_reason('https://www.google-analytics.com/g/collect', 'xhr') == 'domain'
+    assert config.block_reason('https://cdn.example.com/other.js', 'script') == 'third-party'
+    assert config.block_reason('https://cdn.example.com/app.js', 'script') is None
+    assert config.block_reason('https://app.joinhandshake.com/app.js', 'script') is None
+    with pytest.raises(ValueError):
+        ResourceBlockingConfig(block_third_party=True)
+
+def test_routes_count_blocked_requests():
+    blocker = ResourceBlocker()
+    requests = [
+        StandInRequest('https://app.joinhandshake.com/jobs/1', 'document'),
+        StandInRequest('https://app.joinhandshake.com/a.woff2', 'font'),
+        StandInRequest('https://app.joinhandshake.com/b.png', 'image'),
+        StandInRequest('https://www.googletagmanager.com/gtm.js', 'script'),
+    ]
+    routes = [StandInRoute() for _ in requests]
+
+    async def route_all():
+        for route, request in zip(routes, requests):
+            await blocker.route(route, request)
+
+    asyncio.run(route_all())
+    assert [r.outcome for r in routes] == ['continued', 'blockedbyclient', 'blockedbyclient', 'blockedbyclient']
+    stats = blocker.pop_stats()
+    assert stats.blocked_requests == 3 and stats.blocked_by_reason == {'font': 1, 'image': 1, 'domain': 1}
+    assert blocker.pop_stats().blocked_requests == 0
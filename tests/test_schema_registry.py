@@ -0,0 +1,62 @@
+from dataclasses import dataclass
+import json
+import pytest
+from source import (
+    SchemaRegistry,
+    BatchCodec,
+    InterProcessGateway,
+    IPGConsumer,
+    HandshakeExtractor2Codec
+)
+from tests.test_memory_broker import get_config, run, servers
+
+TOPIC = 'pytest_schema_topic'
+
+
+@dataclass(frozen=True)
+class JobV2:
+    job_id: int
+    title: str
+    url: str
+
+    @classmethod
+    def serialize(cls, message: 'JobV2') -> bytes:
+        return json.dumps({'job_id': message.job_id, 'title': message.title, 'url': message.url}).encode()
+
+    @classmethod
+    def deserialize(cls, message: bytes) -> 'JobV2':
+        return cls(**json.loads(message))
+
+
+def upgrade_job(message: HandshakeExtractor2Codec) -> JobV2:
+    return JobV2(message.job_id, message.role, message.url)
+
+def get_registry(with_v2: bool) -> SchemaRegistry:
+    registry = SchemaRegistry()
+    registry.register('job', 1, HandshakeExtractor2Codec, upgrade=upgrade_job if with_v2 else None)
+    if with_v2:
+        registry.register('job', 2, JobV2)
+    return registry
+
+
+def test_old_and_new_versions_decode_side_by_side():
+    old = get_registry(with_v2=False).codec('job')
+    new = get_registry(with_v2=True).codec('job')
+    v1 = HandshakeExtractor2Codec(1, 'Intern', '/jobs/1')
+    v2 = JobV2(2, 'Engineer', '/jobs/2')
+    assert new.deserialize(old.serialize(v1), old.headers(v1)) == JobV2(1, 'Intern', '/jobs/1')
+    assert new.deserialize(new.serialize(v2), new.headers(v2)) == v2
+    assert new.deserialize(HandshakeExtractor2Codec.serialize(v1)) == JobV2(1, 'Intern', '/jobs/1') #< no headers: legacy v1
+    with pytest.raises(ValueError):
+        old.deserialize(new.serialize(v2), new.headers(v2))
+
+def test_batched_versioned_messages(servers):
+    producer_codec = get_registry(with_v2=False).codec('job')
+    consumer_codec = get_registry(with_v2=True).codec('job')
+    received = []
+    broker = InterProcessGateway(get_config(servers))
+    broker.set_consumers([IPGConsumer([TOPIC], consumer_codec, received.append)])
+    broker.send(BatchCodec(producer_codec), TOPIC, [HandshakeExtractor2Codec(i, 'Intern', f'/jobs/{i}') for i in range(3)])
+    run(broker, 10)
+    broker.close()
+    assert received == [JobV2(i, 'Intern', f'/jobs/{i}') for i in range(3)]
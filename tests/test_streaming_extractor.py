@@ -0,0 +1,240 @@
+import asyncio
+import json
+import time
+from dataclasses import dataclass, field
+import pytest
+from crawl4ai import RateLimiter
+from source import KafkaConnectionConfig, KafkaConsumerConfig, KafkaProducerConfig, InterProcessGateway, MemoryBroker, BatchCodec
+from source.broker.services.retry import HEADER_ATTEMPT, HEADER_EXCEPTION, HEADER_ORIGINAL_TOPIC
+from source.codec import HandshakeExtractor2Codec, EXTRACTOR_2_CODEC
+from source.crawlers.base import CrawlerPool, EventLoopThread
+from source.database import UrlFrontier, UrlFrontierConfig
+from source.services.handshake_extractor_2 import HandshakeExtractor2, HandshakeExtractor2Config
+
+
+@dataclass
+class StandInResult:
+    url: str
+    success: bool = True
+    status_code: int = 200
+    redirected_url: str | None = None
+
+    @property
+    def extracted_content(self) -> str:
+        return json.dumps([{'main_html': f'<main>{self.url}</main>'}])
+
+
+class StandInSite:
+    """Serves job pages after a delay; pages whose URL contains 'slow' never finish and pages
+    whose URL contains 'boom' raise."""
+
+    def __init__(self, delay: float = 0.01) -> None:
+        self.delay = delay
+        self.in_flight = 0
+        self.peak = 0
+        self.started: dict[str, float] = {}
+
+    def factory(self):
+        site = self
+
+        class Crawler:
+            async def start(self): pass
+            async def close(self): pass
+            async def arun(self, url, config=None, **kwargs):
+                site.started[url] = time.monotonic()
+                if 'boom' in url:
+                    raise RuntimeError('page crashed')
+                site.in_flight += 1
+                site.peak = max(site.peak, site.in_flight)
+                try:
+                    await asyncio.sleep(3600 if 'slow' in url else site.delay)
+                finally:
+                    site.in_flight -= 1
+                return StandInResult(url)
+
+        class Factory:
+            def create_crawler(self):
+                return Crawler()
+
+        return Factory()
+
+
+class StandInAuth:
+    def __init__(self, failures: int = 0) -> None:
+        self.failures = failures
+
+    def add_session_pool(self, pool): pass
+    async def ensure_session(self):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError('login page unreachable')
+    def is_login_redirect(self, url): return False
+    def report_redirect(self): pass
+    async def close(self): pass
+
+
+class StandInRepo:
+    def __init__(self) -> None:
+        self.success: dict[str, bool] = {}
+
+    def set_e2_success(self, url: str, is_success: bool):
+        self.success[url] = is_success
+
+
+class RecordingBroker:
+    def __init__(self) -> None:
+        self.sent = []
+        self.dead_letters: dict[str, dict[str, bytes]] = {}
+
+    def send(self, codec, topic, message, cb=None, headers=None):
+        if topic.endswith('.dlq'):
+            self.dead_letters[message.url] = dict(headers)
+        else:
+            self.sent.append(message.url)
+        if cb is not None:
+            cb(None, None)
+
+
+class StandInAck:
+    def __init__(self) -> None:
+        self.is_acked = False
+
+    def __call__(self) -> None:
+        self.is_acked = True
+
+
+@dataclass(frozen=True)
+class StandInConfig(HandshakeExtractor2Config):
+    WINDOW = 3
+    PAGES_PER_LEASE = 4
+    STREAM_MAX_BACKOFF_SECONDS = 0.05
+    frontier_path: str = ''
+    auth_failures: int = 0
+    site: StandInSite = field(default_factory=StandInSite)
+
+    def get_auth(self):
+        return StandInAuth(self.auth_failures)
+
+    def get_crawler_pool(self, resource_blocker):
+        return CrawlerPool(self.site.factory(), loop=EventLoopThread())
+
+    def get_frontier(self):
+        return UrlFrontier(UrlFrontierConfig(path=self.frontier_path))
+
+    def get_rate_limiter(self):
+        return RateLimiter(base_delay=(0, 0))
+
+
+def jobs(names: list[str]) -> tuple[list[HandshakeExtractor2Codec], list[StandInAck]]:
+    return [HandshakeExtractor2Codec(i, 'Intern', f'/jobs/{name}') for i, name in enumerate(names)], [StandInAck() for _ in names]
+
+
+def wait_until(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, 'timed out'
+        time.sleep(0.005)
+
+
+def test_jobs_stream_through_a_bounded_window(tmp_path):
+    config = StandInConfig(frontier_path=str(tmp_path / 'frontier.sqlite3'))
+    extractor = HandshakeExtractor2(RecordingBroker(), StandInRepo(), config)
+    messages, acks = jobs([str(i) for i in range(10)])
+    extractor.on_notify_batch(messages, acks)
+    wait_until(lambda: all(ack.is_acked for ack in acks))
+    assert config.site.peak == config.WINDOW
+    assert sorted(extractor.broker.sent) == sorted(m.url for m in messages)
+    assert extractor.repo.success == {m.url: True for m in messages}
+
+    # An idle extractor starts a new job at once, instead of waiting for a buffer to fill.
+    (message,), (ack,) = jobs(['late'])
+    enqueued = time.monotonic()
+    extractor.on_notify(message, ack)
+    wait_until(lambda: ack.is_acked)
+    assert config.site.started[message.url] - enqueued < 0.5
+    assert extractor.shutdown(deadline=1) == []
+
+
+def test_shutdown_cancels_pages_after_the_deadline_and_returns_unprocessed_jobs(tmp_path):
+    config = StandInConfig(frontier_path=str(tmp_path / 'frontier.sqlite3'))
+    extractor = HandshakeExtractor2(RecordingBroker(), StandInRepo(), config)
+    messages, acks = jobs(['slow-1', 'slow-2', 'slow-3', 'queued-1', 'queued-2'])
+    extractor.on_notify_batch(messages, acks)
+    wait_until(lambda: config.site.in_flight == config.WINDOW)
+
+    started = time.monotonic()
+    unprocessed = extractor.shutdown(deadline=0.1)
+    assert time.monotonic() - started < 2
+    assert sorted(m.url for m in unprocessed) == sorted(m.url for m in messages)
+    assert not any(ack.is_acked for ack in acks)
+    assert config.site.in_flight == 0
+
+
+def test_failed_scrapes_are_retried_then_dead_lettered(tmp_path):
+    config = StandInConfig(frontier_path=str(tmp_path / 'frontier.sqlite3'))
+    extractor = HandshakeExtractor2(RecordingBroker(), StandInRepo(), config)
+    messages, acks = jobs(['boom', 'ok'])
+    extractor.on_notify_batch(messages, acks)
+    wait_until(lambda: all(ack.is_acked for ack in acks))
+    headers = extractor.broker.dead_letters['/jobs/boom']
+    assert headers[HEADER_ORIGINAL_TOPIC] == config.TOPICS[0].encode()
+    assert headers[HEADER_ATTEMPT] == str(config.MAX_SCRAPE_ATTEMPTS).encode()
+    assert headers[HEADER_EXCEPTION] == b'RuntimeError'
+    assert extractor.repo.success == {'/jobs/boom': False, '/jobs/ok': True}
+    assert extractor.shutdown(deadline=1) == []
+
+
+@pytest.fixture()
+def servers(request):
+    name = f'memory-{request.node.name}'
+    yield name
+    MemoryBroker.reset(name)
+
+def test_dead_jobs_release_the_budget_and_commit(servers, tmp_path):
+    broker = InterProcessGateway(KafkaConnectionConfig(
+        consumer_config=KafkaConsumerConfig(
+            bootstrap_servers=servers,
+            group_id='scrawler_pytest',
+            auto_offset_reset='earliest',
+            enable_auto_commit=False
+        ),
+        producer_config=KafkaProducerConfig(bootstrap_servers=servers),
+        backend='memory'
+    ))
+    config = StandInConfig(frontier_path=str(tmp_path / 'frontier.sqlite3'))
+    extractor = HandshakeExtractor2(broker, StandInRepo(), config)
+    broker.set_consumers([extractor.consumer_info])
+    topic = config.TOPICS[0]
+    # More records than MAX_IN_FLIGHT, and every page fails.
+    for record in range(config.MAX_IN_FLIGHT + 1):
+        messages, _ = jobs([f'boom-{record}-{i}' for i in range(2)])
+        broker.send(BatchCodec(EXTRACTOR_2_CODEC), topic, messages)
+    budget = broker.listener_registry[topic][0].budget
+    state = MemoryBroker.get(servers)
+
+    def settled() -> bool:
+        broker.listen_batch(10, timeout=0.01)
+        broker.emit()
+        dead_letters = sum(len(log) for log in state.topics.get(config.RETRY_POLICY.dlq_topic(topic), []))
+        committed = sum(offset for (_, t, _), offset in state.committed.items() if t == topic)
+        return dead_letters == 2 * (config.MAX_IN_FLIGHT + 1) and committed == config.MAX_IN_FLIGHT + 1
+    wait_until(settled, timeout=10)
+    assert budget.in_flight == 0
+    assert extractor.shutdown(deadline=1) == []
+    broker.close()
+
+
+def test_the_stream_survives_session_failures(tmp_path):
+    config = StandInConfig(frontier_path=str(tmp_path / 'frontier.sqlite3'), auth_failures=2)
+    extractor = HandshakeExtractor2(RecordingBroker(), StandInRepo(), config)
+    messages, acks = jobs(['1', '2'])
+    extractor.on_notify_batch(messages, acks)
+    wait_until(lambda: all(ack.is_acked for ack in acks))
+    assert extractor.auth.failures == 0
+    assert extractor.shutdown(deadline=1) == []
+
+
+def test_an_extractor_that_never_received_a_message_shuts_down(tmp_path):
+    config = StandInConfig(frontier_path=str(tmp_path / 'frontier.sqlite3'))
+    extractor = HandshakeExtractor2(RecordingBroker(), StandInRepo(), config)
+    assert extractor.shutdown(deadline=1) == []
@@ -0,0 +1,89 @@
+from source.database import BloomFilter, UrlFrontier, UrlFrontierConfig
+
+DAY = 24 * 3600
+
+
+def url(i: int) -> str:
+    return f'https://app.joinhandshake.com/jobs/{i}'
+
+
+def frontier_at(tmp_path, **kwargs) -> UrlFrontier:
+    return UrlFrontier(UrlFrontierConfig(path=str(tmp_path / 'frontier.sqlite3'), **kwargs))
+
+
+def test_bloom_filter_has_no_false_negatives():
+    bloom = BloomFilter(capacity=1000, error_rate=0.01)
+    for i in range(1000):
+        bloom.add(url(i))
+    assert all(url(i) in bloom for i in range(1000))
+    false_positives = sum(url(i) in bloom for i in range(1000, 11000))
+    assert false_positives < 300
+
+
+def test_new_urls_are_admitted_once(tmp_path):
+    frontier = frontier_at(tmp_path)
+    first = frontier.admit([url(1), url(2), url(1)], now=0)
+    assert first.new == [url(1), url(2)] and first.recrawl == []
+    assert frontier.admit([url(1), url(2), url(3)], now=60).urls == [url(3)]
+
+
+def test_bloom_false_positives_are_still_admitted(tmp_path):
+    # A filter sized for one URL answers "maybe seen" for almost every URL.
+    frontier = frontier_at(tmp_path, bloom_capacity=1)
+    frontier.admit([url(i) for i in range(100)], now=0)
+    assert frontier.admit([url(i) for i in range(100, 200)], now=60).new == [url(i) for i in range(100, 200)]
+    assert frontier.seen([url(i) for i in range(150, 250)]) == {url(i) for i in range(150, 200)}
+
+
+def test_stale_urls_are_recrawled_stalest_first(tmp_path):
+    frontier = frontier_at(tmp_path, refresh_interval_seconds=7 * DAY, max_recrawls_per_admit=2)
+    frontier.admit([url(1), url(2), url(3), url(4)], now=0)
+    for i, crawled_at in [(1, 2 * DAY), (2, 0), (3, 1 * DAY), (4, 9 * DAY)]:
+        frontier.mark_crawled(url(i), True, now=crawled_at)
+    admission = frontier.admit([url(1), url(2), url(3), url(4), url(5)], now=10 * DAY)
+    assert admission.new == [url(5)]
+    assert admission.recrawl == [url(2), url(3)]
+    # Scheduled re-crawls are not scheduled twice.
+    assert frontier.admit([url(2), url(3)], now=10 * DAY + 60).urls == []
+
+
+def test_failed_crawls_are_retried_after_the_schedule_timeout(tmp_path):
+    frontier = frontier_at(tmp_path, schedule_timeout_seconds=3600)
+    frontier.admit([url(1)], now=0)
+    frontier.mark_crawled(url(1), False, now=60)
+    assert frontier.admit([url(1)], now=120).urls == []
+    assert frontier.admit([url(1)], now=3601).recrawl == [url(1)]
+
+
+def test_frontier_persists_and_is_shared(tmp_path):
+    frontier = frontier_at(tmp_path)
+    frontier.admit([url(1)], now=0)
+    frontier.mark_crawled(url(1), True, now=60)
+    frontier.close()
+
+    reopened, other = frontier_at(tmp_path), frontier_at(tmp_path)
+    assert reopened.last_crawled(url(1)) == 60
+    assert reopened.admit([url(1)], now=120).urls == []
+    # A URL another process admitted is not new, even though this filter never saw it.
+    other.admit([url(2)], now=0)
+    assert reopened.admit([url(2)], now=60).urls == []
+
+
+def test_seed_records_known_urls(tmp_path):
+    frontier = frontier_at(tmp_path, refresh_interval_seconds=DAY)
+    assert frontier.seed([(url(1), 0.0), (url(2), None)]) == 2
+    assert frontier.seed([(url(1), 0.0)]) == 0
+    assert frontier.admit([url(1), url(2)], now=DAY / 2).recrawl == [url(2)]
+
+
+def test_seen_does_not_admit_and_watermarks_never_move_back(tmp_path):
+    frontier, other = frontier_at(tmp_path), frontier_at(tmp_path)
+    assert frontier.seen([url(1)]) == set()
+    other.admit([url(1)], now=0)
+    assert frontier.seen([url(1), url(2)]) == {url(1)}
+    assert frontier.admit([url(2)], now=0).new == [url(2)]
+
+    assert frontier.get_watermark('listing') is None
+    frontier.set_watermark('listing', 60)
+    other.set_watermark('listing', 55)
+    assert frontier.get_watermark('listing') == 60
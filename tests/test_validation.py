@@ -0,0 +1,60 @@
+from datetime import datetime
+import pytest
+from pydantic import ValidationError
+from source import (
+    HandshakeLoader1Codec,
+    classproperty,
+    get_type_adapter,
+    trusted_producer,
+    Stock
+)
+
+
+PROPS = {
+    'about': 'Build data pipelines.',
+    'apply_by': datetime(2026, 1, 2),
+    'apply_type': 'Handshake',
+    'company': 'Company',
+    'documents': ['Resume'],
+    'employment_type': 'Full-Time',
+    'industry': 'Internet & Software',
+    'job_type': 'Internship',
+    'location': 'Remote',
+    'location_type': ['Remote'],
+    'position': 'Intern',
+    'posted_at': None,
+    'url': 'https://app.joinhandshake.com/jobs/1',
+    'wage': [25, 35],
+}
+
+
+def test_classproperty_caches_falsy_results_per_class():
+    calls = []
+
+    class Base:
+        @classproperty(cached=True)
+        def names(cls):
+            calls.append(cls)
+            return [] if cls is Base else [cls.__name__]
+
+    class Child(Base):
+        pass
+
+    assert Base.names == [] and Base.names == []
+    assert Child.names == ['Child'] and Child.names == ['Child']
+    assert calls == [Base, Child]
+
+def test_type_adapters_are_memoized():
+    assert get_type_adapter(HandshakeLoader1Codec.Props) is get_type_adapter(HandshakeLoader1Codec.Props)
+
+def test_loader_codec_round_trip():
+    props = Stock({**PROPS, 'scraped_at': datetime(2026, 1, 1)}).collect(HandshakeLoader1Codec.Props)
+    message = HandshakeLoader1Codec(**props)
+    assert HandshakeLoader1Codec.deserialize(HandshakeLoader1Codec.serialize(message)) == message
+
+def test_trusted_producer_skips_outgoing_validation():
+    message = HandshakeLoader1Codec(**{**PROPS, 'documents': 'Resume'})
+    with pytest.raises(ValidationError):
+        HandshakeLoader1Codec.serialize(message)
+    with trusted_producer():
+        HandshakeLoader1Codec.serialize(message)
@@ -0,0 +1,77 @@
+"""Samples messages from the five pipeline topics into a local codec corpus.
+
+Every topic of source.provisioning is read from the beginning with a throwaway consumer group
+(nothing is committed), and up to --samples messages per topic are kept by reservoir sampling
+over the first --scan messages read. Batch records are split into their items, so the corpus
+holds one message per line.
+
+The corpus drives the codec round-trip tests (tests/test_codec_corpus.py) and the codec
+benchmarks (benchmarks/test_codec_corpus.py). It holds real job pages: keep it out of git.
+
+Usage:
+    python -m tools.capture_codec_corpus [--out corpus/codec_corpus.jsonl] [--samples 500]
+"""
+import argparse
+import random
+import time
+from confluent_kafka import Consumer
+from source.broker import KafkaConsumerConfig
+from source.codec.corpus import CorpusRecord, default_corpus_path, split_batch, write_corpus
+from source.provisioning import (
+    get_topic_hse1,
+    get_topic_hse2,
+    get_topic_hst1,
+    get_topic_hst2,
+    get_topic_hsl
+)
+
+
+def pipeline_topics() -> list[str]:
+    return [get_topic().topic for get_topic in (get_topic_hse1, get_topic_hse2, get_topic_hst1, get_topic_hst2, get_topic_hsl)]
+
+
+def capture(topics: list[str], samples: int, scan: int, timeout: float, seed: int) -> dict[str, list[CorpusRecord]]:
+    config = KafkaConsumerConfig.from_env(f'codec-corpus-capture-{int(time.time())}', enable_auto_commit=False)
+    consumer = Consumer({**config.as_dict(), 'auto.offset.reset': 'earliest'})
+    consumer.subscribe(topics)
+    rng = random.Random(seed)
+    reservoirs: dict[str, list[CorpusRecord]] = {topic: [] for topic in topics}
+    seen = dict.fromkeys(topics, 0)
+    deadline = time.monotonic() + timeout
+    try:
+        while time.monotonic() < deadline and any(n < scan for n in seen.values()):
+            for msg in consumer.consume(500, timeout=1.0):
+                if msg.error() is not None or seen[msg.topic()] >= scan:
+                    continue
+                record = CorpusRecord(msg.topic(), msg.value(), list(msg.headers() or []), msg.key())
+                for item in split_batch(record):
+                    seen[item.topic] += 1
+                    reservoir = reservoirs[item.topic]
+                    if len(reservoir) < samples:
+                        reservoir.append(item)
+                    elif (i := rng.randrange(seen[item.topic])) < samples:
+                        reservoir[i] = item
+    finally:
+        consumer.close()
+    return reservoirs
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--out', default=default_corpus_path())
+    parser.add_argument('--samples', type=int, default=500, help='Messages kept per topic')
+    parser.add_argument('--scan', type=int, default=5000, help='Messages read per topic to sample from')
+    parser.add_argument('--timeout', type=float, default=120.0, help='Seconds to spend reading the topics')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    reservoirs = capture(pipeline_topics(), args.samples, args.scan, args.timeout, args.seed)
+    for topic, records in reservoirs.items():
+        size = sum(len(r.value) for r in records) / max(len(records), 1)
+        print(f'{topic:<36}: {len(records):>6} messages, {size:>9,.0f} bytes/msg')
+    n = write_corpus(args.out, (record for records in reservoirs.values() for record in records))
+    print(f'Wrote {n} messages to {args.out}')
+
+
+if __name__ == '__main__':
+    main()
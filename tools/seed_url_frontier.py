@@ -0,0 +1,39 @@
+"""Seeds the URL frontier with the jobs already in the data lake.
+
+Without it, the first transformer run after the frontier is deployed would take every known job
+for a new one and send it to the extractor again. Jobs the extractor scraped are recorded as
+crawled at their creation time, so they are refreshed first; the others are due at once.
+
+Usage:
+    python -m tools.seed_url_frontier [--collection handshake]
+"""
+import argparse
+from typing import Iterator, Optional
+from source.database import HandshakeLake, UrlFrontier
+
+
+def crawls(lake: HandshakeLake) -> Iterator[tuple[str, Optional[float]]]:
+    collection = lake.conn.get_collection(lake.collection_name)
+    for doc in collection.find({'url': {'$exists': True}}, {'url': 1, 'created_at': 1, 'e2_success': 1}):
+        crawled_at = doc.get('created_at') if doc.get('e2_success') else None
+        yield doc['url'], None if crawled_at is None else crawled_at.timestamp()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--collection', default='handshake')
+    args = parser.parse_args()
+
+    lake = HandshakeLake(args.collection)
+    lake.connect()
+    frontier = UrlFrontier.from_env()
+    try:
+        n = frontier.seed(crawls(lake))
+    finally:
+        frontier.close()
+        lake.close()
+    print(f'Seeded {n} URLs into {frontier.config.path}')
+
+
+if __name__ == '__main__':
+    main()
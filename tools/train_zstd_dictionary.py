@@ -0,0 +1,90 @@
+"""Trains the next version of the zstd dictionary used to compress job pages.
+
+Samples are read from --html-dir, or from the pages HSE2 currently publishes to
+HandshakeTransformer2BinaryCodec.TOPIC (read with a throwaway consumer group, nothing is
+committed). 10% of the samples are held out to compare the new dictionary against zlib and
+plain zstd before it is saved.
+
+Producers only switch to the new version on restart, and consumers need every version still
+referenced by retained messages, so deploy the file to consumers first and never delete old ones.
+
+Usage:
+    python -m tools.train_zstd_dictionary --dictionary-dir dictionaries [--html-dir pages/] [--samples 2000]
+"""
+import argparse
+import os
+import time
+import zlib
+import zstandard
+from pathlib import Path
+from confluent_kafka import Consumer
+from source.broker import KafkaConsumerConfig
+from source.codec import HandshakeTransformer2BinaryCodec
+from source.codec.compression import DictionaryStore
+
+
+def pages_from_dir(html_dir: str, limit: int) -> list[bytes]:
+    return [p.read_bytes() for p in sorted(Path(html_dir).glob('*.html'))[:limit]]
+
+
+def pages_from_topic(limit: int, timeout: float) -> list[bytes]:
+    config = KafkaConsumerConfig.from_env(f'zstd-dictionary-trainer-{int(time.time())}', enable_auto_commit=False)
+    consumer = Consumer({**config.as_dict(), 'auto.offset.reset': 'earliest'})
+    consumer.subscribe([HandshakeTransformer2BinaryCodec.TOPIC])
+    pages = []
+    deadline = time.monotonic() + timeout
+    try:
+        while len(pages) < limit and time.monotonic() < deadline:
+            for msg in consumer.consume(min(500, limit - len(pages)), timeout=1.0):
+                if msg.error() is None:
+                    message = HandshakeTransformer2BinaryCodec.deserialize(msg.value(), msg.headers())
+                    pages.append(message.html.encode('utf-8'))
+    finally:
+        consumer.close()
+    return pages
+
+
+def compressed_size(pages: list[bytes], compress) -> int:
+    return sum(len(compress(page)) for page in pages)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--dictionary-dir', default=os.environ.get('SCRAWLER_ZSTD_DICTIONARY_DIR'))
+    parser.add_argument('--prefix', default='handshake')
+    parser.add_argument('--html-dir', default=None)
+    parser.add_argument('--samples', type=int, default=2000)
+    parser.add_argument('--timeout', type=float, default=60.0, help='Seconds to spend reading the topic')
+    parser.add_argument('--dict-kb', type=int, default=112, help='Size of the trained dictionary')
+    parser.add_argument('--level', type=int, default=3)
+    parser.add_argument('--dry-run', action='store_true', help='Report the ratios without saving')
+    args = parser.parse_args()
+    if not args.dictionary_dir:
+        parser.error('--dictionary-dir (or SCRAWLER_ZSTD_DICTIONARY_DIR) is required')
+
+    pages = pages_from_dir(args.html_dir, args.samples) if args.html_dir else pages_from_topic(args.samples, args.timeout)
+    if len(pages) < 10:
+        raise SystemExit(f'Need at least 10 sample pages, found {len(pages)}')
+    held_out = pages[::10]
+    training = [page for i, page in enumerate(pages) if i % 10]
+    dictionary = zstandard.train_dictionary(args.dict_kb * 1024, training, level=args.level)
+
+    raw = sum(map(len, held_out))
+    with_dict = zstandard.ZstdCompressor(level=args.level, dict_data=dictionary)
+    without_dict = zstandard.ZstdCompressor(level=args.level)
+    print(f'{len(training)} training pages, {len(held_out)} held out ({raw / len(held_out) / 1024:,.1f} KB average)')
+    for name, compress in [
+        ('zlib', zlib.compress),
+        (f'zstd -{args.level}', without_dict.compress),
+        (f'zstd -{args.level} + dictionary', with_dict.compress),
+    ]:
+        print(f'{name:<26}: {raw / compressed_size(held_out, compress):>6.2f}x')
+
+    if args.dry_run:
+        return
+    name = DictionaryStore(args.dictionary_dir, args.prefix).save(dictionary)
+    print(f"Saved '{name}' (dict id {dictionary.dict_id()}) to {args.dictionary_dir}")
+
+
+if __name__ == '__main__':
+    main()